@@ -0,0 +1,155 @@
+# bench_layout.py
+"""
+Render benchmark for the print engine.
+
+Times the public drawing entry points and the unified layout engine on each
+output target (print-resolution page, PDF page, raster image, preview fields),
+using sample_data.json. Run offscreen:
+
+    QT_QPA_PLATFORM=offscreen python bench_layout.py
+    QT_QPA_PLATFORM=offscreen python bench_layout.py --save output/bench.json
+    QT_QPA_PLATFORM=offscreen python bench_layout.py --compare output/bench.json
+
+--compare exits with status 1 when any case is more than --tolerance slower
+than the saved run.
+"""
+from PyQt5 import QtCore, QtGui, QtWidgets, QtPrintSupport
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import print_layout
+import text_layout
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+A4_300DPI = (2480, 3508)
+
+
+def _image(w, h, dpi):
+    img = QtGui.QImage(w, h, QtGui.QImage.Format_RGB32)
+    dpm = int(round(dpi / 0.0254))
+    img.setDotsPerMeterX(dpm)
+    img.setDotsPerMeterY(dpm)
+    img.fill(QtCore.Qt.white)
+    return img
+
+
+def _median_ms(fn, repeat):
+    fn()  # warm caches the way a second print of the same record would
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(times)
+
+
+def _on_image(draw, dpi=300, size=A4_300DPI):
+    def run():
+        img = _image(size[0], size[1], dpi)
+        p = QtGui.QPainter(img)
+        try:
+            draw(p, img.rect())
+        finally:
+            p.end()
+    return run
+
+
+def run_benchmarks(data, coords_file, repeat=30):
+    results = {}
+    profile = print_layout.load_coordinates_profile(coords_file)
+
+    class _Page:
+        """QPrinter stand-in so the printer-style entry points can draw onto an image."""
+        def __init__(self, rect):
+            self._rect = rect
+
+        def pageRect(self):
+            return self._rect
+
+        def setPaperSize(self, *args):
+            pass
+
+        def setFullPage(self, *args):
+            pass
+
+    results["draw_certificate_from_coords@300dpi"] = _median_ms(_on_image(
+        lambda p, r: print_layout.draw_certificate_from_coords(p, _Page(r), data, coords_file=coords_file)), repeat)
+    results["draw_certificate@300dpi"] = _median_ms(_on_image(
+        lambda p, r: print_layout.draw_certificate(p, _Page(r), data, profile=profile)), repeat)
+
+    if not hasattr(print_layout, "render_certificate"):
+        return results
+
+    plan = print_layout.load_layout(coords_file)
+    render = print_layout.render_certificate
+
+    results["engine.print@300dpi"] = _median_ms(_on_image(lambda p, r: render(p, r, plan, data)), repeat)
+    results["engine.raster@150dpi"] = _median_ms(
+        _on_image(lambda p, r: render(p, r, plan, data), dpi=150, size=(1240, 1754)), repeat)
+
+    def pdf_page():
+        with tempfile.TemporaryDirectory() as tmp:
+            printer = QtPrintSupport.QPrinter(QtPrintSupport.QPrinter.HighResolution)
+            printer.setOutputFormat(QtPrintSupport.QPrinter.PdfFormat)
+            printer.setOutputFileName(os.path.join(tmp, "bench.pdf"))
+            printer.setFullPage(True)
+            printer.setPageSize(QtPrintSupport.QPrinter.A4)
+            p = QtGui.QPainter(printer)
+            try:
+                render(p, printer.pageRect(), plan, data)
+            finally:
+                p.end()
+    results["engine.pdf"] = _median_ms(pdf_page, max(5, repeat // 3))
+
+    def preview_fields():
+        for field, text in print_layout.bind_fields(plan, data):
+            print_layout.place_field(field, text, plan.font_family, 96, 96)
+    results["engine.preview_layout@96dpi"] = _median_ms(preview_fields, repeat)
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--coords", default=os.path.join(HERE, "coordinates.json"))
+    ap.add_argument("--data", default=os.path.join(HERE, "sample_data.json"))
+    ap.add_argument("--repeat", type=int, default=30)
+    ap.add_argument("--save", help="write results to this JSON file")
+    ap.add_argument("--compare", help="compare against results saved earlier")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown (0.10 = 10%%)")
+    args = ap.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    with open(args.data, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    results = run_benchmarks(data, args.coords, repeat=args.repeat)
+    print(f"{'case':<40}{'median ms':>12}")
+    for name, ms in results.items():
+        print(f"{name:<40}{ms:>12.3f}")
+    print(f"layout cache: {text_layout.layout_text.cache_info()}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            before = json.load(f)
+        slower = []
+        for name, ms in results.items():
+            if name in before and ms > before[name] * (1 + args.tolerance):
+                slower.append(f"{name}: {before[name]:.3f} -> {ms:.3f} ms")
+        if slower:
+            print("❌ slower than baseline:\n  " + "\n  ".join(slower))
+            return 1
+        print("✅ no case slower than baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -60,6 +60,16 @@ def init_db():
         )
         """
     )
+    # unsaved form entry: one row per field that differs from the loaded record
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS drafts (
+          field TEXT PRIMARY KEY,
+          value TEXT,
+          updated_at TEXT
+        )
+        """
+    )
     conn.commit()
     conn.close()
 
@@ -101,3 +111,53 @@ def fetch_all():
     rows = [dict(r) for r in cur.fetchall()]
     conn.close()
     return rows
+
+def distinct_values(column: str):
+    """(value, count) of the non-empty values of a column, most frequent first"""
+    from constants import DB_COLUMNS
+    if column not in DB_COLUMNS:
+        raise ValueError(f"Unknown column: {column}")
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+        f"SELECT TRIM({column}) AS v, COUNT(*) AS n FROM nikahnama "
+        f"WHERE TRIM(COALESCE({column}, '')) != '' GROUP BY v ORDER BY n DESC"
+    )
+    rows = [(r["v"], r["n"]) for r in cur.fetchall()]
+    conn.close()
+    return rows
+
+DRAFT_RECORD_KEY = "_record_id"  # drafts row holding the id of the record being edited ("" = new)
+
+def save_draft(changed: dict, removed=(), record_id=None):
+    """Upsert changed draft fields and drop removed ones, in one transaction"""
+    now = datetime.now().isoformat(timespec="seconds")
+    rows = [(k, "" if v is None else str(v), now) for k, v in changed.items()]
+    rows.append((DRAFT_RECORD_KEY, "" if record_id is None else str(record_id), now))
+    conn = get_conn()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO drafts (field, value, updated_at) VALUES (?, ?, ?)",
+            rows,
+        )
+        conn.executemany("DELETE FROM drafts WHERE field=?", [(k,) for k in removed])
+    conn.close()
+
+def fetch_draft():
+    """(record id or None, {field: value}, last saved) of the unsaved draft; fields is empty when there is none"""
+    conn = get_conn()
+    try:
+        rows = conn.execute("SELECT field, value, updated_at FROM drafts").fetchall()
+    except sqlite3.OperationalError:  # database from before drafts existed
+        rows = []
+    conn.close()
+    fields = {r["field"]: r["value"] for r in rows}
+    rec_id = fields.pop(DRAFT_RECORD_KEY, "")
+    last = max((r["updated_at"] or "" for r in rows), default="")
+    return (int(rec_id) if rec_id else None), fields, last
+
+def clear_draft():
+    conn = get_conn()
+    with conn:
+        conn.execute("DELETE FROM drafts")
+    conn.close()
@@ -0,0 +1,98 @@
+# draft_store.py
+"""
+Crash-safe autosave of the entry form.
+
+DraftStore watches a NikahForm and, a moment after the clerk stops typing,
+writes the fields that differ from what was last loaded (a record, or an
+empty form) to the drafts table of the app's database. Only fields whose
+draft value changed since the last write are touched, in one SQLite
+transaction, so a crash or power cut loses at most the last pause.
+
+Loading a record or clearing the form starts a new draft. On the next
+launch MainWindow.offer_draft() asks whether to restore what was left.
+"""
+import logging
+
+from PyQt5 import QtCore
+
+import database
+
+log = logging.getLogger(__name__)
+
+DEBOUNCE_MS = 1000
+
+
+class DraftStore(QtCore.QObject):
+    def __init__(self, form, record_id=lambda: None, debounce_ms=DEBOUNCE_MS, parent=None):
+        """record_id: callable returning the id of the record the form was loaded from (None = new)"""
+        super().__init__(parent or form)
+        self.form = form
+        self.record_id = record_id
+        self._baseline = {k: str(v) for k, v in form.get_data().items()}
+        self._written = {}      # field -> draft value as last written
+        self._restoring = False
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._flush_from_timer)
+
+        form.field_changed.connect(self._on_field_changed)
+        form.data_loaded.connect(self._on_data_loaded)
+
+    # ---------- tracking ----------
+    def _on_field_changed(self, _key):
+        self._timer.start()
+
+    def _on_data_loaded(self):
+        # a record (or an empty form) was loaded: a new draft starts from it
+        if not self._restoring:
+            self.discard()
+
+    # ---------- saving ----------
+    def flush(self):
+        """Write the fields that changed since the last write now"""
+        self._timer.stop()
+        draft = {k: str(v) for k, v in self.form.get_data().items() if str(v) != self._baseline.get(k)}
+        if not draft:
+            if self._written:
+                self.discard()
+            return
+        changed = {k: v for k, v in draft.items() if self._written.get(k) != v}
+        removed = [k for k in self._written if k not in draft]
+        if changed or removed:
+            database.save_draft(changed, removed, self.record_id())
+            self._written = draft
+
+    def _flush_from_timer(self):
+        # an exception escaping a Qt slot would abort the app; the next edit retries
+        try:
+            self.flush()
+        except Exception:
+            log.exception("Saving the form draft failed")
+
+    def discard(self):
+        """Forget the draft (the entry was saved or replaced); the form as it is becomes the baseline"""
+        self._timer.stop()
+        self._baseline = {k: str(v) for k, v in self.form.get_data().items()}
+        if not self._written:
+            return
+        self._written = {}
+        try:
+            database.clear_draft()
+        except Exception:
+            log.exception("Clearing the form draft failed")
+
+    # ---------- restoring ----------
+    def restore(self, fields: dict):
+        """Apply draft fields over what the form holds now, which stays the baseline"""
+        self._timer.stop()
+        data = self.form.get_data()
+        self._baseline = {k: str(v) for k, v in data.items()}
+        data.update(fields)
+        self._restoring = True
+        try:
+            self.form.set_data(data)
+        finally:
+            self._restoring = False
+        self._written = {k: str(v) for k, v in fields.items() if k in self._baseline}
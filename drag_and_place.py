@@ -1,7 +1,8 @@
-import json
 import os
 from PyQt5 import QtCore, QtGui, QtWidgets, QtPrintSupport
 
+from layout_format import DEFAULT_PT, empty_layout, read_layout, write_layout
+
 # Path to your preprinted certificate template image
 TEMPLATE_IMAGE_PATH = r"D:\IF\projects\nikahnama_app\images\nikahnama_preprint_blank.png"  # Update path accordingly
 
@@ -16,17 +17,23 @@ DEFAULT_FIELDS = {
 }
 
 # Function to load saved field positions from coordinates.json
+# (any layout format version, read through layout_format like the print engine)
 def load_coordinates():
     if os.path.exists("coordinates.json"):
-        with open("coordinates.json", "r") as f:
-            return json.load(f)
+        layout = read_layout("coordinates.json")
+        return {fid: {"x": spec["x_mm"], "y": spec["y_mm"], "w": spec.get("w_mm")}
+                for fid, spec in layout["fields"].items()}
     else:
         return DEFAULT_FIELDS  # Use default if no file exists
 
-# Function to save field positions to coordinates.json
+# Function to save field positions to coordinates.json; fonts and sizes of
+# fields already in the file are kept
 def save_coordinates(fields):
-    with open("coordinates.json", "w") as f:
-        json.dump(fields, f, indent=4)
+    layout = read_layout("coordinates.json") if os.path.exists("coordinates.json") else empty_layout()
+    for fid, pos in fields.items():
+        spec = layout["fields"].setdefault(fid, {"pt": layout.get("default_pt", DEFAULT_PT)})
+        spec["x_mm"], spec["y_mm"] = round(pos["x"], 2), round(pos["y"], 2)
+    write_layout("coordinates.json", layout)
 
 # Interactive Layout Editor Class
 class LayoutEditor(QtWidgets.QWidget):
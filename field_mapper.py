@@ -54,6 +54,26 @@ FORM_TO_PRINT_MAPPING = {
     "CertificateIssuePerson": "certificate_issue_person",
 }
 
+_PERSON_NAME_FIELDS = ['groom_name', 'bride_name', 'wali_name', 'witness1_name', 'witness2_name']
+
+def _sources_for(print_key, form_key):
+    """Form fields that map_form_to_print reads to build one print field"""
+    if form_key in _PERSON_NAME_FIELDS:
+        person = form_key.split("_")[0]
+        if print_key in ('bride_name_only', 'groom_name_only'):
+            return {form_key, f"{person}_father"}
+        return {form_key, f"{person}_father", f"{person}_age", f"{person}_address"}
+    return {form_key}
+
+# print field -> form fields it is built from
+PRINT_FIELD_SOURCES = {p: _sources_for(p, f) for p, f in FORM_TO_PRINT_MAPPING.items()}
+
+# form field -> print fields that must be refreshed when it changes
+FORM_FIELD_DEPENDENTS = {}
+for _print_key, _sources in PRINT_FIELD_SOURCES.items():
+    for _form_key in _sources:
+        FORM_FIELD_DEPENDENTS.setdefault(_form_key, set()).add(_print_key)
+
 def map_form_to_print(form_data):
     """
     Convert form/database field names to print layout field names
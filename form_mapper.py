@@ -1,15 +1,22 @@
-import sys
-import json
 import os
+import logging
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QGraphicsView, 
-                       QGraphicsScene, QGraphicsPixmapItem, 
+                       QGraphicsScene, 
                        QGraphicsTextItem, QPushButton, QVBoxLayout, 
                        QHBoxLayout, QWidget, QFileDialog, QInputDialog,
                        QListWidget, QMessageBox, QLabel, QSpinBox,
-                       QTextEdit, QGroupBox)
-from PyQt5.QtGui import QPixmap, QFont, QColor, QPainter
-from PyQt5.QtCore import Qt, QPointF, pyqtSignal
-from PyQt5 import QtPrintSupport, QtGui
+                       QTextEdit, QGroupBox, QDoubleSpinBox, QCheckBox,
+                       QGraphicsLineItem)
+from PyQt5.QtGui import QFont, QColor, QPainter, QImageReader, QPen, QFontMetricsF
+from PyQt5.QtCore import Qt, QPointF, QEvent, QSettings, pyqtSignal
+from PyQt5 import QtPrintSupport
+
+from snap_index import SnapIndex, snap_to_grid
+
+log = logging.getLogger(__name__)
+
+SNAP_DISTANCE_PX = 6  # screen pixels within which a field edge attracts
+MAX_JPEG_EXPORT_DPI = 600  # highest DPI offered for JPEG export (the whole page is held in memory)
 
 class DraggableTextItem(QGraphicsTextItem):
  def __init__(self, text, text_id, parent_editor):
@@ -18,20 +25,37 @@ class DraggableTextItem(QGraphicsTextItem):
      self.parent_editor = parent_editor
      self.setFlag(QGraphicsTextItem.ItemIsMovable)
      self.setFlag(QGraphicsTextItem.ItemIsSelectable)
+     self.setFlag(QGraphicsTextItem.ItemSendsGeometryChanges)
      self.setTextInteractionFlags(Qt.NoTextInteraction)
      self.setDefaultTextColor(QColor(255, 0, 0))  # Red for better visibility
      font = QFont("Arial", 14)
      self.setFont(font)
      self.setZValue(100)  # Ensure text is above image
+     self.text_height = -1  # box height for shrink-to-fit at print time; -1 = auto
+     self._press_pos = QPointF()
      
  def mousePressEvent(self, event):
+     self._press_pos = self.pos()
      self.setDefaultTextColor(QColor(0, 255, 0))  # Green when selected
      self.parent_editor.update_property_panel(self)
      super().mousePressEvent(event)
+     self.parent_editor.begin_drag(self)
      
  def mouseReleaseEvent(self, event):
      self.setDefaultTextColor(QColor(255, 0, 0))  # Back to red
      super().mouseReleaseEvent(event)
+     self.parent_editor.end_drag()
+     if self.pos() != self._press_pos:
+         self.parent_editor.schedule_save()
+ 
+ def baseline(self):
+     """Distance from the item's top to the first line's baseline"""
+     return self.document().documentMargin() + QFontMetricsF(self.font()).ascent()
+ 
+ def itemChange(self, change, value):
+     if change == QGraphicsTextItem.ItemPositionChange and self.parent_editor.dragging is self:
+         return self.parent_editor.snap_position(self, value)
+     return super().itemChange(change, value)
 
 class ImageTextEditor(QMainWindow):
  print_completed = pyqtSignal()
@@ -44,42 +68,49 @@ class ImageTextEditor(QMainWindow):
      self.text_items = {}
      self.image_path = template_path or "nn_data/nn_preprint_blank.png"
      self.coords_file = coords_path or "nn_data/coordinates.json"
-     print(coords_path)
      self.initial_data = initial_data or {}
      self.dpi = 96
      self.current_selected_item = None
      self.parent_window = parent
+     self.template_item = None
+     self._coords_cache = None  # ((path, mtime), layout as format version 2)
+     self._layout_store = None
+     self.settings = QSettings()
+     self.dragging = None        # the field being dragged, while the mouse is down
+     self._snap_index = None     # edges of the other fields during a drag
+     self._guides = None         # (vertical, horizontal) guide lines
+     self._print_job_ids = set()
      
      # DEBUG INFO
-     print(f"\n{'='*50}")
-     print(f"🚀 INITIALIZING IMAGE TEXT EDITOR")
-     print(f"{'='*50}")
-     print(f"📊 Initial data: {self.initial_data}")
-     print(f"🖼️ Template path: {self.image_path}")
-     print(f"📍 Coords path: {self.coords_file}")
-     print(f"✅ Image exists: {os.path.exists(self.image_path)}")
-     print(f"✅ Coords exists: {os.path.exists(self.coords_file)}")
-     print(f"{'='*50}\n")
+     log.debug("🚀 INITIALIZING IMAGE TEXT EDITOR")
+     log.debug("📊 Initial data: %s", self.initial_data)
+     log.debug("🖼️ Template path: %s", self.image_path)
+     log.debug("📍 Coords path: %s", self.coords_file)
+     log.debug("✅ Image exists: %s", os.path.exists(self.image_path))
+     log.debug("✅ Coords exists: %s", os.path.exists(self.coords_file))
      
      self.init_ui()
      
+     from print_queue import default_queue
+     default_queue().job_finished.connect(self.on_print_job_finished)
+     
      # Auto-load image
      if self.image_path and os.path.exists(self.image_path):
-         print("📸 Loading image...")
+         log.debug("📸 Loading image...")
          self.load_image_from_path(self.image_path)
      else:
-         print(f"⚠️ Image not found: {self.image_path}")
+         log.warning("⚠️ Image not found: %s", self.image_path)
          
      # Try to load coordinates with data
      if self.initial_data:
          if os.path.exists(self.coords_file):
-             print("📍 Loading with saved coordinates...")
+             log.debug("📍 Loading with saved coordinates...")
              self.load_with_coordinates_and_data_auto()
          else:
-             print("📝 No coordinates found, loading data in default positions...")
+             log.debug("📝 No coordinates found, loading data in default positions...")
              self.load_initial_data_only()
      else:
-         print("⚠️ No initial data provided!")
+         log.debug("No initial data; waiting for bind_record()")
      
  def init_ui(self):
      main_widget = QWidget()
@@ -91,6 +122,8 @@ class ImageTextEditor(QMainWindow):
      self.view = QGraphicsView(self.scene)
      self.view.setRenderHint(QPainter.Antialiasing)
      self.view.setBackgroundBrush(QColor(240, 240, 240))  # Light gray background
+     self.view.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+     self.view.viewport().installEventFilter(self)  # Ctrl+wheel zoom
      main_layout.addWidget(self.view, 3)
      
      # Right side - Controls
@@ -99,8 +132,9 @@ class ImageTextEditor(QMainWindow):
      # Instructions
      instructions = QLabel("📍 Instructions:\n"
                          "1. Drag RED text fields to position them\n"
-                         "2. Click 'Save & Print' when done\n"
-                         "3. Coordinates will be saved for future use")
+                         "2. Positions are saved automatically\n"
+                         "3. Click 'Print' when done\n"
+                         "4. 'Layout History…' restores an earlier layout")
      instructions.setStyleSheet("background-color: #E3F2FD; padding: 10px; border-radius: 5px;")
      instructions.setWordWrap(True)
      control_layout.addWidget(instructions)
@@ -139,6 +173,10 @@ class ImageTextEditor(QMainWindow):
      """)
      control_layout.addWidget(btn_save_and_print)
      
+     btn_export_image = QPushButton("🖼️ Export Image…")
+     btn_export_image.clicked.connect(self.export_image)
+     control_layout.addWidget(btn_export_image)
+     
      # Separator
      separator = QLabel("")
      separator.setStyleSheet("border-top: 2px solid #ddd; margin: 10px 0;")
@@ -153,6 +191,28 @@ class ImageTextEditor(QMainWindow):
      btn_add_text.clicked.connect(self.add_text_field)
      control_layout.addWidget(btn_add_text)
      
+     # Snapping
+     snap_layout = QHBoxLayout()
+     snap_layout.addWidget(QLabel("Snap grid (mm):"))
+     self.snap_grid_spinbox = QDoubleSpinBox()
+     self.snap_grid_spinbox.setRange(0, 20)
+     self.snap_grid_spinbox.setSingleStep(0.5)
+     self.snap_grid_spinbox.setDecimals(1)
+     self.snap_grid_spinbox.setSpecialValueText("Off")
+     self.snap_grid_spinbox.setValue(float(self.settings.value("editor/snap_grid_mm", 1.0)))
+     self.snap_grid_spinbox.valueChanged.connect(lambda v: self.settings.setValue("editor/snap_grid_mm", v))
+     snap_layout.addWidget(self.snap_grid_spinbox)
+     self.chk_guides = QCheckBox("Guides")
+     self.chk_guides.setToolTip("Align to other fields' edges and baselines while dragging (hold Alt to move freely)")
+     self.chk_guides.setChecked(bool(int(self.settings.value("editor/snap_guides", 1))))
+     self.chk_guides.toggled.connect(lambda v: self.settings.setValue("editor/snap_guides", int(v)))
+     snap_layout.addWidget(self.chk_guides)
+     control_layout.addLayout(snap_layout)
+     
+     btn_history = QPushButton("Layout History…")
+     btn_history.clicked.connect(self.show_layout_history)
+     control_layout.addWidget(btn_history)
+     
      btn_remove_text = QPushButton("Remove Selected")
      btn_remove_text.clicked.connect(self.remove_selected_text)
     #  control_layout.addWidget(btn_remove_text)
@@ -199,7 +259,19 @@ class ImageTextEditor(QMainWindow):
      self.width_spinbox.valueChanged.connect(self.update_text_width)
      width_layout.addWidget(width_label)
      width_layout.addWidget(self.width_spinbox)
-    #  property_layout.addLayout(width_layout)
+     property_layout.addLayout(width_layout)
+     
+     # Box height: printed text shrinks to fit width x height
+     height_layout = QHBoxLayout()
+     height_label = QLabel("Height (px):")
+     self.height_spinbox = QSpinBox()
+     self.height_spinbox.setRange(-1, 2000)
+     self.height_spinbox.setValue(-1)
+     self.height_spinbox.setSpecialValueText("Auto")
+     self.height_spinbox.valueChanged.connect(self.update_text_height)
+     height_layout.addWidget(height_label)
+     height_layout.addWidget(self.height_spinbox)
+     property_layout.addLayout(height_layout)
      
      # Text edit
      text_edit_label = QLabel("Text Content:")
@@ -221,6 +293,7 @@ class ImageTextEditor(QMainWindow):
      self.text_edit.blockSignals(True)
      self.font_size_spinbox.blockSignals(True)
      self.width_spinbox.blockSignals(True)
+     self.height_spinbox.blockSignals(True)
      
      self.prop_id_label.setText(f"ID: {item.text_id}")
      self.text_edit.setPlainText(item.toPlainText())
@@ -231,10 +304,12 @@ class ImageTextEditor(QMainWindow):
          self.width_spinbox.setValue(-1)
      else:
          self.width_spinbox.setValue(int(width))
+     self.height_spinbox.setValue(int(item.text_height))
      
      self.text_edit.blockSignals(False)
      self.font_size_spinbox.blockSignals(False)
      self.width_spinbox.blockSignals(False)
+     self.height_spinbox.blockSignals(False)
  
  def update_text_content(self):
      if self.current_selected_item:
@@ -245,10 +320,17 @@ class ImageTextEditor(QMainWindow):
          font = self.current_selected_item.font()
          font.setPointSize(size)
          self.current_selected_item.setFont(font)
+         self.schedule_save()
  
  def update_text_width(self, width):
      if self.current_selected_item:
          self.current_selected_item.setTextWidth(width)
+         self.schedule_save()
+ 
+ def update_text_height(self, height):
+     if self.current_selected_item:
+         self.current_selected_item.text_height = height
+         self.schedule_save()
  
  def select_text_from_list(self, item):
      text_id = item.text()
@@ -260,6 +342,85 @@ class ImageTextEditor(QMainWindow):
  
  def update_dpi(self, value):
      self.dpi = value
+     if self.template_item is not None:
+         self.template_item.set_dpi(value)
+         self.scene.setSceneRect(self.template_item.boundingRect())
+
+ def eventFilter(self, obj, event):
+     if obj is self.view.viewport() and event.type() == QEvent.Wheel and event.modifiers() & Qt.ControlModifier:
+         factor = 1.25 if event.angleDelta().y() > 0 else 0.8
+         zoom = self.view.transform().m11() * factor
+         if 0.1 <= zoom <= 16:
+             self.view.scale(factor, factor)
+         return True
+     return super().eventFilter(obj, event)
+
+ # ---------- snapping ----------
+ def begin_drag(self, item):
+     """Index the fields that stay put; each mouse move then only searches it"""
+     self.dragging = item
+     self._snap_index = None
+     if self.chk_guides.isChecked():
+         boxes = {}
+         for text_id, other in self.text_items.items():
+             if other is item or other.isSelected():
+                 continue  # selected fields move along with the dragged one
+             r = other.sceneBoundingRect()
+             boxes[text_id] = (r.x(), r.y(), r.width(), r.height(), other.baseline())
+         self._snap_index = SnapIndex(boxes)
+ 
+ def end_drag(self):
+     self.dragging = None
+     self._snap_index = None
+     self._show_guides(None, None)
+ 
+ def snap_position(self, item, pos):
+     """Position for a dragged field: aligned to a nearby field edge, else on the grid"""
+     if QApplication.keyboardModifiers() & Qt.AltModifier:
+         self._show_guides(None, None)
+         return pos
+     grid = self.mm_to_pixels(self.snap_grid_spinbox.value())
+     r = item.boundingRect()
+     if self._snap_index is None:
+         return QPointF(snap_to_grid(pos.x(), grid), snap_to_grid(pos.y(), grid))
+     tolerance = SNAP_DISTANCE_PX / max(self.view.transform().m11(), 1e-6)
+     x, y, gx, gy = self._snap_index.snap_box(pos.x(), pos.y(), r.width(), r.height(), item.baseline(),
+                                              tolerance, grid)
+     self._show_guides(gx, gy)
+     return QPointF(x, y)
+ 
+ def _show_guides(self, gx, gy):
+     if self._guides is None:
+         if gx is None and gy is None:
+             return
+         pen = QPen(QColor(255, 0, 255), 0, Qt.DashLine)  # cosmetic: 1 px at any zoom
+         self._guides = (QGraphicsLineItem(), QGraphicsLineItem())
+         for line in self._guides:
+             line.setPen(pen)
+             line.setZValue(200)
+             line.hide()
+             self.scene.addItem(line)
+     rect = self.scene.sceneRect()
+     vertical, horizontal = self._guides
+     if gx is not None:
+         vertical.setLine(gx.value, rect.top(), gx.value, rect.bottom())
+     vertical.setVisible(gx is not None)
+     if gy is not None:
+         horizontal.setLine(rect.left(), gy.value, rect.right(), gy.value)
+     horizontal.setVisible(gy is not None)
+ 
+ def closeEvent(self, event):
+     if self._layout_store is not None:
+         self._layout_store.flush()
+     if self.parent_window is None:
+         self.shutdown()  # standalone: nothing will show this editor again
+     super().closeEvent(event)
+ 
+ def shutdown(self):
+     """Write pending layout changes and stop the template's tile worker"""
+     if self._layout_store is not None:
+         self._layout_store.flush()
+     self._drop_template_item()
      
  def pixels_to_mm(self, pixels):
      return (pixels / self.dpi) * 25.4
@@ -267,31 +428,42 @@ class ImageTextEditor(QMainWindow):
  def mm_to_pixels(self, mm):
      return (mm * self.dpi) / 25.4
  
+ def _drop_template_item(self):
+     if self.template_item is not None:
+         self.template_item.stop()
+         self.scene.removeItem(self.template_item)
+         self.template_item = None
+
  def load_image_from_path(self, file_path):
-     """Load image from a given path"""
+     """
+     Show a template behind the text fields. Only the image header is read
+     here; the template is drawn from a tile pyramid (built in the background
+     the first time) at the level matching the zoom, and always covers the
+     A4 page at the editor dpi so positions stay exact in mm.
+     """
      if os.path.exists(file_path):
-         self.image_path = file_path
-         pixmap = QPixmap(file_path)
-         
-         if pixmap.isNull():
-             print(f"❌ Failed to load image: {file_path}")
+         size = QImageReader(file_path).size()
+         if not size.isValid():
+             log.error("❌ Failed to load image: %s", file_path)
              QMessageBox.critical(self, "Error", f"Failed to load image: {file_path}")
              return
+         self.image_path = file_path
          
-         print(f"✅ Image loaded: {pixmap.width()}x{pixmap.height()}px")
+         log.debug("✅ Image loaded: %dx%dpx", size.width(), size.height())
          
-         self.scene.clear()
-         self.text_items.clear()
-         self.text_list.clear()
+         if self.template_item is not None and self.template_item.image_path == file_path:
+             return
+         # only the background is replaced; text fields stay where they are
+         self._drop_template_item()
          
-         pixmap_item = QGraphicsPixmapItem(pixmap)
-         pixmap_item.setZValue(-1)  # Put image behind text
-         self.scene.addItem(pixmap_item)
-         self.scene.setSceneRect(pixmap_item.boundingRect())
+         from ui.tiled_template_item import TiledTemplateItem
+         self.template_item = TiledTemplateItem(file_path, dpi=self.dpi)
+         self.scene.addItem(self.template_item)
+         self.scene.setSceneRect(self.template_item.boundingRect())
          
-         print(f"📐 Scene rect: {self.scene.sceneRect()}")
+         log.debug("📐 Scene rect: %s", self.scene.sceneRect())
      else:
-         print(f"❌ Image file not found: {file_path}")
+         log.error("❌ Image file not found: %s", file_path)
  
  def load_image(self):
      file_path, _ = QFileDialog.getOpenFileName(
@@ -304,19 +476,18 @@ class ImageTextEditor(QMainWindow):
  def load_with_coordinates_and_data_auto(self):
      """Auto-load coordinates and apply initial data"""
      if not os.path.exists(self.coords_file):
-         print(f"⚠️ Coords file not found: {self.coords_file}")
+         log.warning("⚠️ Coords file not found: %s", self.coords_file)
          self.load_initial_data_only()
          return
      
      try:
-         with open(self.coords_file, 'r') as f:
-             coords_data = json.load(f)
+         coords_data = self._load_coords()
          
-         print(f"✅ Loaded coords: {len(coords_data.get('fields', {}))} fields")
+         log.debug("✅ Loaded coords: %d fields", len(coords_data.get("fields", {})))
          self.apply_data_with_coordinates(coords_data, self.initial_data)
          
      except Exception as e:
-         print(f"❌ Error loading coordinates: {str(e)}")
+         log.error("❌ Error loading coordinates: %s", e)
          import traceback
          traceback.print_exc()
          QMessageBox.warning(self, "Warning", 
@@ -326,73 +497,143 @@ class ImageTextEditor(QMainWindow):
  def load_initial_data_only(self):
      """Load initial data without coordinates"""
      if not self.initial_data:
-         print("⚠️ No initial data provided!")
+         log.warning("⚠️ No initial data provided!")
          QMessageBox.information(self, "No Data", 
              "No data to display. Use 'Add Text Field' to add fields manually.")
          return
      
-     print(f"📝 Loading {len(self.initial_data)} fields without coordinates")
-     
-     for item in list(self.text_items.values()):
-         self.scene.removeItem(item)
-     self.text_items.clear()
-     self.text_list.clear()
+     log.debug("📝 Loading %d fields without coordinates", len(self.initial_data))
      
+     # fields that are already placed keep their position; new ones are stacked
+     specs = {}
      y_offset = 50
      for field_id, text_value in self.initial_data.items():
-         print(f"  Adding field: {field_id} = {text_value}")
-         text_item = DraggableTextItem(str(text_value), field_id, self)
-         text_item.setPos(50, y_offset)
+         pos = None if field_id in self.text_items else QPointF(50, y_offset)
+         specs[field_id] = {"text": str(text_value), "pos": pos}
          y_offset += 35
-         self.scene.addItem(text_item)
-         self.text_items[field_id] = text_item
-         self.text_list.addItem(field_id)
+     self._sync_text_items(specs)
      
-     print(f"✅ Added {len(self.text_items)} text items to scene")
+     log.debug("✅ Added %d text items to scene", len(self.text_items))
  
  def apply_data_with_coordinates(self, coords_data, text_data):
-     """Apply text data using saved coordinates"""
-     saved_dpi = coords_data.get("dpi", 96)
+     """Apply text data using a saved layout (format version 2, see layout_format.py)"""
+     saved_dpi = coords_data.get("editor_dpi", 96)
      self.dpi_spinbox.setValue(saved_dpi)
-     
-     # Clear existing
-     for item in list(self.text_items.values()):
-         self.scene.removeItem(item)
-     self.text_items.clear()
-     self.text_list.clear()
+     default_pt = coords_data.get("default_pt", 11)
      
      # Load fields with coordinates
      fields = coords_data.get("fields", {})
-     
+     specs = {}
      for field_id, field_info in fields.items():
-         # Get text from data dictionary
-        #  text_content = str(text_data.get(field_id, field_info.get("text", "")))
-         text_content = str(text_data.get(field_id, ""))
-
-         print(f"  Loading field: {field_id} = {text_content} at ({field_info['x_mm']}, {field_info['y_mm']}) mm")
-         
-         # Create text item
-         text_item = DraggableTextItem(text_content, field_id, self)
-         
-         # Set font size
-         font = text_item.font()
-         font.setPointSize(field_info.get("font_size", 14))
-         text_item.setFont(font)
-         
-         # Set text width
-         text_width = field_info.get("text_width", -1)
-         text_item.setTextWidth(text_width)
+         w_mm, h_mm = field_info.get("w_mm"), field_info.get("h_mm")
+         specs[field_id] = {
+             "text": str(text_data.get(field_id, "")),
+             "font_size": field_info.get("pt", default_pt),
+             "text_width": self.mm_to_pixels(w_mm) if w_mm else -1,
+             "text_height": self.mm_to_pixels(h_mm) if h_mm else -1,
+             # Convert mm to pixels
+             "pos": QPointF(self.mm_to_pixels(field_info["x_mm"]), self.mm_to_pixels(field_info["y_mm"])),
+         }
+     changed = self._sync_text_items(specs)
+     
+     log.debug("✅ Loaded %d fields with coordinates (%d changed)", len(self.text_items), changed)
+ 
+ def _sync_text_items(self, specs):
+     """
+     Make the scene's text items match specs (field id -> text, font_size,
+     text_width, text_height, pos; missing keys are left alone). Existing
+     items are patched only where a value differs, new fields get an item
+     and fields no longer listed are removed. Repaints are held until the
+     whole batch is applied.
+     
+     Returns:
+         int: Number of items created, changed or removed
+     """
+     changed = 0
+     self.view.setUpdatesEnabled(False)
+     self.text_list.setUpdatesEnabled(False)
+     try:
+         for field_id in [k for k in self.text_items if k not in specs]:
+             item = self.text_items.pop(field_id)
+             if item is self.current_selected_item:
+                 self.current_selected_item = None
+             self.scene.removeItem(item)
+             changed += 1
          
-         # Convert mm to pixels
-         x_pixels = self.mm_to_pixels(field_info["x_mm"])
-         y_pixels = self.mm_to_pixels(field_info["y_mm"])
+         for field_id, spec in specs.items():
+             item = self.text_items.get(field_id)
+             dirty = item is None
+             if item is None:
+                 item = DraggableTextItem(spec.get("text", ""), field_id, self)
+                 self.scene.addItem(item)
+                 self.text_items[field_id] = item
+             elif "text" in spec and item.toPlainText() != spec["text"]:
+                 item.setPlainText(spec["text"])
+                 dirty = True
+             
+             if "font_size" in spec and item.font().pointSize() != spec["font_size"]:
+                 font = item.font()
+                 font.setPointSize(spec["font_size"])
+                 item.setFont(font)
+                 dirty = True
+             if "text_width" in spec and item.textWidth() != spec["text_width"]:
+                 item.setTextWidth(spec["text_width"])
+                 dirty = True
+             if "text_height" in spec:
+                 item.text_height = spec["text_height"]
+             if spec.get("pos") is not None and item.pos() != spec["pos"]:
+                 item.setPos(spec["pos"])
+                 dirty = True
+             changed += dirty
          
-         text_item.setPos(QPointF(x_pixels, y_pixels))
-         self.scene.addItem(text_item)
-         self.text_items[field_id] = text_item
-         self.text_list.addItem(field_id)
-     
-     print(f"✅ Loaded {len(self.text_items)} fields with coordinates")
+         # the list only changes when fields come or go
+         if [self.text_list.item(i).text() for i in range(self.text_list.count())] != list(self.text_items):
+             self.text_list.clear()
+             self.text_list.addItems(list(self.text_items))
+         if self.current_selected_item is not None:
+             self.update_property_panel(self.current_selected_item)
+     finally:
+         self.text_list.setUpdatesEnabled(True)
+         self.view.setUpdatesEnabled(True)
+     return changed
+ 
+ def apply_record(self, print_data):
+     """
+     Show another record in the open editor, keeping the scene: only the
+     fields whose text, font or position differ are touched.
+     """
+     self.initial_data = dict(print_data or {})
+     coords = self._load_coords()
+     if coords is not None:
+         self.apply_data_with_coordinates(coords, self.initial_data)
+     else:
+         self.load_initial_data_only()
+ 
+ def bind_record(self, print_data, template_path=None, coords_path=None):
+     """
+     Re-use this editor for another record, possibly of another layout
+     profile. The template is swapped and the coordinates re-read only when
+     they differ; the text items are patched in place (see apply_record).
+     """
+     if coords_path and coords_path != self.coords_file:
+         if self._layout_store is not None:
+             self._layout_store.flush()  # pending edits belong to the old layout
+         self.coords_file = coords_path
+     if template_path and (self.template_item is None or template_path != self.image_path):
+         self.load_image_from_path(template_path)
+     self.apply_record(print_data)
+ 
+ def _load_coords(self):
+     """Layout in coords_file as format version 2, re-read only when the file changed"""
+     from layout_format import read_layout
+     try:
+         mtime = os.path.getmtime(self.coords_file)
+     except OSError:
+         return None
+     cached = self._coords_cache
+     if cached is None or cached[0] != (self.coords_file, mtime):
+         self._coords_cache = ((self.coords_file, mtime), read_layout(self.coords_file))
+     return self._coords_cache[1]
  
  def add_text_field(self):
      if not self.image_path:
@@ -436,42 +677,105 @@ class ImageTextEditor(QMainWindow):
          self.prop_id_label.setText("ID: None")
          self.text_edit.clear()
  
- def save_coordinates(self):
-     """Save coordinates to JSON file"""
-     if not self.text_items:
-         QMessageBox.warning(self, "Warning", "No text fields to save!")
-         return False
+ def layout_store(self):
+     """Store for the current coordinates file (atomic writes, version history)"""
+     from layout_store import LayoutStore
+     if self._layout_store is None or self._layout_store.path != self.coords_file:
+         if self._layout_store is not None:
+             self._layout_store.flush()
+         self._layout_store = LayoutStore(self.coords_file)
+     return self._layout_store
+ 
+ def _coordinates_data(self):
+     """The editor's fields as a layout (format version 2, see layout_format.py)"""
+     from layout_format import FORMAT_VERSION, DEFAULT_PAGE_SIZE_MM, DEFAULT_FONT_FAMILY, DEFAULT_PT
+     try:
+         saved = self._load_coords() or {}
+     except Exception:
+         saved = {}  # unreadable file: it is about to be replaced
      
      coordinates = {}
      for text_id, item in self.text_items.items():
          pos = item.pos()
-         coordinates[text_id] = {
+         spec = {
              "x_mm": round(self.pixels_to_mm(pos.x()), 2),
              "y_mm": round(self.pixels_to_mm(pos.y()), 2),
-             "x_pixels": pos.x(),
-             "y_pixels": pos.y(),
-             "text": item.toPlainText(),
-             "font_size": item.font().pointSize(),
-             "text_width": item.textWidth()
+             "pt": item.font().pointSize(),
          }
-     
-     data = {
-         "image_path": self.image_path,
-         "dpi": self.dpi,
-         "unit": "millimeters",
+         # box sizes are edited in pixels at the editor dpi; -1 = auto
+         if item.textWidth() > 0:
+             spec["w_mm"] = round(self.pixels_to_mm(item.textWidth()), 2)
+         if item.text_height > 0:
+             spec["h_mm"] = round(self.pixels_to_mm(item.text_height), 2)
+         coordinates[text_id] = spec
+     
+     return {
+         "version": FORMAT_VERSION,
+         "page_size_mm": saved.get("page_size_mm", list(DEFAULT_PAGE_SIZE_MM)),
+         "font_family": saved.get("font_family", DEFAULT_FONT_FAMILY),
+         "default_pt": saved.get("default_pt", DEFAULT_PT),
+         "template": self.image_path,
+         "editor_dpi": self.dpi,
          "fields": coordinates
      }
+ 
+ def schedule_save(self):
+     """Save after a short pause; a drag or a run of spinbox steps is one write"""
+     if self.text_items:
+         self.layout_store().save(self._coordinates_data())
+ 
+ def save_coordinates(self):
+     """Save coordinates to JSON file now (atomically, recording a history version)"""
+     if not self.text_items:
+         QMessageBox.warning(self, "Warning", "No text fields to save!")
+         return False
      
      try:
-         with open(self.coords_file, 'w') as f:
-             json.dump(data, f, indent=4)
-         print(f"✅ Coordinates saved to: {self.coords_file}")
+         store = self.layout_store()
+         store.save(self._coordinates_data())
+         version = store.flush()
+         log.debug("✅ Coordinates saved to: %s%s", self.coords_file, f" (version {version})" if version else "")
          return True
      except Exception as e:
-         print(f"❌ Error saving coordinates: {str(e)}")
+         log.error("❌ Error saving coordinates: %s", e)
          QMessageBox.critical(self, "Error", f"Failed to save coordinates: {str(e)}")
          return False
  
+ def show_layout_history(self):
+     """Pick an earlier saved layout and put it back"""
+     if self.text_items:
+         self.save_coordinates()
+     store = self.layout_store()
+     versions = store.versions()
+     if len(versions) < 2:
+         QMessageBox.information(self, "Layout History", "No earlier layouts saved yet.")
+         return
+     labels = [f"v{v}  {ts}  ({n} field{'s' if n != 1 else ''} changed{', ' + note if note else ''})"
+               for v, ts, n, note in versions[1:]]
+     choice, ok = QInputDialog.getItem(self, "Layout History", "Restore layout as of:", labels, 0, False)
+     if not ok:
+         return
+     version = versions[1:][labels.index(choice)][0]
+     try:
+         data = store.restore(version)
+     except Exception as e:
+         log.error("❌ Error restoring layout: %s", e)
+         QMessageBox.critical(self, "Error", f"Failed to restore layout: {str(e)}")
+         return
+     texts = {text_id: item.toPlainText() for text_id, item in self.text_items.items()}
+     self.apply_data_with_coordinates(data, texts)
+     self.statusBar().showMessage(f"Restored layout version {version}")
+ 
+ def on_print_job_finished(self, job_id, ok):
+     if job_id not in self._print_job_ids:
+         return
+     self._print_job_ids.discard(job_id)
+     if ok:
+         self.statusBar().showMessage(f"Print job #{job_id} done")
+         self.print_completed.emit()
+     else:
+         self.statusBar().showMessage(f"Print job #{job_id} failed - see Print Queue")
+ 
  def save_and_print(self):
      """Save coordinates and trigger print"""
      self.save_coordinates()
@@ -484,8 +788,6 @@ class ImageTextEditor(QMainWindow):
         from PyQt5.QtWidgets import QDialog, QMessageBox
         """Trigger the print function"""
         try:
-            from print_layout import draw_certificate_from_coords
-
             printer = QtPrintSupport.QPrinter(QtPrintSupport.QPrinter.HighResolution)
             printer.setFullPage(True)
             printer.setPageSize(QtPrintSupport.QPrinter.A4)
@@ -495,25 +797,67 @@ class ImageTextEditor(QMainWindow):
             if dlg.exec_() != QDialog.Accepted:
                 return
 
-            painter = QtGui.QPainter(printer)
-            try:
-                draw_certificate_from_coords(
-                    painter,
-                    printer,
-                    self.initial_data,
-                    coords_file=self.coords_file,
-                    show_template=False,
-                    template_path=self.image_path,
-                    debug_grid=False
-                )
-                QMessageBox.information(self, "Success", "Certificate printed successfully!")
-                self.print_completed.emit()
-                # self.close()
-            finally:
-                painter.end()
+            # render and spool on the print queue's worker so the app stays responsive
+            from print_queue import PrintJob, default_queue
+            texts = {text_id: item.toPlainText() for text_id, item in self.text_items.items()}
+            job = PrintJob.from_printer(
+                printer,
+                texts,
+                coords_file=self.coords_file,
+                show_template=False,
+                template_path=self.image_path,
+            )
+            self._print_job_ids.add(default_queue().submit(job))
+            self.statusBar().showMessage(f"Print job #{job.id} queued for {job.destination}")
 
         except Exception as e:
             import traceback
             traceback.print_exc()
             QMessageBox.critical(self, "Print Error", f"Failed to print: {str(e)}")
 
+ def export_image(self):
+     """Save coordinates and export the certificate as PNG/JPEG"""
+     serial = self.initial_data.get("SrNo", "certificate")
+     file_path, _ = QFileDialog.getSaveFileName(
+         self, "Export Image", os.path.join("output", f"certificate_{serial}.png"),
+         "PNG Image (*.png);;JPEG Image (*.jpg *.jpeg)"
+     )
+     if not file_path:
+         return
+     from raster_export import LOSSY_FORMATS, export_certificate_image
+     lossy = os.path.splitext(file_path)[1].lstrip(".").lower() in LOSSY_FORMATS
+     # a JPEG is encoded from one full-page image (about 100 MB for A4 at 600 DPI); PNG is streamed
+     max_dpi = MAX_JPEG_EXPORT_DPI if lossy else 1200
+     dpi, ok = QInputDialog.getInt(self, "Export Image", f"DPI (72-{max_dpi}):", 300, 72, max_dpi, 50)
+     if not ok:
+         return
+     max_bytes = None
+     if lossy:
+         kb, ok = QInputDialog.getInt(self, "Export Image", "Size limit in KB (0 = no limit):", 0, 0, 100000, 100)
+         if not ok:
+             return
+         max_bytes = kb * 1024 or None
+     
+     self.save_coordinates()
+     try:
+         texts = {text_id: item.toPlainText() for text_id, item in self.text_items.items()}
+         export_certificate_image(
+             texts,
+             file_path,
+             dpi=dpi,
+             quality=90 if lossy and max_bytes is None else -1,
+             max_bytes=max_bytes,
+             coords_file=self.coords_file,
+             show_template=True,
+             template_path=self.image_path,
+         )
+         size = os.path.getsize(file_path)
+         size_kb = size // 1024
+         note = ""
+         if max_bytes is not None and size > max_bytes:
+             note = f"\n\nIt is {size_kb} KB even at the lowest quality; lower the DPI to get under {max_bytes // 1024} KB."
+         QMessageBox.information(self, "Success", f"Certificate image saved to:\n{file_path} ({size_kb} KB, {dpi} DPI){note}")
+     except Exception as e:
+         import traceback
+         traceback.print_exc()
+         QMessageBox.critical(self, "Export Error", f"Failed to export image: {str(e)}")
@@ -0,0 +1,285 @@
+# hijri_calendar.py
+"""
+Hijri <-> Gregorian conversion with the tabular (arithmetic) Islamic calendar.
+
+The start of every Hijri month from FIRST_YEAR to LAST_YEAR AH (about 1882 to
+2174 CE) is computed once, as a Gregorian day number, into one flat table.
+Hijri -> Gregorian is then a table lookup plus the day; Gregorian -> Hijri
+estimates the month from the mean month length and corrects by at most one
+entry, so both directions are O(1).
+
+The tabular calendar can differ from a locally sighted moon by a day or two,
+so check_dates() accepts a tolerance. It cross-checks hijri_date against
+eng_date of every record:
+
+    python hijri_calendar.py check [--db nn_data/nikahnama.db] [--tolerance 2] [--csv output/dates.csv] [--fill-empty]
+    python hijri_calendar.py convert 2025-09-14 1447-03-21 "5th Rajab 1446"
+
+check exits with status 1 when any record's two dates disagree by more than
+the tolerance.
+"""
+from collections import namedtuple
+from datetime import date, datetime
+import argparse
+import csv
+import os
+import re
+import sys
+
+FIRST_YEAR = 1300
+LAST_YEAR = 1600
+EPOCH = 227015          # day number (date.toordinal) of 1 Muharram 1 AH, 16 July 622 Julian
+CYCLE_DAYS = 10631      # days in the 30-year cycle of 360 months
+DEFAULT_TOLERANCE = 2   # days a sighted month may differ from the tabular one
+
+HijriDate = namedtuple("HijriDate", "year month day")
+
+MONTHS = [
+    "Muharram", "Safar", "Rabi al-Awwal", "Rabi al-Thani", "Jumada al-Ula", "Jumada al-Akhirah",
+    "Rajab", "Shaban", "Ramadan", "Shawwal", "Dhu al-Qadah", "Dhu al-Hijjah",
+]
+# spellings seen on Indian nikahnamas, compared with letters only and lower case
+_MONTH_ALIASES = {
+    1: ["muharram", "moharram", "muharram ul haram"],
+    2: ["safar", "safar ul muzaffar"],
+    3: ["rabi al awwal", "rabi ul awwal", "rabiul awwal", "rabi i", "rabi ul awal", "rabi al awal"],
+    4: ["rabi al thani", "rabi ul akhir", "rabi us sani", "rabius sani", "rabi ii", "rabi al akhir", "rabi ul sani"],
+    5: ["jumada al ula", "jumada al awwal", "jamadi ul awwal", "jamadil awwal", "jumada i", "jamadi ul awal"],
+    6: ["jumada al akhirah", "jumada al thani", "jamadi us sani", "jamadis sani", "jumada ii", "jamadi ul akhir"],
+    7: ["rajab", "rajab ul murajjab"],
+    8: ["shaban", "sha ban", "shaban ul muazzam"],
+    9: ["ramadan", "ramazan", "ramzan", "ramadhan", "ramadan ul mubarak"],
+    10: ["shawwal", "shawal", "shawwal ul mukarram"],
+    11: ["dhu al qadah", "dhul qadah", "zilqad", "zil qad", "zul qada", "dhu al qidah", "zilqada"],
+    12: ["dhu al hijjah", "dhul hijjah", "zilhaj", "zil hijja", "zul hijja", "zilhijja"],
+}
+_MONTH_BY_KEY = {alias.replace(" ", ""): m for m, aliases in _MONTH_ALIASES.items() for alias in aliases}
+_MONTH_BY_KEY.update({name.lower().replace(" ", "").replace("-", ""): i + 1 for i, name in enumerate(MONTHS)})
+
+GREGORIAN_FORMATS = ("%Y-%m-%d", "%d-%b-%Y", "%d %b %Y", "%d-%m-%Y", "%d/%m/%Y", "%d %B %Y", "%d-%B-%Y")
+
+
+def _fixed_from_hijri(year, month, day):
+    """Day number of a tabular Hijri date (Calendrical Calculations, arithmetic Islamic calendar)"""
+    return (EPOCH - 1 + (year - 1) * 354 + (3 + 11 * year) // 30
+            + 29 * (month - 1) + month // 2 + day)
+
+
+def _build_table():
+    # start of month i = (year - FIRST_YEAR) * 12 + month - 1, plus one past the end
+    starts = [_fixed_from_hijri(y, m, 1) for y in range(FIRST_YEAR, LAST_YEAR + 1) for m in range(1, 13)]
+    starts.append(_fixed_from_hijri(LAST_YEAR + 1, 1, 1))
+    return starts
+
+
+_MONTH_STARTS = _build_table()
+_FIRST_DAY = _MONTH_STARTS[0]
+_LAST_DAY = _MONTH_STARTS[-1] - 1
+
+
+def month_length(year: int, month: int) -> int:
+    i = (year - FIRST_YEAR) * 12 + month - 1
+    if not (FIRST_YEAR <= year <= LAST_YEAR and 1 <= month <= 12):
+        raise ValueError(f"Hijri month {year}-{month:02d} is outside {FIRST_YEAR}-{LAST_YEAR} AH")
+    return _MONTH_STARTS[i + 1] - _MONTH_STARTS[i]
+
+
+def to_gregorian(year: int, month: int, day: int) -> date:
+    """Gregorian date of a Hijri date; ValueError when invalid or outside the table"""
+    if not 1 <= day <= month_length(year, month):
+        raise ValueError(f"Hijri month {year}-{month:02d} has no day {day}")
+    return date.fromordinal(_MONTH_STARTS[(year - FIRST_YEAR) * 12 + month - 1] + day - 1)
+
+
+def to_hijri(d: date) -> HijriDate:
+    """Hijri date of a Gregorian date; ValueError outside the table"""
+    n = d.toordinal()
+    if not _FIRST_DAY <= n <= _LAST_DAY:
+        raise ValueError(f"{d.isoformat()} is outside {FIRST_YEAR}-{LAST_YEAR} AH")
+    i = min((n - _FIRST_DAY) * 360 // CYCLE_DAYS, len(_MONTH_STARTS) - 2)
+    while _MONTH_STARTS[i] > n:
+        i -= 1
+    while _MONTH_STARTS[i + 1] <= n:
+        i += 1
+    year, month = divmod(i, 12)
+    return HijriDate(FIRST_YEAR + year, month + 1, n - _MONTH_STARTS[i] + 1)
+
+
+# ---------- text ----------
+def format_hijri(h: HijriDate) -> str:
+    """As stored in hijri_date: "1447-03-21" """
+    return f"{h.year:04d}-{h.month:02d}-{h.day:02d}"
+
+
+def hijri_to_words(h: HijriDate) -> str:
+    """ "21 Rabi al-Awwal 1447 AH" """
+    return f"{h.day} {MONTHS[h.month - 1]} {h.year} AH"
+
+
+_ISO = re.compile(r"^\s*(\d{3,4})\s*[-/.]\s*(\d{1,2})\s*[-/.]\s*(\d{1,2})\s*(?:a\.?h\.?|h)?\s*$", re.I)
+_WORDS = re.compile(r"^\s*(\d{1,2})\s*(?:st|nd|rd|th)?\s+([A-Za-z' .-]+?)[\s,]+(\d{3,4})\s*(?:a\.?h\.?|h)?\s*$", re.I)
+
+
+def parse_hijri(text):
+    """
+    Hijri date typed as "1447-03-21" or "21st Rabi ul Awwal 1447 AH"
+
+    Returns:
+        HijriDate, or None when the text is not a valid Hijri date in the table
+    """
+    if not text:
+        return None
+    m = _ISO.match(str(text))
+    if m:
+        year, month, day = (int(g) for g in m.groups())
+    else:
+        m = _WORDS.match(str(text))
+        if not m:
+            return None
+        month = _MONTH_BY_KEY.get(re.sub(r"[^a-z]", "", m.group(2).lower()))
+        if month is None:
+            return None
+        day, year = int(m.group(1)), int(m.group(3))
+    try:
+        to_gregorian(year, month, day)
+    except ValueError:
+        return None
+    return HijriDate(year, month, day)
+
+
+def parse_gregorian(text):
+    """English date as stored in eng_date ("2025-09-14", "14-Sep-2025", ...); None if unreadable"""
+    text = str(text or "").strip()
+    for fmt in GREGORIAN_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+# ---------- bulk validation ----------
+DateIssue = namedtuple("DateIssue", "record_id serial hijri_date eng_date problem expected")
+
+
+def check_dates(records, tolerance: int = DEFAULT_TOLERANCE) -> list:
+    """
+    Cross-check hijri_date against eng_date of every record
+
+    Problems: "hijri unreadable", "english unreadable", "hijri missing",
+    "out of range" and "off by N days" (more than tolerance); expected is the
+    Hijri date eng_date converts to, where there is one.
+
+    Returns:
+        list: DateIssue tuples, in record order
+    """
+    issues = []
+    for r in records:
+        hijri_text = str(r.get("hijri_date") or "").strip()
+        eng_text = str(r.get("eng_date") or "").strip()
+        if not eng_text:
+            continue
+        eng = parse_gregorian(eng_text)
+        expected = ""
+        if eng is None:
+            problem = "english unreadable"
+        else:
+            try:
+                expected = format_hijri(to_hijri(eng))
+            except ValueError:
+                issues.append(DateIssue(r.get("id"), r.get("serial_no") or "", hijri_text, eng_text, "out of range", ""))
+                continue
+            hijri = parse_hijri(hijri_text)
+            if not hijri_text:
+                problem = "hijri missing"
+            elif hijri is None:
+                problem = "hijri unreadable"
+            else:
+                off = (to_gregorian(*hijri) - eng).days
+                problem = f"off by {off:+d} days" if abs(off) > tolerance else None
+        if problem:
+            issues.append(DateIssue(r.get("id"), r.get("serial_no") or "", hijri_text, eng_text, problem, expected))
+    return issues
+
+
+def _fill_empty_hijri(records) -> int:
+    """Write hijri_date of records that only have an English date; returns how many were written"""
+    from database import update_record
+    filled = 0
+    for r in records:
+        if str(r.get("hijri_date") or "").strip():
+            continue
+        eng = parse_gregorian(r.get("eng_date"))
+        if eng is None:
+            continue
+        try:
+            hijri = format_hijri(to_hijri(eng))
+        except ValueError:
+            continue
+        update_record(r["id"], {"hijri_date": hijri})
+        filled += 1
+    return filled
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = ap.add_subparsers(dest="command", required=True)
+    c = sub.add_parser("check", help="cross-check hijri_date against eng_date of every record")
+    c.add_argument("--db", help="SQLite database (default: the app's database)")
+    c.add_argument("--tolerance", type=int, default=DEFAULT_TOLERANCE, help="days the two dates may differ")
+    c.add_argument("--csv", help="also write the report to this CSV file")
+    c.add_argument("--fill-empty", action="store_true", help="write hijri_date of records that only have an English date")
+    v = sub.add_parser("convert", help="convert dates in either calendar")
+    v.add_argument("dates", nargs="+")
+    args = ap.parse_args(argv)
+
+    if args.command == "convert":
+        for text in args.dates:
+            try:
+                hijri = parse_hijri(text)
+                if hijri is not None:
+                    print(f"{text}: {to_gregorian(*hijri).isoformat()}")
+                    continue
+                eng = parse_gregorian(text)
+                if eng is not None:
+                    h = to_hijri(eng)
+                    print(f"{text}: {format_hijri(h)} ({hijri_to_words(h)})")
+                    continue
+                print(f"{text}: ❌ not a date")
+            except ValueError as e:
+                print(f"{text}: ❌ {e}")
+        return 0
+
+    import database
+    if args.db:
+        database.DB_PATH = args.db
+    records = database.fetch_all()
+    if args.fill_empty:
+        filled = _fill_empty_hijri(records)
+        print(f"✍️ Filled hijri_date of {filled} record(s) from their English date")
+        if filled:
+            records = database.fetch_all()
+
+    issues = check_dates(records, args.tolerance)
+    if issues:
+        print(f"{'record':>8}  {'serial':<14} {'hijri':<13} {'english':<13} {'problem':<21} expected")
+        for issue in issues:
+            print(f"{str(issue.record_id or '-'):>8}  {str(issue.serial):<14} {issue.hijri_date:<13} "
+                  f"{issue.eng_date:<13} {issue.problem:<21} {issue.expected}")
+    if args.csv:
+        os.makedirs(os.path.dirname(os.path.abspath(args.csv)), exist_ok=True)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(DateIssue._fields)
+            writer.writerows(issues)
+
+    print(f"{len(records)} record(s): {len(issues)} with a date problem")
+    if any(issue.problem.startswith("off by") for issue in issues):
+        print(f"❌ Hijri and English dates disagree by more than {args.tolerance} day(s)")
+        return 1
+    print("✅ every Hijri date matches its English date" if not issues else "✅ no Hijri date contradicts its English date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
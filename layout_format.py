@@ -0,0 +1,275 @@
+# layout_format.py
+"""
+The layout file format, its validator and converters.
+
+Version 2 (written by the layout editor) keeps only what printing needs,
+in millimetres:
+
+    {
+      "version": 2,
+      "page_size_mm": [210, 297],
+      "font_family": "Times New Roman",
+      "default_pt": 11,
+      "template": "nn_data/nn_preprint_blank.png",   # optional
+      "editor_dpi": 96,                              # optional, editor zoom only
+      "fields": {
+        "groom_name": {"x_mm": 35, "y_mm": 78, "pt": 11, "w_mm": 120, "h_mm": 12}
+      }
+    }
+
+w_mm/h_mm are omitted for "auto". Older files are still read:
+
+    version 1  {"dpi", "image_path", "unit", "fields": {id: {x_mm, y_mm, x_pixels,
+               y_pixels, text, font_size, text_width, text_height}}} where
+               text_width/text_height are editor pixels at "dpi" (-1 = auto)
+    version 0  {id: {"x", "y", "w"}} in mm, from drag_and_place.py
+
+read_layout() parses, validates and converts any version in one pass;
+load_plan() turns that straight into the LayoutPlan used by every renderer.
+
+    python layout_format.py validate coordinates.json
+    python layout_format.py convert coordinates.json [-o out.json]
+"""
+import argparse
+import json
+import os
+import sys
+
+from print_layout import FieldPlan, LayoutPlan
+from render_trace import span
+
+FORMAT_VERSION = 2
+DEFAULT_PAGE_SIZE_MM = [210, 297]
+DEFAULT_FONT_FAMILY = "Times New Roman"
+DEFAULT_PT = 11
+DEFAULT_EDITOR_DPI = 96
+
+_NUMBER = (int, float)
+
+
+class LayoutFormatError(ValueError):
+    """A layout file that cannot be used; errors lists every problem found"""
+    def __init__(self, path, errors):
+        self.path = path
+        self.errors = list(errors)
+        super().__init__(f"Invalid layout {path}: " + "; ".join(self.errors))
+
+
+def detect_version(data) -> int:
+    """Format version of parsed layout JSON (0, 1 or 2); -1 when unrecognized"""
+    if not isinstance(data, dict):
+        return -1
+    if "version" in data:
+        return data["version"] if isinstance(data["version"], int) else -1
+    if isinstance(data.get("fields"), dict):
+        return 1
+    if data and all(isinstance(v, dict) and "x" in v and "y" in v for v in data.values()):
+        return 0
+    return -1
+
+
+# ---------- validation ----------
+def _is_number(v):
+    return isinstance(v, _NUMBER) and not isinstance(v, bool)
+
+
+def _check_fields(fields, required, optional, errors):
+    if not isinstance(fields, dict):
+        errors.append("fields: must be an object")
+        return
+    for fid, spec in fields.items():
+        if not isinstance(spec, dict):
+            errors.append(f"fields.{fid}: must be an object")
+            continue
+        for key in required:
+            if key not in spec:
+                errors.append(f"fields.{fid}.{key}: missing")
+            elif not _is_number(spec[key]):
+                errors.append(f"fields.{fid}.{key}: must be a number")
+        for key in optional:
+            if spec.get(key) is not None and not _is_number(spec[key]):
+                errors.append(f"fields.{fid}.{key}: must be a number or null")
+
+
+def validate(data) -> list:
+    """
+    Check parsed layout JSON against the schema of its version
+
+    Returns:
+        list: Problems as "path: message" strings; empty when valid
+    """
+    version = detect_version(data)
+    errors = []
+    if version == 2:
+        size = data.get("page_size_mm", DEFAULT_PAGE_SIZE_MM)
+        if not (isinstance(size, list) and len(size) == 2 and all(_is_number(v) and v > 0 for v in size)):
+            errors.append("page_size_mm: must be [width, height] in mm")
+        if not isinstance(data.get("font_family", DEFAULT_FONT_FAMILY), str):
+            errors.append("font_family: must be a string")
+        for key in ("default_pt", "editor_dpi"):
+            if key in data and not (_is_number(data[key]) and data[key] > 0):
+                errors.append(f"{key}: must be a positive number")
+        if data.get("template") is not None and not isinstance(data["template"], str):
+            errors.append("template: must be a path")
+        if "fields" not in data:
+            errors.append("fields: missing")
+        else:
+            _check_fields(data["fields"], ("x_mm", "y_mm"), ("pt", "w_mm", "h_mm"), errors)
+    elif version == 1:
+        if "dpi" in data and not (_is_number(data["dpi"]) and data["dpi"] > 0):
+            errors.append("dpi: must be a positive number")
+        _check_fields(data["fields"], ("x_mm", "y_mm"), ("font_size", "text_width", "text_height"), errors)
+    elif version == 0:
+        _check_fields(data, ("x", "y"), ("w",), errors)
+    elif isinstance(data, dict) and isinstance(data.get("version"), int) and data["version"] > FORMAT_VERSION:
+        errors.append(f"version: {data['version']} is newer than this app supports ({FORMAT_VERSION})")
+    else:
+        errors.append("not a layout file (no 'version' or 'fields')")
+    return errors
+
+
+# ---------- conversion ----------
+def _px_to_mm(px, dpi):
+    """Editor pixels to mm; -1 (or any non-positive value) means auto"""
+    if px is None or px <= 0:
+        return None
+    return round(px / dpi * 25.4, 2)
+
+
+def _field(x_mm, y_mm, pt, w_mm=None, h_mm=None):
+    spec = {"x_mm": x_mm, "y_mm": y_mm, "pt": pt}
+    if w_mm:
+        spec["w_mm"] = w_mm
+    if h_mm:
+        spec["h_mm"] = h_mm
+    return spec
+
+
+def empty_layout() -> dict:
+    """Version 2 layout with the default page and no fields"""
+    return {
+        "version": FORMAT_VERSION,
+        "page_size_mm": list(DEFAULT_PAGE_SIZE_MM),
+        "font_family": DEFAULT_FONT_FAMILY,
+        "default_pt": DEFAULT_PT,
+        "fields": {},
+    }
+
+
+def convert(data) -> dict:
+    """Version 2 layout from parsed layout JSON of any version (validate first)"""
+    version = detect_version(data)
+    if version == FORMAT_VERSION:
+        return data
+    layout = empty_layout()
+    if version == 1:
+        dpi = data.get("dpi", DEFAULT_EDITOR_DPI)
+        if data.get("image_path"):
+            layout["template"] = data["image_path"]
+        layout["editor_dpi"] = dpi
+        layout["fields"] = {
+            fid: _field(info["x_mm"], info["y_mm"], info.get("font_size", DEFAULT_PT),
+                        _px_to_mm(info.get("text_width", -1), dpi),
+                        _px_to_mm(info.get("text_height", -1), dpi))
+            for fid, info in data["fields"].items()
+        }
+    elif version == 0:
+        layout["fields"] = {fid: _field(info["x"], info["y"], DEFAULT_PT, info.get("w"))
+                            for fid, info in data.items()}
+    else:
+        raise ValueError(f"Cannot convert layout version {version}")
+    return layout
+
+
+def to_plan(layout: dict) -> LayoutPlan:
+    """Compile a version 2 layout into the LayoutPlan shared by all renderers"""
+    default_pt = layout.get("default_pt", DEFAULT_PT)
+    return LayoutPlan(
+        tuple(layout.get("page_size_mm", DEFAULT_PAGE_SIZE_MM)),
+        layout.get("font_family", DEFAULT_FONT_FAMILY),
+        default_pt,
+        tuple(FieldPlan(fid, float(spec["x_mm"]), float(spec["y_mm"]), spec.get("pt", default_pt),
+                        spec.get("w_mm"), spec.get("h_mm"))
+              for fid, spec in layout["fields"].items()),
+    )
+
+
+# ---------- files ----------
+def read_layout(path: str) -> dict:
+    """
+    Parse, validate and convert a layout file of any version
+
+    Returns:
+        dict: Version 2 layout
+
+    Raises:
+        FileNotFoundError: No such file
+        LayoutFormatError: Not valid JSON or not a valid layout
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Coordinates file not found: {path}")
+    with span("layout.load", path=path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except ValueError as e:
+            raise LayoutFormatError(path, [f"not valid JSON ({e})"])
+        errors = validate(data)
+        if errors:
+            raise LayoutFormatError(path, errors)
+        return convert(data)
+
+
+def load_plan(path: str) -> LayoutPlan:
+    """Compiled plan of a layout file of any version (uncached; see print_layout.load_layout)"""
+    return to_plan(read_layout(path))
+
+
+def write_layout(path: str, layout: dict):
+    """Validate and atomically write a version 2 layout"""
+    from layout_store import atomic_write_json
+    errors = validate(layout)
+    if errors or detect_version(layout) != FORMAT_VERSION:
+        raise LayoutFormatError(path, errors or ["not a version 2 layout"])
+    atomic_write_json(path, layout)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Validate or convert layout (coordinates) files")
+    sub = ap.add_subparsers(dest="command", required=True)
+    v = sub.add_parser("validate", help="check files against their format version")
+    v.add_argument("files", nargs="+")
+    c = sub.add_parser("convert", help=f"rewrite a file in format version {FORMAT_VERSION}")
+    c.add_argument("file")
+    c.add_argument("-o", "--output", help="output path (default: overwrite the input)")
+    args = ap.parse_args(argv)
+
+    if args.command == "validate":
+        bad = 0
+        for path in args.files:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                errors = validate(data)
+            except (OSError, ValueError) as e:
+                errors = [str(e)]
+            if errors:
+                bad += 1
+                print(f"❌ {path}:\n  " + "\n  ".join(errors))
+            else:
+                print(f"✅ {path} (version {detect_version(data)}, {len(convert(data)['fields'])} fields)")
+        return 1 if bad else 0
+
+    try:
+        layout = read_layout(args.file)
+    except (OSError, LayoutFormatError) as e:
+        print(f"❌ {e}")
+        return 1
+    out = args.output or args.file
+    write_layout(out, layout)
+    print(f"✅ Wrote {out} (version {FORMAT_VERSION}, {len(layout['fields'])} fields)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
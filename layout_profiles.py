@@ -0,0 +1,152 @@
+# layout_profiles.py
+"""
+Layout profiles per masjid / pre-printed stationery batch.
+
+Profiles are listed next to the database in nn_data/layouts/profiles.json:
+
+    {
+      "default": "standard",
+      "profiles": {
+        "standard": {"name": "Standard stationery",
+                     "coords_file": "../coordinates.json"},
+        "kurla-2024": {"name": "Kurla 2024 batch",
+                       "coords_file": "kurla-2024.json",
+                       "template_path": "kurla-2024.png",
+                       "masjids": ["Masjid Ahle Hadees, Kurla"]}
+      }
+    }
+
+Relative paths are resolved against the folder of profiles.json. A record is
+matched to a profile by its masjid_name (case and spacing ignored); anything
+unmatched uses the default profile. Without a profiles.json every record uses
+nn_data/coordinates.json, exactly as before.
+
+The index is read once per file change, masjid lookups are memoized, and the
+coordinates themselves are compiled lazily by print_layout.load_layout (once
+per file change), so choosing a layout per certificate costs a dict lookup.
+"""
+from collections import namedtuple
+import json
+import logging
+import os
+
+from print_layout import load_layout
+
+log = logging.getLogger(__name__)
+
+PROFILES_FILE = "nn_data/layouts/profiles.json"
+DEFAULT_COORDS_FILE = "nn_data/coordinates.json"
+DEFAULT_PROFILE_ID = "default"
+
+# template_path None means "use the template configured in print settings"
+LayoutProfile = namedtuple("LayoutProfile", "id name coords_file template_path masjids")
+
+
+def _normalize(masjid_name) -> str:
+    return " ".join(str(masjid_name or "").replace(",", " ").casefold().split())
+
+
+def record_masjid(data: dict) -> str:
+    """masjid_name of a DB/form record or a print-data dict"""
+    return data.get("masjid_name") or data.get("MasjidName") or ""
+
+
+class LayoutRegistry:
+    def __init__(self, profiles_file: str = PROFILES_FILE, default_coords_file: str = DEFAULT_COORDS_FILE):
+        self.profiles_file = profiles_file
+        self.default_coords_file = default_coords_file
+        self._mtime = False  # False = never loaded; None = no profiles file
+        self._profiles = {}
+        self._default_id = DEFAULT_PROFILE_ID
+        self._by_masjid = {}  # normalized masjid name -> profile id
+        self._resolved = {}   # normalized masjid name -> LayoutProfile (memo)
+
+    # ---------- index ----------
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self.profiles_file)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        self._resolved.clear()
+        self._by_masjid.clear()
+        self._profiles = {}
+        self._default_id = DEFAULT_PROFILE_ID
+
+        index = {}
+        if mtime is not None:
+            try:
+                with open(self.profiles_file, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            except (OSError, ValueError) as e:
+                log.warning(f"Ignoring unreadable layout profiles {self.profiles_file}: {e}")
+                index = {}
+
+        base = os.path.dirname(self.profiles_file)
+        for profile_id, spec in (index.get("profiles") or {}).items():
+            coords = spec.get("coords_file")
+            if not coords:
+                log.warning(f"Layout profile '{profile_id}' has no coords_file; skipped")
+                continue
+            template = spec.get("template_path")
+            profile = LayoutProfile(
+                profile_id,
+                spec.get("name", profile_id),
+                os.path.normpath(os.path.join(base, coords)),
+                os.path.normpath(os.path.join(base, template)) if template else None,
+                tuple(spec.get("masjids", [])),
+            )
+            self._profiles[profile_id] = profile
+            for masjid in profile.masjids:
+                self._by_masjid.setdefault(_normalize(masjid), profile_id)
+
+        self._default_id = index.get("default", DEFAULT_PROFILE_ID)
+        if self._default_id not in self._profiles:
+            self._default_id = DEFAULT_PROFILE_ID
+            self._profiles.setdefault(DEFAULT_PROFILE_ID, LayoutProfile(
+                DEFAULT_PROFILE_ID, "Default", self.default_coords_file, None, ()))
+
+    # ---------- public ----------
+    def profiles(self) -> dict:
+        """profile id -> LayoutProfile"""
+        self._refresh()
+        return dict(self._profiles)
+
+    def default_profile(self) -> LayoutProfile:
+        self._refresh()
+        return self._profiles[self._default_id]
+
+    def for_masjid(self, masjid_name: str) -> LayoutProfile:
+        """Profile for a masjid, or the default profile when none is assigned"""
+        self._refresh()
+        key = _normalize(masjid_name)
+        profile = self._resolved.get(key)
+        if profile is None:
+            profile = self._profiles[self._by_masjid.get(key, self._default_id)]
+            self._resolved[key] = profile
+        return profile
+
+    def for_record(self, data: dict) -> LayoutProfile:
+        return self.for_masjid(record_masjid(data))
+
+    def layout_for(self, data: dict):
+        """
+        Compiled layout for a record
+
+        Returns:
+            tuple: (LayoutProfile, LayoutPlan)
+        """
+        profile = self.for_record(data)
+        return profile, load_layout(profile.coords_file)
+
+
+_default_registry = None
+
+
+def default_registry() -> LayoutRegistry:
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = LayoutRegistry()
+    return _default_registry
@@ -0,0 +1,248 @@
+# layout_store.py
+"""
+Crash-safe, versioned storage for a coordinates file.
+
+Writes go to a temp file in the same folder, are fsynced and then renamed
+over the original, so a crash mid-save leaves either the old or the new
+layout, never half of one. Rapid saves (dragging fields around) are
+coalesced: save() only remembers the latest layout and writes it after a
+short pause; flush() writes it now. A save that changes nothing is skipped.
+
+Every write that moves or restyles a field appends one line to
+<coords>.history.jsonl holding only the changed values of the changed fields,
+in layout format version 2 (see layout_format.py) whatever the version of the
+file itself. restore(version) rebuilds any earlier layout by replaying that log and saves
+it as a new version, so a restore can itself be undone. The log is compacted
+into a snapshot once it grows past max_versions.
+"""
+from PyQt5 import QtCore
+import json
+import logging
+import os
+import time
+
+from layout_format import convert, validate
+
+log = logging.getLogger(__name__)
+
+DEBOUNCE_MS = 400
+MAX_VERSIONS = 500
+
+
+def atomic_write_json(path: str, data, indent=4):
+    """Write JSON next to path, fsync it and rename it into place"""
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    tmp = os.path.join(folder, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _layout_of(data) -> dict:
+    """{"meta": {...}, "fields": {id: {key: value}}} of layout JSON of any version"""
+    if not data or validate(data):
+        return {"meta": {}, "fields": {}}
+    layout = convert(data)
+    return {
+        "meta": {k: v for k, v in layout.items() if k != "fields"},
+        "fields": {fid: dict(spec) for fid, spec in layout["fields"].items()},
+    }
+
+
+def _delta(old: dict, new: dict) -> dict:
+    """Changes turning layout old into layout new; empty when they match"""
+    delta = {}
+    meta = {k: v for k, v in new["meta"].items() if old["meta"].get(k) != v}
+    if meta:
+        delta["meta"] = meta
+    changed = {}
+    for fid, spec in new["fields"].items():
+        prev = old["fields"].get(fid)
+        diff = spec if prev is None else {k: v for k, v in spec.items() if prev.get(k) != v}
+        if diff:
+            changed[fid] = diff
+    if changed:
+        delta["fields"] = changed
+    removed = [fid for fid in old["fields"] if fid not in new["fields"]]
+    if removed:
+        delta["removed"] = removed
+    return delta
+
+
+def _apply(layout: dict, entry: dict):
+    layout["meta"].update(entry.get("meta", {}))
+    for fid, diff in entry.get("fields", {}).items():
+        layout["fields"].setdefault(fid, {}).update(diff)
+    for fid in entry.get("removed", []):
+        layout["fields"].pop(fid, None)
+
+
+class LayoutStore:
+    def __init__(self, path: str, *, debounce_ms: int = DEBOUNCE_MS, max_versions: int = MAX_VERSIONS):
+        self.path = path
+        self.history_path = os.path.splitext(path)[0] + ".history.jsonl"
+        self.max_versions = max_versions
+        self._pending = None
+        self._last_written = None  # serialized file contents of the last write
+        self._timer = None
+        if QtCore.QCoreApplication.instance() is not None:
+            self._timer = QtCore.QTimer()
+            self._timer.setSingleShot(True)
+            self._timer.setInterval(debounce_ms)
+            self._timer.timeout.connect(self._flush_from_timer)
+
+    # ---------- saving ----------
+    def save(self, data: dict):
+        """Queue data to be written after a short pause; later calls replace it"""
+        self._pending = data
+        if self._timer is None:
+            self.flush()
+        else:
+            self._timer.start()
+
+    def flush(self):
+        """
+        Write the queued layout now
+
+        Returns:
+            int or None: New history version, or None when nothing changed
+        """
+        if self._timer is not None:
+            self._timer.stop()
+        data, self._pending = self._pending, None
+        if data is None:
+            return None
+        return self.write(data)
+
+    def _flush_from_timer(self):
+        # an exception escaping a Qt slot would abort the app; the next save retries
+        try:
+            self.flush()
+        except OSError:
+            log.exception(f"Saving {self.path} failed")
+
+    def write(self, data: dict):
+        """Atomically write data and record its layout delta; skips identical content"""
+        blob = json.dumps(data, sort_keys=True)
+        if blob == self._last_written:
+            return None
+        current = self.load()
+        atomic_write_json(self.path, data)
+        self._last_written = blob
+
+        entries = self._read_history()
+        if not entries and current is not None:
+            # first versioned save: keep what was on disk as version 1
+            entries = [self._entry(1, _delta(_layout_of({}), _layout_of(current)), note="initial")]
+            self._append(entries[0])
+        old = self._replay(entries) if entries else _layout_of({})
+        delta = _delta(old, _layout_of(data))
+        if not delta:
+            return None
+        version = (entries[-1]["v"] if entries else 0) + 1
+        self._append(self._entry(version, delta))
+        if len(entries) + 1 > self.max_versions:
+            self._compact(entries + [self._entry(version, delta)])
+        return version
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # ---------- history ----------
+    @staticmethod
+    def _entry(version, delta, note=""):
+        entry = {"v": version, "ts": time.strftime("%Y-%m-%d %H:%M:%S")}
+        if note:
+            entry["note"] = note
+        entry.update(delta)
+        return entry
+
+    def _append(self, entry):
+        with open(self.history_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_history(self):
+        entries = []
+        try:
+            with open(self.history_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # a torn last line from a crash; everything before it is intact
+                        log.warning(f"Skipping unreadable line in {self.history_path}")
+        except OSError:
+            pass
+        return entries
+
+    @staticmethod
+    def _replay(entries, upto=None):
+        layout = _layout_of({})
+        for entry in entries:
+            if upto is not None and entry["v"] > upto:
+                break
+            if entry.get("snapshot"):
+                layout = _layout_of({})
+            _apply(layout, entry)
+        return layout
+
+    def _compact(self, entries):
+        """Fold the oldest versions into one snapshot, keeping the newest max_versions - 1"""
+        keep = entries[-(self.max_versions - 1):]
+        base = self._replay(entries, upto=keep[0]["v"] - 1)
+        snapshot = {"v": keep[0]["v"] - 1, "ts": entries[0]["ts"], "snapshot": True,
+                    "meta": base["meta"], "fields": base["fields"]}
+        tmp = self.history_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in [snapshot] + keep:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.history_path)
+
+    def versions(self):
+        """
+        Saved versions, newest first
+
+        Returns:
+            list: (version, timestamp, number of fields changed, note)
+        """
+        return [(e["v"], e["ts"], len(e.get("fields", {})) + len(e.get("removed", [])),
+                 e.get("note", "snapshot" if e.get("snapshot") else ""))
+                for e in reversed(self._read_history())]
+
+    def layout_at(self, version: int) -> dict:
+        """Layout as of a version: {"meta": {...}, "fields": {id: {key: value}}}"""
+        return self._replay(self._read_history(), upto=version)
+
+    def restore(self, version: int):
+        """
+        Write the layout of an earlier version back to the coordinates file
+        (in format version 2). Recorded as a new version.
+
+        Returns:
+            dict: The layout now on disk
+        """
+        self.flush()
+        target = self.layout_at(version)
+        data = dict(_layout_of(self.load())["meta"])
+        data.update(target["meta"])
+        data["fields"] = target["fields"]
+        self.write(data)
+        return data
@@ -2,10 +2,12 @@
 import sys
 from PyQt5 import QtWidgets
 from database import init_db
+import render_trace
 from main_window import MainWindow
 
 def main():
     init_db()
+    render_trace.enable_from_env()
     app = QtWidgets.QApplication(sys.argv)
     win = MainWindow()
     win.show()
@@ -2,19 +2,34 @@
 from PyQt5 import QtWidgets, QtPrintSupport, QtGui, QtCore
 from PyQt5.QtCore import QSettings
 from constants import DB_COLUMNS, HEADERS, REQUIRED_FIELDS
-from database import insert_record, update_record, delete_record, fetch_all
+from database import insert_record, update_record, delete_record, fetch_all, fetch_draft, clear_draft
 from ui.nikah_form import NikahForm
 from ui.records_table import RecordsTable
-from print_layout import draw_certificate
+from print_layout import draw_certificate, setup_proof_printer
 from field_mapper import map_form_to_print
+from print_queue import PrintJob, default_queue
+from ui.print_queue_view import PrintQueueView
+from ui.certificate_preview import CertificatePreview
+from layout_profiles import default_registry
+from printer_calibration import Calibration, NO_CALIBRATION, default_store
+from thumbnail_cache import ThumbnailStore
+from draft_store import DraftStore
+import logging
 import os
 
+log = logging.getLogger(__name__)
+
 class PrintOptionsDialog(QtWidgets.QDialog):
-    def __init__(self, parent=None):
+    """Print options plus the calibration profile of each printer."""
+    DEFAULT_PRINTER = ""  # combo data for the default profile
+
+    def __init__(self, parent=None, printer_name=""):
         super().__init__(parent)
         self.setWindowTitle("Print Options")
         self.setModal(True)
         self.settings = QtCore.QSettings()
+        self.calibrations = default_store()
+        self._edited = {}  # printer name -> Calibration changed in this dialog
 
         form = QtWidgets.QFormLayout(self)
 
@@ -28,14 +43,27 @@ class PrintOptionsDialog(QtWidgets.QDialog):
                 self.ed_template.setText(p)
         btn_browse.clicked.connect(browse)
 
+        self.cmb_printer = QtWidgets.QComboBox()
+        self.cmb_printer.addItem("Default (other printers)", self.DEFAULT_PRINTER)
+        for name in QtPrintSupport.QPrinterInfo.availablePrinterNames():
+            self.cmb_printer.addItem(name, name)
+
         self.off_x = QtWidgets.QDoubleSpinBox(); self.off_x.setRange(-50, 50); self.off_x.setDecimals(1); self.off_x.setSuffix(" mm")
         self.off_y = QtWidgets.QDoubleSpinBox(); self.off_y.setRange(-50, 50); self.off_y.setDecimals(1); self.off_y.setSuffix(" mm")
+        self.scale = QtWidgets.QDoubleSpinBox(); self.scale.setRange(50, 150); self.scale.setDecimals(1); self.scale.setSuffix(" %")
+        self.dpi_x = QtWidgets.QDoubleSpinBox(); self.dpi_x.setRange(0.9, 1.1); self.dpi_x.setDecimals(4); self.dpi_x.setSingleStep(0.001)
+        self.dpi_y = QtWidgets.QDoubleSpinBox(); self.dpi_y.setRange(0.9, 1.1); self.dpi_y.setDecimals(4); self.dpi_y.setSingleStep(0.001)
+        self.dpi_x.setToolTip("1.004 when a 100 mm grid line prints as 99.6 mm across the page")
+        self.dpi_y.setToolTip("1.004 when a 100 mm grid line prints as 99.6 mm along the feed")
 
-        # restore last offsets
-        self.off_x.setValue(float(self.settings.value("print/offset_x_mm", 0.0)))
-        self.off_y.setValue(float(self.settings.value("print/offset_y_mm", 0.0)))
+        # restore last options
         self.chk_bg.setChecked(bool(int(self.settings.value("print/show_template", 0))))
         self.chk_grid.setChecked(bool(int(self.settings.value("print/show_grid", 0))))
+        idx = self.cmb_printer.findData(printer_name or self.DEFAULT_PRINTER)
+        self.cmb_printer.setCurrentIndex(max(idx, 0))
+        self._current_printer = self.cmb_printer.currentData()
+        self._show_calibration(self._current_printer)
+        self.cmb_printer.currentIndexChanged.connect(self._printer_changed)
 
         # layout
         form.addRow(self.chk_bg)
@@ -43,26 +71,53 @@ class PrintOptionsDialog(QtWidgets.QDialog):
         row.addWidget(self.ed_template, 1); row.addWidget(btn_browse)
         form.addRow("Template image:", row)
         form.addRow(self.chk_grid)
+        form.addRow("Calibrate printer:", self.cmb_printer)
         form.addRow("Offset X:", self.off_x)
         form.addRow("Offset Y:", self.off_y)
+        form.addRow("Scale:", self.scale)
+        form.addRow("DPI correction X:", self.dpi_x)
+        form.addRow("DPI correction Y:", self.dpi_y)
 
         btns = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
         btns.accepted.connect(self.accept); btns.rejected.connect(self.reject)
         form.addRow(btns)
 
+    def _calibration(self):
+        return Calibration(float(self.off_x.value()), float(self.off_y.value()), self.scale.value() / 100.0,
+                           float(self.dpi_x.value()), float(self.dpi_y.value()))
+
+    def _show_calibration(self, printer_name):
+        cal = self._edited.get(printer_name) or self.calibrations.get(printer_name)
+        self.off_x.setValue(cal.offset_x_mm)
+        self.off_y.setValue(cal.offset_y_mm)
+        self.scale.setValue(cal.scale * 100.0)
+        self.dpi_x.setValue(cal.dpi_correction_x)
+        self.dpi_y.setValue(cal.dpi_correction_y)
+
+    def _printer_changed(self, _index):
+        # keep the edits of the printer we are leaving until OK
+        self._edited[self._current_printer] = self._calibration()
+        self._current_printer = self.cmb_printer.currentData()
+        self._show_calibration(self._current_printer)
+
     def values(self):
+        cal = self._calibration()
         return dict(
             show_template=self.chk_bg.isChecked(),
             template_path=self.ed_template.text().strip(),
             show_grid=self.chk_grid.isChecked(),
-            offset_x=float(self.off_x.value()),
-            offset_y=float(self.off_y.value()),
+            printer_name=self._current_printer,
+            offset_x=cal.offset_x_mm,
+            offset_y=cal.offset_y_mm,
+            calibration=cal,
         )
 
     def accept(self):
         v = self.values()
-        self.settings.setValue("print/offset_x_mm", v["offset_x"])
-        self.settings.setValue("print/offset_y_mm", v["offset_y"])
+        self._edited[self._current_printer] = v["calibration"]
+        for name, cal in self._edited.items():
+            if name == self.DEFAULT_PRINTER or cal != self.calibrations.get(name) or self.calibrations.has_own(name):
+                self.calibrations.set(name, cal)
         self.settings.setValue("print/show_template", int(v["show_template"]))
         self.settings.setValue("print/show_grid", int(v["show_grid"]))
         super().accept()
@@ -76,11 +131,21 @@ class MainWindow(QtWidgets.QMainWindow):
         self.setWindowTitle("Nikahnama Admin (PyQt5)")
         self.resize(1400, 900)
         self.current_id = None
+        self._loaded_record = {}
 
         self.settings = QtCore.QSettings()
+        self.print_queue = default_queue()
+        self.layouts = default_registry()
+        self.queue_view = None
+        self.form_mapper = None  # layout editor, built once and re-bound per print
+        self.suggestions = None  # SuggestionIndex for the form's completers, built in the background
         self._build()
+        self.drafts = DraftStore(self.form, record_id=lambda: self.current_id)
+        QtCore.QTimer.singleShot(0, self._prewarm_editor)
+        QtCore.QTimer.singleShot(0, self.offer_draft)
         self._restore_settings()
         self.reload_table()
+        self._build_suggestions()
 
     def _build(self):
         central = QtWidgets.QWidget()
@@ -102,6 +167,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.btn_clear = QtWidgets.QPushButton("Clear")
         self.btn_delete = QtWidgets.QPushButton("Delete")
         self.btn_print = QtWidgets.QPushButton("Print")
+        self.btn_export = QtWidgets.QPushButton("Export PDF")
+        self.btn_export.setToolTip("Export all listed records into one PDF")
+        self.btn_proofs = QtWidgets.QPushButton("Print Proofs")
+        self.btn_proofs.setToolTip("Print all listed records 2, 4 or 8 per plain sheet for checking")
+        self.btn_queue = QtWidgets.QPushButton("Print Queue")
+        self.btn_calibrate = QtWidgets.QPushButton("Print Options")
+        self.btn_calibrate.setToolTip("Template, grid and per-printer calibration")
+        self.btn_preview = QtWidgets.QPushButton("Preview")
+        self.btn_preview.setCheckable(True)
         
         self.btn_delete.setDisabled(True)
         self.btn_clear.setDisabled(True)
@@ -121,14 +195,20 @@ class MainWindow(QtWidgets.QMainWindow):
         btn_row.addWidget(self.btn_clear)
         btn_row.addWidget(self.btn_delete)
         btn_row.addWidget(self.btn_print)
+        btn_row.addWidget(self.btn_export)
+        btn_row.addWidget(self.btn_proofs)
+        btn_row.addWidget(self.btn_queue)
+        btn_row.addWidget(self.btn_calibrate)
+        btn_row.addWidget(self.btn_preview)
 
         btn_widget = QtWidgets.QWidget()
         btn_widget.setLayout(btn_row)
         btn_widget.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
         btn_widget.setMaximumHeight(self.btn_save.sizeHint().height() + 18)
 
-        # table
-        self.table = RecordsTable()
+        # table, with a thumbnail column rendered in the background
+        template_path = self.settings.value("print/template_path", "nn_data/nn_preprint_blank.png")
+        self.table = RecordsTable(thumbnail_store=ThumbnailStore(layouts=self.layouts, template_path=template_path))
         header = self.table.horizontalHeader()
         header.setStretchLastSection(True)
         header.setSectionsMovable(True)
@@ -154,6 +234,14 @@ class MainWindow(QtWidgets.QMainWindow):
 
         vbox.addWidget(self.splitter)
 
+        # live certificate preview, docked beside the form
+        self.preview = CertificatePreview(self.form, coords_file="nn_data/coordinates.json",
+                                          template_path=template_path, layouts=self.layouts)
+        self.preview_dock = QtWidgets.QDockWidget("Preview", self)
+        self.preview_dock.setObjectName("previewDock")
+        self.preview_dock.setWidget(self.preview)
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.preview_dock)
+
         # status bar
         self.status = self.statusBar()
         self.status.showMessage("Ready")
@@ -163,6 +251,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.btn_clear.clicked.connect(self.clear_form)
         self.btn_delete.clicked.connect(self.delete_clicked)
         self.btn_print.clicked.connect(self.print_clicked)
+        self.btn_export.clicked.connect(self.export_pdf_clicked)
+        self.btn_proofs.clicked.connect(self.print_proofs_clicked)
+        self.btn_queue.clicked.connect(self.show_print_queue)
+        self.btn_calibrate.clicked.connect(self.show_print_options)
+        self.btn_preview.toggled.connect(self.preview_dock.setVisible)
+        self.preview_dock.visibilityChanged.connect(self.btn_preview.setChecked)
+        self.print_queue.job_finished.connect(self.on_print_job_finished)
+        self.print_queue.job_changed.connect(self._update_queue_button)
+        self.print_queue.job_added.connect(self._update_queue_button)
         self.table.itemSelectionChanged.connect(self.table_selection_changed)
         self.search_edit.textChanged.connect(self.on_search_text_changed)
 
@@ -190,6 +287,23 @@ class MainWindow(QtWidgets.QMainWindow):
         self.settings.setValue("window/state", self.saveState())
         self.settings.setValue("splitter/sizes", self.splitter.sizes())
         self.settings.setValue("table/headerState", self.table.horizontalHeader().saveState())
+        pending = self.print_queue.active_count()
+        if pending:
+            ok = QtWidgets.QMessageBox.question(
+                self, "Print Queue", f"{pending} print job(s) are still pending. Quit anyway?",
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
+            if ok != QtWidgets.QMessageBox.Yes:
+                event.ignore()
+                return
+        try:
+            self.drafts.flush()  # kept for the next launch
+        except Exception:
+            log.exception("Saving the form draft failed")
+        self.print_queue.shutdown()
+        self.table.stop_thumbnails()
+        self._suggest_builder.wait()
+        if self.form_mapper is not None:
+            self.form_mapper.shutdown()
         super().closeEvent(event)
 
     def reload_table(self):
@@ -211,7 +325,18 @@ class MainWindow(QtWidgets.QMainWindow):
         row = sel[0].row()
         data = self.table.row_dict(row, DB_COLUMNS)
         self.current_id = int(data.get("id", "0")) or None
+        self._loaded_record = data  # as stored, for updating suggestion counts on save
         self.form.set_data(data)
+        # an open layout editor follows the selection, patching only changed fields
+        editor = self.form_mapper
+        if editor is not None and editor.isVisible():
+            profile, template_path = self._editor_target(data)
+            try:
+                editor.bind_record(map_form_to_print(data), template_path=template_path,
+                                   coords_path=profile.coords_file)
+            except Exception as e:
+                log.exception("Updating the layout editor failed")
+                self.status.showMessage(f"Layout editor not updated: {e}")
         self.status.showMessage(f"Loaded record #{self.current_id} into form.")
         self.btn_print.setEnabled(True)
         self.btn_delete.setEnabled(True)
@@ -234,16 +359,50 @@ class MainWindow(QtWidgets.QMainWindow):
             return
         if self.current_id is None:
             rec_id = insert_record(data)
+            if self.suggestions is not None:
+                self.suggestions.add_record(data)
+            self._loaded_record = dict(data)
+            self.drafts.discard()
             self.status.showMessage(f"Inserted record #{rec_id}.")
             self.reload_table()
             self.current_id = rec_id
             self.select_row_by_id(rec_id)
         else:
             update_record(self.current_id, data)
+            if self.suggestions is not None:
+                self.suggestions.replace_record(self._loaded_record, data)
+            self._loaded_record = dict(data)
+            self.drafts.discard()
             self.status.showMessage(f"Updated record #{self.current_id}.")
             self.reload_table()
             self.select_row_by_id(self.current_id)
 
+    def offer_draft(self):
+        """Offer to restore an entry left unsaved by a crash or an unexpected quit."""
+        try:
+            rec_id, fields, saved_at = fetch_draft()
+        except Exception:
+            log.exception("Reading the form draft failed")
+            return
+        if not fields:
+            return
+        what = f"record #{rec_id}" if rec_id is not None else "a new record"
+        ok = QtWidgets.QMessageBox.question(
+            self, "Unsaved Entry",
+            f"An unsaved entry for {what} ({len(fields)} field(s), last edited {saved_at.replace('T', ' ')}) "
+            f"was found. Restore it?",
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
+        if ok != QtWidgets.QMessageBox.Yes:
+            clear_draft()
+            return
+        if rec_id is not None:
+            self.select_row_by_id(rec_id)
+        if self.current_id != rec_id:  # a new entry, or the record is gone
+            self.clear_form()
+        self.drafts.restore(fields)
+        self.btn_clear.setEnabled(True)
+        self.status.showMessage("Restored the unsaved entry; save it to keep it.")
+
     def delete_clicked(self):
         rec_id = self.table.selected_id()
         if rec_id is None:
@@ -262,8 +421,6 @@ class MainWindow(QtWidgets.QMainWindow):
     def print_clicked(self):
         """Open form mapper for layout configuration, then print"""
         data = self.form.get_data()
-        print('data in print_clicked')
-        print(data)
         
         # Check if we have data to print
         if not data or not any(data.values()):
@@ -274,38 +431,171 @@ class MainWindow(QtWidgets.QMainWindow):
         # Map form data to print field names
         print_data = map_form_to_print(data)
         
-        # Get template path from settings or use default
-        template_path = self.settings.value("print/template_path", "nn_data/nn_preprint_blank.png")
-        if not os.path.exists(template_path):
-            template_path = "nn_data/nn_preprint_blank.png"
+        profile, template_path = self._editor_target(data)
         
         # Open form mapper with current data
         try:
-            from form_mapper import ImageTextEditor
-            print('print_data', print_data)
-            
-            self.form_mapper = ImageTextEditor(
-                parent=self,
-                initial_data=print_data,
-                template_path=template_path,
-                coords_path="nn_data/coordinates.json"
-            )
-            
-            # Connect signal to know when printing is done
-            self.form_mapper.print_completed.connect(self.on_print_completed)
+            self._warm_editor()
+            self.form_mapper.bind_record(print_data, template_path=template_path,
+                                         coords_path=profile.coords_file)
             
             # Show the form mapper
             self.form_mapper.show()
-            self.status.showMessage("Configure text positions, then click 'Save & Print'")
+            self.form_mapper.raise_()
+            self.form_mapper.activateWindow()
+            self.status.showMessage(f"Layout '{profile.name}': configure text positions, then click 'Save & Print'")
             
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Error", 
                 f"Failed to open layout editor: {str(e)}")
 
+    def _editor_target(self, data):
+        """(layout profile, template path) for a record; the profile's template wins over the configured one"""
+        profile = self.layouts.for_record(data)
+        template_path = profile.template_path or self.settings.value("print/template_path", "nn_data/nn_preprint_blank.png")
+        if not os.path.exists(template_path):
+            template_path = "nn_data/nn_preprint_blank.png"
+        return profile, template_path
+
+    def _warm_editor(self):
+        """
+        Build the layout editor once, hidden, while the app is idle: the UI,
+        the template's tiles and the default layout are ready before the
+        first Print, and every later Print only re-binds the record.
+        """
+        if self.form_mapper is not None:
+            return
+        from form_mapper import ImageTextEditor
+        profile, template_path = self._editor_target({})
+        self.form_mapper = ImageTextEditor(
+            parent=self,
+            template_path=template_path,
+            coords_path=profile.coords_file
+        )
+        # Connect signal to know when printing is done
+        self.form_mapper.print_completed.connect(self.on_print_completed)
+
+    def _build_suggestions(self):
+        from ui.field_completer import SuggestionIndexBuilder
+        self._suggest_builder = SuggestionIndexBuilder(self)
+        self._suggest_builder.ready.connect(self._on_suggestions)
+        self._suggest_builder.start()
+
+    def _on_suggestions(self, index):
+        self.suggestions = index
+        self.form.set_suggestions(index)
+
+    def _prewarm_editor(self):
+        try:
+            self._warm_editor()
+        except Exception:
+            log.exception("Pre-building the layout editor failed; it will be built on Print")
+
+    def export_pdf_clicked(self):
+        """Export every visible (filtered) record into one PDF sharing a single template image"""
+        rows = [self.table.row_dict(r, DB_COLUMNS) for r in range(self.table.rowCount())
+                if not self.table.isRowHidden(r)]
+        if not rows:
+            QtWidgets.QMessageBox.information(self, "Export PDF", "No records to export.")
+            return
+
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export PDF", os.path.join("output", "certificates.pdf"), "PDF (*.pdf)")
+        if not path:
+            return
+
+        template_path = self.settings.value("print/template_path", "nn_data/nn_preprint_blank.png")
+        show_template = bool(int(self.settings.value("print/show_template", 0)))
+        try:
+            from print_layout import export_certificates_pdf
+            QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+            try:
+                export_certificates_pdf(
+                    [map_form_to_print(r) for r in rows],
+                    path,
+                    coords_file="nn_data/coordinates.json",
+                    show_template=show_template,
+                    template_path=template_path,
+                    # a PDF is not fed through a printer: no feed calibration, as for queued PDF jobs
+                    offset_x_mm=NO_CALIBRATION.offset_x_mm,
+                    offset_y_mm=NO_CALIBRATION.offset_y_mm,
+                    layouts=self.layouts,
+                )
+            finally:
+                QtWidgets.QApplication.restoreOverrideCursor()
+            self.status.showMessage(f"Exported {len(rows)} certificate(s) to {path}")
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(self, "Error", f"Failed to export PDF: {str(e)}")
+
+    def print_proofs_clicked(self):
+        """Queue proofs of every visible (filtered) record, several per plain A4 sheet"""
+        rows = [self.table.row_dict(r, DB_COLUMNS) for r in range(self.table.rowCount())
+                if not self.table.isRowHidden(r)]
+        if not rows:
+            QtWidgets.QMessageBox.information(self, "Print Proofs", "No records to print.")
+            return
+
+        choices = ["2", "4", "8"]
+        last = str(self.settings.value("print/proofs_n_up", "4"))
+        n_up, ok = QtWidgets.QInputDialog.getItem(
+            self, "Print Proofs", f"{len(rows)} record(s). Certificates per sheet:",
+            choices, choices.index(last) if last in choices else 1, False)
+        if not ok:
+            return
+        n_up = int(n_up)
+        self.settings.setValue("print/proofs_n_up", n_up)
+
+        printer = QtPrintSupport.QPrinter(QtPrintSupport.QPrinter.HighResolution)
+        setup_proof_printer(printer, n_up)
+        dlg = QtPrintSupport.QPrintDialog(printer, self)
+        dlg.setWindowTitle("Select Printer for Proofs")
+        if dlg.exec_() != QtWidgets.QDialog.Accepted:
+            return
+
+        # proofs go on plain paper: no feed calibration
+        job = PrintJob.from_printer(
+            printer,
+            {},
+            calibration=NO_CALIBRATION,
+            records=[map_form_to_print(r) for r in rows],
+            n_up=n_up,
+            layouts=self.layouts,
+            show_template=bool(int(self.settings.value("print/show_template", 0))),
+            template_path=self.settings.value("print/template_path", "nn_data/nn_preprint_blank.png"),
+        )
+        self.print_queue.submit(job)
+        sheets = -(-len(rows) // n_up)
+        self.status.showMessage(f"Queued {len(rows)} proof(s) on {sheets} sheet(s) to {job.destination}")
+
     def on_print_completed(self):
         """Called when printing is completed from form mapper"""
         self.status.showMessage("Certificate printed successfully!")
 
+    def show_print_options(self):
+        dlg = PrintOptionsDialog(self)
+        if dlg.exec_() == QtWidgets.QDialog.Accepted:
+            self.status.showMessage("Print options saved.")
+
+    def show_print_queue(self):
+        if self.queue_view is None:
+            self.queue_view = PrintQueueView(self.print_queue, self)
+        self.queue_view.show()
+        self.queue_view.raise_()
+        self.queue_view.activateWindow()
+
+    def on_print_job_finished(self, job_id: int, ok: bool):
+        job = self.print_queue.jobs.get(job_id)
+        if job is None:
+            return
+        if ok:
+            self.status.showMessage(f"Printed certificate {job.title} on {job.destination}.")
+        else:
+            self.status.showMessage(f"Print job #{job_id} ({job.title}) failed: {job.error}")
+
+    def _update_queue_button(self, *_):
+        n = self.print_queue.active_count()
+        self.btn_queue.setText(f"Print Queue ({n})" if n else "Print Queue")
+
     def on_search_text_changed(self, text: str):
         self.current_filter_text = text.strip().lower()
         self.apply_filter()
@@ -319,6 +609,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if not text:
             for r in range(self.table.rowCount()):
                 self.table.setRowHidden(r, False)
+            self.table.refresh_thumbnails()
             return
 
         for r in range(self.table.rowCount()):
@@ -328,4 +619,5 @@ class MainWindow(QtWidgets.QMainWindow):
                 if item and text in item.text().lower():
                     match = True
                     break
-            self.table.setRowHidden(r, not match)
\ No newline at end of file
+            self.table.setRowHidden(r, not match)
+        self.table.refresh_thumbnails()
\ No newline at end of file
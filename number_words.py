@@ -0,0 +1,354 @@
+# number_words.py
+"""
+Amounts in words, Indian numbering (Crore, Lakh, Thousand, Hundred), both ways.
+
+    amount_to_words_indian("125000.50")
+        -> "One Lakh Twenty Five Thousand Rupees and Fifty Paise Only"
+    words_to_amount("One Lakh Twenty-Five Thousand Indian Rupees only")
+        -> Decimal("125000")
+
+Conversions are memoized: the form converts on every keystroke and a
+database holds the same few mahr amounts thousands of times.
+amounts_to_words() converts a whole column in one call (each distinct value
+once), for imports and exports. check_mahr() cross-validates mahr_figure
+against mahr_words for every record:
+
+    python number_words.py check [--db nn_data/nikahnama.db] [--csv output/mahr.csv] [--fill-empty]
+    python number_words.py words 125000 "1,25,000.50"
+    python number_words.py parse "One Lakh Indian Rupees only"
+
+check exits with status 1 when any record's figure and words disagree.
+The examples in the docstrings are the tests: python -m doctest number_words.py
+"""
+from collections import namedtuple
+from decimal import Decimal
+from functools import lru_cache
+import argparse
+import csv
+import os
+import re
+import sys
+
+NUMS_1_TO_19 = [
+    "", "One", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine",
+    "Ten", "Eleven", "Twelve", "Thirteen", "Fourteen", "Fifteen",
+    "Sixteen", "Seventeen", "Eighteen", "Nineteen"
+]
+TENS = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"]
+
+CACHE_SIZE = 4096
+
+# ---------- figures -> words ----------
+def _words_below_100(n: int) -> str:
+    if n < 20:
+        return NUMS_1_TO_19[n]
+    return (TENS[n // 10] + (" " + NUMS_1_TO_19[n % 10] if n % 10 != 0 else "")).strip()
+
+def _words_below_1000(n: int) -> str:
+    if n == 0:
+        return ""
+    h, r = divmod(n, 100)
+    parts = []
+    if h:
+        parts.append(NUMS_1_TO_19[h] + " Hundred")
+    if r:
+        parts.append(_words_below_100(r))
+    return " ".join(parts).strip()
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _rupees_to_words_indian(n: int) -> str:
+    """Indian grouping: Crore, Lakh, Thousand, Hundred."""
+    if n == 0:
+        return "Zero Rupees"
+    parts = []
+    crore, n = divmod(n, 10_000_000)
+    lakh,  n = divmod(n, 100_000)
+    thousand, n = divmod(n, 1000)
+    hundred_block = n  # 0..999
+
+    if crore:
+        # more than 99 crore: the crore count is itself in words ("One Hundred Crore")
+        parts.append((_rupees_to_words_indian(crore)[:-len(" Rupees")] if crore >= 100
+                      else _words_below_100(crore)) + " Crore")
+    if lakh:
+        parts.append(_words_below_100(lakh) + " Lakh")
+    if thousand:
+        parts.append(_words_below_100(thousand) + " Thousand")
+    if hundred_block:
+        parts.append(_words_below_1000(hundred_block))
+
+    return (" ".join(parts).strip() + " Rupees").strip()
+
+_CURRENCY = re.compile(r"₹|/-|\b(?:rs|inr|rupees?|only)\b\.?", re.I)
+_FIGURE = re.compile(r"(\d*)(?:\.(\d*))?")
+
+def _split_figure(s):
+    """
+    (rupees, paise) of a typed figure; None if invalid
+
+    Currency marks ("Rs.", "Rs", "INR", "₹", "/-", "Rupees", "Only"), commas
+    and spaces are dropped first, so the dot of "Rs." is never read as the
+    decimal point; what is left must be a plain number.
+
+    >>> _split_figure("Rs. 5000"), _split_figure("₹ 1,25,000.50/-"), _split_figure("INR 75,000 only")
+    ((5000, 0), (125000, 50), (75000, 0))
+    >>> _split_figure(".5"), _split_figure("5000."), _split_figure("Rs.5000.75")
+    ((0, 50), (5000, 0), (5000, 75))
+    >>> _split_figure("5.000.00"), _split_figure("Rs."), _split_figure("abc")
+    (None, None, None)
+    """
+    m = _FIGURE.fullmatch(re.sub(r"[\s,]", "", _CURRENCY.sub("", str(s))))
+    if m is None:
+        return None
+    rupees_part, paise_part = m.group(1), (m.group(2) or "")
+    if not rupees_part and not paise_part:
+        return None
+    paise_part = (paise_part + "00")[:2]  # at most 2 digits
+    return int(rupees_part or 0), int(paise_part)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _amount_to_words(s: str) -> str:
+    split = _split_figure(s)
+    if split is None:
+        return ""
+    rupees, paise = split
+    words = _rupees_to_words_indian(rupees)
+    if paise:
+        words = f"{words} and {_words_below_100(paise)} Paise"
+    return words + " Only"
+
+def amount_to_words_indian(s: str) -> str:
+    """
+    Convert figure like "125000.50" -> "One Lakh Twenty Five Thousand Rupees and Fifty Paise Only"
+    Handles commas and currency symbols; empty or invalid -> "".
+    """
+    if s is None:
+        return ""
+    s = str(s).strip()
+    return _amount_to_words(s) if s else ""
+
+def amounts_to_words(values) -> list:
+    """amount_to_words_indian of every value, converting each distinct value once"""
+    values = list(values)
+    words = {v: amount_to_words_indian(v) for v in set(values)}
+    return [words[v] for v in values]
+
+def parse_figure(s):
+    """
+    Decimal amount of a typed figure ("1,25,000.50", "Rs. 5000"); None if empty or invalid
+
+    >>> parse_figure("Rs. 5000"), parse_figure("₹5,000/-"), parse_figure("1,25,000.50")
+    (Decimal('5000'), Decimal('5000'), Decimal('125000.5'))
+    >>> amount_to_words_indian("Rs. 5000")
+    'Five Thousand Rupees Only'
+    """
+    if s is None:
+        return None
+    split = _split_figure(s)
+    if split is None:
+        return None
+    rupees, paise = split
+    return Decimal(rupees) + Decimal(paise) / 100
+
+
+# ---------- words -> figures ----------
+_UNITS = {w.lower(): i for i, w in enumerate(NUMS_1_TO_19) if w}
+_UNITS.update({"zero": 0, "a": 1})
+_TENS = {w.lower(): i * 10 for i, w in enumerate(TENS) if w}
+_SCALES = {
+    "thousand": 1000, "thousands": 1000,
+    "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000,
+    "crore": 10_000_000, "crores": 10_000_000,
+}
+_RUPEES = {"rupee", "rupees", "rs", "inr"}
+_PAISE = {"paise", "paisa"}
+_FILLER = {"and", "only", "indian", "just"}
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _words_to_amount(key: str):
+    rupees = paise = None
+    total = current = 0
+    seen = False  # any number word since the last rupees/paise marker
+    # place within the current group below a thousand: 0 start, 1 units
+    # before "hundred", 2 hundred, 3 tens, 4 units after tens or hundred
+    stage = 0
+    for token in key.split():
+        if token in _UNITS:
+            value = _UNITS[token]
+            if stage == 1 or stage == 4 or (stage == 3 and value >= 10):
+                return None  # "Five Six", "Twenty Twelve"
+            current += value
+            stage = 1 if stage == 0 else 4
+        elif token in _TENS:
+            if stage not in (0, 2):
+                return None  # "Twenty Twenty", "Five Twenty"
+            current += _TENS[token]
+            stage = 3
+        elif token == "hundred":
+            if stage > 1:
+                return None  # "Twenty Hundred", "One Hundred Hundred"
+            current = (current or 1) * 100
+            stage = 2
+        elif token in _SCALES:
+            scale = _SCALES[token]
+            if scale == _SCALES["crore"]:
+                # everything so far counts crores: "One Hundred Twenty Crore", "Two Lakh Crore"
+                total = ((total + current) or 1) * scale
+            else:
+                total += (current or 1) * scale
+            current, stage = 0, 0
+        elif token in _RUPEES:
+            if seen:
+                if rupees is not None:
+                    return None
+                rupees, total, current, seen = total + current, 0, 0, False
+            stage = 0
+            continue
+        elif token in _PAISE:
+            if not seen or paise is not None or total + current > 99:
+                return None
+            paise, total, current, seen = total + current, 0, 0, False
+            stage = 0
+            continue
+        elif token in _FILLER:
+            continue
+        else:
+            return None
+        seen = True
+    if seen:
+        if rupees is not None:
+            return None  # "Five Rupees Ten"
+        rupees = total + current
+    if rupees is None and paise is None:
+        return None
+    return Decimal(rupees or 0) + Decimal(paise or 0) / 100
+
+def words_to_amount(text: str):
+    """
+    Amount written in words, as written by amount_to_words_indian or by hand
+
+    Case, hyphens, commas, "Indian", "and" and "only" do not matter:
+    "One Lakh Twenty-Five Thousand Indian Rupees only" -> Decimal("125000").
+    Words that do not form a number are rejected rather than summed.
+
+    >>> words_to_amount("One Lakh Twenty-Five Thousand Indian Rupees only")
+    Decimal('125000')
+    >>> words_to_amount("Fifteen Hundred Rupees and Fifty Paise")
+    Decimal('1500.5')
+    >>> words_to_amount("Twenty Twenty Thousand"), words_to_amount("Five Six"), words_to_amount("Twenty Twelve")
+    (None, None, None)
+
+    Returns:
+        Decimal, or None when the text is empty or not an amount in words
+    """
+    if not text:
+        return None
+    key = " ".join(re.sub(r"[-,./]", " ", str(text)).lower().split())
+    return _words_to_amount(key) if key else None
+
+
+# ---------- bulk validation ----------
+MahrIssue = namedtuple("MahrIssue", "record_id serial figure words problem")
+
+def check_mahr(records) -> list:
+    """
+    Cross-check mahr_figure against mahr_words of every record
+
+    Problems: "figure unreadable", "words unreadable", "mismatch (words say N)",
+    "words missing" and "figure missing". Records with neither are skipped.
+
+    Returns:
+        list: MahrIssue tuples, in record order
+    """
+    issues = []
+    for r in records:
+        figure = str(r.get("mahr_figure") or "").strip()
+        words = str(r.get("mahr_words") or "").strip()
+        if not figure and not words:
+            continue
+        problem = None
+        if not words:
+            problem = "words missing"
+        elif not figure:
+            problem = "figure missing"
+        else:
+            fig_amount, word_amount = parse_figure(figure), words_to_amount(words)
+            if fig_amount is None:
+                problem = "figure unreadable"
+            elif word_amount is None:
+                problem = "words unreadable"
+            elif fig_amount != word_amount:
+                problem = f"mismatch (words say {word_amount:,})"
+        if problem:
+            issues.append(MahrIssue(r.get("id"), r.get("serial_no") or "", figure, words, problem))
+    return issues
+
+
+def _fill_empty_words(records) -> int:
+    """Write mahr_words for records that only have a figure; returns how many were written"""
+    from database import update_record
+    todo = [r for r in records
+            if str(r.get("mahr_figure") or "").strip() and not str(r.get("mahr_words") or "").strip()]
+    filled = 0
+    for r, words in zip(todo, amounts_to_words(r["mahr_figure"] for r in todo)):
+        if words:
+            update_record(r["id"], {"mahr_words": words})
+            filled += 1
+    return filled
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = ap.add_subparsers(dest="command", required=True)
+    c = sub.add_parser("check", help="cross-check mahr_figure against mahr_words of every record")
+    c.add_argument("--db", help="SQLite database (default: the app's database)")
+    c.add_argument("--csv", help="also write the report to this CSV file")
+    c.add_argument("--fill-empty", action="store_true", help="write mahr_words of records that only have a figure")
+    w = sub.add_parser("words", help="amounts in words")
+    w.add_argument("figures", nargs="+")
+    p = sub.add_parser("parse", help="amounts of text in words")
+    p.add_argument("texts", nargs="+")
+    args = ap.parse_args(argv)
+
+    if args.command == "words":
+        for figure, words in zip(args.figures, amounts_to_words(args.figures)):
+            print(f"{figure}: {words or '❌ not a figure'}")
+        return 0
+    if args.command == "parse":
+        for text in args.texts:
+            amount = words_to_amount(text)
+            print(f"{text}: {'❌ not an amount in words' if amount is None else f'{amount:,}'}")
+        return 0
+
+    import database
+    if args.db:
+        database.DB_PATH = args.db
+    records = database.fetch_all()
+    if args.fill_empty:
+        filled = _fill_empty_words(records)
+        print(f"✍️ Filled mahr_words of {filled} record(s) from their figure")
+        if filled:
+            records = database.fetch_all()
+
+    issues = check_mahr(records)
+    if issues:
+        print(f"{'record':>8}  {'serial':<14} {'figure':<14} {'problem':<33} words")
+        for issue in issues:
+            print(f"{str(issue.record_id or '-'):>8}  {str(issue.serial):<14} {issue.figure:<14} {issue.problem:<33} {issue.words}")
+    if args.csv:
+        os.makedirs(os.path.dirname(os.path.abspath(args.csv)), exist_ok=True)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(MahrIssue._fields)
+            writer.writerows(issues)
+
+    print(f"{len(records)} record(s): {len(issues)} with a mahr problem")
+    if any(issue.problem.startswith("mismatch") for issue in issues):
+        print("❌ mahr figure and words disagree")
+        return 1
+    print("✅ every mahr figure matches its words" if not issues else "✅ no figure contradicts its words")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+# overflow_scan.py
+"""
+Overflow check of every record against its layout, before a print run.
+
+Each record is mapped through map_form_to_print and every field is laid out
+exactly as the print engine would (place_field: wrap to the field width,
+shrink to the box height) at the print resolution. Reported per record and
+field:
+
+    clip      text does not fit its box even at the smallest font size
+    off-page  text runs past the right or bottom edge of the page
+    wrap      text wraps in a field without a box height, spilling downwards
+    shrunk    text fits its box only at a smaller font size (--show-shrunk)
+
+Records use the layout of their masjid's profile (nn_data/layouts), or the
+file given with --coords. The work is spread over a process pool. Run:
+
+    QT_QPA_PLATFORM=offscreen python overflow_scan.py
+    QT_QPA_PLATFORM=offscreen python overflow_scan.py --records records.json --csv output/overflow.csv
+
+Exits with status 1 when any record clips or runs off the page (with
+--strict, also when a field wraps).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from field_mapper import map_form_to_print
+from print_layout import bind_fields, load_layout, place_field
+
+PRINT_DPI = 300
+CHUNK_SIZE = 64
+ERROR_KINDS = ("clip", "off-page")
+
+Issue = namedtuple("Issue", "record_id serial field kind detail")
+
+_app = None  # QGuiApplication of a pool worker (font metrics need one)
+
+
+def _px_to_mm(px, dpi):
+    return px / dpi * 25.4
+
+
+def _ensure_gui():
+    global _app
+    from PyQt5 import QtGui
+    if QtGui.QGuiApplication.instance() is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        _app = QtGui.QGuiApplication([])
+
+
+def scan_record(plan, record: dict, dpi: int = PRINT_DPI, show_shrunk: bool = False):
+    """Issues of one record (database or form field names) laid out with plan"""
+    data = map_form_to_print(record)
+    rid = record.get("id")
+    serial = data.get("SrNo") or record.get("serial_no") or ""
+    page_w, page_h = plan.page_size_mm
+    issues = []
+    for field, text in bind_fields(plan, data):
+        _, _, _, lay = place_field(field, text, plan.font_family, dpi, dpi)
+        width_mm = _px_to_mm(lay.width, dpi)
+        height_mm = _px_to_mm(lay.height, dpi)
+        if not lay.fits:
+            issues.append(Issue(rid, serial, field.key, "clip",
+                                f"{height_mm:.1f} mm tall at {lay.pt:g} pt, box is {field.h_mm:.1f} mm"))
+        elif show_shrunk and lay.pt < field.pt:
+            issues.append(Issue(rid, serial, field.key, "shrunk", f"{field.pt:g} -> {lay.pt:g} pt"))
+        if field.w_mm and not field.h_mm and len(lay.lines) > 1:
+            issues.append(Issue(rid, serial, field.key, "wrap",
+                                f"{len(lay.lines)} lines, {height_mm:.1f} mm tall"))
+        # the field's y is the first baseline
+        right = field.x_mm + width_mm
+        bottom = field.y_mm - _px_to_mm(lay.ascent, dpi) + height_mm
+        if right > page_w:
+            issues.append(Issue(rid, serial, field.key, "off-page", f"ends {right - page_w:.1f} mm past the right edge"))
+        if bottom > page_h:
+            issues.append(Issue(rid, serial, field.key, "off-page", f"ends {bottom - page_h:.1f} mm past the bottom edge"))
+    return issues
+
+
+def _scan_chunk(plan, items, dpi, show_shrunk):
+    """Pool task: (record index, issue) pairs of a chunk of (index, record) sharing one layout"""
+    _ensure_gui()
+    found = []
+    for i, record in items:
+        found.extend((i, issue) for issue in scan_record(plan, record, dpi, show_shrunk))
+    return found
+
+
+def scan(records, plan_for, *, dpi=PRINT_DPI, jobs=None, show_shrunk=False, chunk_size=CHUNK_SIZE):
+    """
+    Scan records, each with the layout plan_for(record) returns
+
+    Records are grouped by layout and sent to a process pool in chunks
+    (jobs workers, default one per CPU); jobs=1 scans in this process.
+
+    Returns:
+        list: Issue tuples, in record order
+    """
+    groups = {}
+    for i, record in enumerate(records):
+        groups.setdefault(plan_for(record), []).append((i, record))
+    tasks = [(plan, items[start:start + chunk_size])
+             for plan, items in groups.items()
+             for start in range(0, len(items), chunk_size)]
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(tasks) == 1:
+        results = [_scan_chunk(plan, chunk, dpi, show_shrunk) for plan, chunk in tasks]
+    else:
+        # spawn: forking a process that may hold a Qt application is unsafe
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx) as pool:
+            futures = [pool.submit(_scan_chunk, plan, chunk, dpi, show_shrunk) for plan, chunk in tasks]
+            results = [f.result() for f in futures]
+    # stable sort: a record's issues keep their field order
+    found = sorted((pair for chunk in results for pair in chunk), key=lambda pair: pair[0])
+    return [issue for _, issue in found]
+
+
+def _load_records(args):
+    if args.records:
+        with open(args.records, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else [data]
+    import database
+    if args.db:
+        database.DB_PATH = args.db
+    return database.fetch_all()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--db", help="SQLite database (default: the app's database)")
+    ap.add_argument("--records", help="JSON file with a record or a list of records instead of the database")
+    ap.add_argument("--coords", help="check every record against this layout instead of its masjid's profile")
+    ap.add_argument("--dpi", type=int, default=PRINT_DPI, help="resolution text is measured at")
+    ap.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per CPU)")
+    ap.add_argument("--csv", help="also write the report to this CSV file")
+    ap.add_argument("--show-shrunk", action="store_true", help="also list fields that only fit at a smaller font")
+    ap.add_argument("--strict", action="store_true", help="exit with status 1 on wrapped fields too")
+    args = ap.parse_args(argv)
+
+    records = _load_records(args)
+    if args.coords:
+        plan = load_layout(args.coords)
+        plan_for = lambda record: plan
+    else:
+        from layout_profiles import default_registry
+        registry = default_registry()
+        plan_for = lambda record: registry.layout_for(record)[1]
+
+    t0 = time.perf_counter()
+    issues = scan(records, plan_for, dpi=args.dpi, jobs=args.jobs, show_shrunk=args.show_shrunk)
+    elapsed = time.perf_counter() - t0
+
+    if issues:
+        print(f"{'record':>8}  {'serial':<14} {'field':<22} {'kind':<9} detail")
+        for issue in issues:
+            print(f"{str(issue.record_id or '-'):>8}  {str(issue.serial):<14} {issue.field:<22} {issue.kind:<9} {issue.detail}")
+    if args.csv:
+        os.makedirs(os.path.dirname(os.path.abspath(args.csv)), exist_ok=True)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(Issue._fields)
+            writer.writerows(issues)
+
+    counts = {}
+    for issue in issues:
+        counts[issue.kind] = counts.get(issue.kind, 0) + 1
+    affected = len({issue.record_id for issue in issues})
+    summary = ", ".join(f"{n} {kind}" for kind, n in sorted(counts.items())) or "no issues"
+    print(f"{len(records)} record(s) in {elapsed:.1f}s: {summary} in {affected} record(s)")
+
+    failing = ERROR_KINDS + (("wrap",) if args.strict else ())
+    if any(issue.kind in failing for issue in issues):
+        print("❌ fix the data or the layout before printing")
+        return 1
+    print("✅ no record clips or runs off the page" if issues else "✅ every record fits its layout")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
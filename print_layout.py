@@ -1,7 +1,10 @@
 # print_layout.py
 from PyQt5 import QtCore, QtGui, QtPrintSupport
 import os
-import json
+from collections import namedtuple
+
+from text_layout import layout_text, draw_layout
+from render_trace import span
 
 # -------- Default print profile (A4) - FALLBACK ----------
 DEFAULT_PROFILE = {
@@ -45,28 +48,6 @@ def _one_line(text: str) -> str:
 #         )
 #         painter.drawText(rect, align, text)
 
-def _draw_text_mm(painter, x_mm, y_mm, text, pt, family, max_w_mm=None, align=QtCore.Qt.AlignLeft):
-    if not text:
-        return
-    font = QtGui.QFont(family, pointSize=pt)
-    painter.setFont(font)
-    metrics = QtGui.QFontMetrics(font)
-    x = _mm_to_px(x_mm, painter.device().logicalDpiX())
-    y = _mm_to_px(y_mm, painter.device().logicalDpiY())
-    if max_w_mm is None:
-        # For single point drawing, we need to handle multiline manually
-        # or draw within a large bounding rect
-        rect = QtCore.QRect(x, y - metrics.ascent(), 10000, 10000)
-        painter.drawText(rect, align | QtCore.Qt.TextExpandTabs, text)
-    else:
-        rect = QtCore.QRect(
-            x, y - metrics.ascent(),
-            _mm_to_px(max_w_mm, painter.device().logicalDpiX()),
-            metrics.height()
-        )
-        # Add flags to expand tabs and preserve newlines
-        painter.drawText(rect, align | QtCore.Qt.TextExpandTabs, text)
-
 def _draw_grid_mm(painter, page_w_mm, page_h_mm, step_mm=10):
     pen = QtGui.QPen(QtGui.QColor(200, 200, 200))
     pen.setStyle(QtCore.Qt.DotLine)
@@ -80,16 +61,36 @@ def _draw_grid_mm(painter, page_w_mm, page_h_mm, step_mm=10):
         painter.drawLine(_mm_to_px(0, dpi_x), _mm_to_px(y, dpi_y),
                          _mm_to_px(page_w_mm, dpi_x), _mm_to_px(y, dpi_y))
 
-def _draw_template_background(painter, printer, img_path, page_w_mm, page_h_mm):
+_template_cache = {}
+
+def load_template_image(img_path):
+    """
+    Load a template image once per (path, mtime).
+    Drawing the same QImage object on every page lets the PDF engine embed it
+    once and reference it from all pages instead of re-embedding it per page.
+    """
+    if not img_path or not os.path.exists(img_path):
+        return None
+    key = (os.path.abspath(img_path), os.path.getmtime(img_path))
+    img = _template_cache.get(key)
+    if img is None:
+        img = QtGui.QImage(img_path)
+        if img.isNull():
+            return None
+        _template_cache.clear()
+        _template_cache[key] = img
+    return img
+
+def _draw_template_background(painter, page_rect, img_path):
     if not img_path or not os.path.exists(img_path):
         return
-    img = QtGui.QImage(img_path)
-    if img.isNull():
-        return
-    target = printer.pageRect()
-    painter.setOpacity(0.18)
-    painter.drawImage(target, img)
-    painter.setOpacity(1.0)
+    with span("background.draw", path=img_path):
+        img = load_template_image(img_path)
+        if img is None:
+            return
+        painter.setOpacity(0.18)
+        painter.drawImage(page_rect, img)
+        painter.setOpacity(1.0)
 
 def load_coordinates_profile(coords_file):
     """
@@ -101,33 +102,182 @@ def load_coordinates_profile(coords_file):
     Returns:
         dict: Print profile with coordinates
     """
-    if not os.path.exists(coords_file):
-        raise FileNotFoundError(f"Coordinates file not found: {coords_file}")
-    
-    with open(coords_file, 'r') as f:
-        coords_data = json.load(f)
+    from layout_format import read_layout
+    layout = read_layout(coords_file)  # any format version, validated
     
     # Build profile from coordinates
     profile = {
-        "page_size_mm": [210, 297],  # Default A4
-        "font_family": "Times New Roman",
-        "default_pt": 11,
+        "page_size_mm": list(layout.get("page_size_mm", [210, 297])),
+        "font_family": layout.get("font_family", "Times New Roman"),
+        "default_pt": layout.get("default_pt", 11),
         "fields": {}
     }
     
-    fields = coords_data.get("fields", {})
-    for field_id, field_info in fields.items():
-        print(field_id, field_info)
+    for field_id, field_info in layout["fields"].items():
         profile["fields"][field_id] = {
-            field_id: field_info.get("text", ""),
             "x": field_info["x_mm"],
             "y": field_info["y_mm"],
-            "pt": field_info.get("font_size", 11),
-            "w": field_info.get("text_width", -1) if field_info.get("text_width", -1) != -1 else None
+            "pt": field_info.get("pt", profile["default_pt"]),
+            "w": field_info.get("w_mm"),
+            "h": field_info.get("h_mm"),
         }
     
     return profile
 
+# -------- Compiled layout ----------
+# One field of a compiled layout; w_mm/h_mm are None for "auto"
+FieldPlan = namedtuple("FieldPlan", "key x_mm y_mm pt w_mm h_mm")
+LayoutPlan = namedtuple("LayoutPlan", "page_size_mm font_family default_pt fields")
+
+def compile_layout(profile: dict) -> LayoutPlan:
+    """
+    Compile a print profile (see load_coordinates_profile) into a LayoutPlan
+    
+    Args:
+        profile: Print profile dict
+        
+    Returns:
+        LayoutPlan: Immutable field plan shared by print, PDF, raster and preview
+    """
+    default_pt = profile.get("default_pt", 11)
+    fields = tuple(
+        FieldPlan(
+            key,
+            float(spec.get("x", 0.0)),
+            float(spec.get("y", 0.0)),
+            spec.get("pt", default_pt),
+            spec.get("w"),
+            spec.get("h"),
+        )
+        for key, spec in profile.get("fields", {}).items()
+    )
+    return LayoutPlan(
+        tuple(profile.get("page_size_mm", [210, 297])),
+        profile.get("font_family", "Times New Roman"),
+        default_pt,
+        fields,
+    )
+
+_layout_cache = {}  # absolute path -> (mtime, LayoutPlan); only the newest version of each file
+
+def load_layout(coords_file) -> LayoutPlan:
+    """
+    Load and compile a coordinates file, once per (path, mtime)
+
+    A file saved again replaces its cached plan, so editor autosaves do not
+    pile up old plans.
+    
+    Args:
+        coords_file: Path to coordinates JSON file
+        
+    Returns:
+        LayoutPlan: Compiled layout
+    """
+    if not os.path.exists(coords_file):
+        raise FileNotFoundError(f"Coordinates file not found: {coords_file}")
+    path = os.path.abspath(coords_file)
+    mtime = os.path.getmtime(coords_file)
+    cached = _layout_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    from layout_format import load_plan
+    plan = load_plan(coords_file)  # one validated parse, straight to the plan
+    _layout_cache[path] = (mtime, plan)
+    return plan
+
+def bind_fields(plan: LayoutPlan, data: dict):
+    """Yield (FieldPlan, text) for every field of the plan that has text in data"""
+    for field in plan.fields:
+        text = _one_line(data.get(field.key, ""))
+        if text:
+            yield field, text
+
+def place_field(field: FieldPlan, text: str, family: str, dpi_x: int, dpi_y: int,
+                offset_x_mm: float = 0.0, offset_y_mm: float = 0.0):
+    """
+    Lay out one bound field for a device resolution
+    
+    Returns:
+        tuple: (x_px, baseline_y_px, max_w_px or None, TextLayout)
+    """
+    x = _mm_to_px(field.x_mm + offset_x_mm, dpi_x)
+    y = _mm_to_px(field.y_mm + offset_y_mm, dpi_y)
+    max_w = _mm_to_px(field.w_mm, dpi_x) if field.w_mm else None
+    max_h = _mm_to_px(field.h_mm, dpi_y) if field.h_mm else None
+    lay = layout_text(text, family, field.pt, max_w, max_h, dpi_x, dpi_y)
+    return x, y, max_w, lay
+
+def render_certificate(
+    painter: QtGui.QPainter,
+    page_rect: QtCore.QRect,
+    plan: LayoutPlan,
+    data: dict,
+    *,
+    show_template: bool = False,
+    template_path: str = None,
+    offset_x_mm: float = 0.0,
+    offset_y_mm: float = 0.0,
+    debug_grid: bool = False,
+    scale_x: float = 1.0,
+    scale_y: float = 1.0,
+):
+    """
+    Render live record data through a compiled layout. This is the single
+    drawing path behind printing, PDF export, raster export and the preview.
+    
+    Args:
+        painter: QPainter on any paint device (printer, PDF, QImage)
+        page_rect: Full page rectangle in device pixels
+        plan: Compiled layout (see load_layout / compile_layout)
+        data: Print-data dict keyed by layout field id (see field_mapper.map_form_to_print)
+        show_template: Show background template for calibration
+        template_path: Path to template image
+        offset_x_mm: X offset in millimeters
+        offset_y_mm: Y offset in millimeters
+        debug_grid: Show grid for calibration
+        scale_x: Horizontal scale of the text layer (printer calibration)
+        scale_y: Vertical scale of the text layer (printer calibration)
+    """
+    with span("page.render", fields=len(plan.fields), show_template=bool(show_template)):
+        page_w_mm, page_h_mm = plan.page_size_mm
+
+        # White background
+        if not (show_template and template_path):
+            painter.fillRect(page_rect, QtCore.Qt.white)
+
+        # Optional: template
+        if show_template and template_path:
+            _draw_template_background(painter, page_rect, template_path)
+
+        # Optional: grid
+        if debug_grid:
+            _draw_grid_mm(painter, page_w_mm, page_h_mm, step_mm=10)
+
+        painter.save()
+        # calibration scale stretches the laid-out text layer about the paper corner
+        if scale_x != 1.0 or scale_y != 1.0:
+            painter.scale(scale_x, scale_y)
+        painter.setPen(QtCore.Qt.black)
+        dpi_x = painter.device().logicalDpiX()
+        dpi_y = painter.device().logicalDpiY()
+        family = plan.font_family
+        for field, text in bind_fields(plan, data):
+            with span("field", field=field.key):
+                with span("field.layout") as sp:
+                    x, y, max_w, lay = place_field(field, text, family, dpi_x, dpi_y, offset_x_mm, offset_y_mm)
+                    sp.set(lines=len(lay.lines), pt=lay.pt, fits=lay.fits)
+                with span("field.draw"):
+                    draw_layout(painter, x, y, lay, family, max_w=max_w)
+        painter.restore()
+
+def _prepare_printer(printer, plan: LayoutPlan):
+    page_w_mm, page_h_mm = plan.page_size_mm
+    try:
+        printer.setPaperSize(QtCore.QSizeF(page_w_mm, page_h_mm), QtPrintSupport.QPrinter.Millimeter)
+    except Exception:
+        pass
+    printer.setFullPage(True)
+
 def draw_certificate_from_coords(
     painter: QtGui.QPainter,
     printer: QtPrintSupport.QPrinter,
@@ -139,64 +289,34 @@ def draw_certificate_from_coords(
     offset_x_mm: float = 0.0,
     offset_y_mm: float = 0.0,
     debug_grid: bool = False,
+    scale_x: float = 1.0,
+    scale_y: float = 1.0,
 ):
     """
-    Renders text onto a blank page using coordinates from JSON file
+    Renders record data onto a page using the layout from a coordinates JSON file
     
     Args:
         painter: QPainter object
         printer: QPrinter object
-        data: Dictionary with field data to print
+        data: Dictionary with field data to print, keyed by layout field id
         coords_file: Path to coordinates JSON file (default: "coordinates.json")
         show_template: Show background template for calibration
         template_path: Path to template image
         offset_x_mm: X offset in millimeters
         offset_y_mm: Y offset in millimeters
         debug_grid: Show grid for calibration
+        scale_x: Horizontal scale of the text layer (printer calibration)
+        scale_y: Vertical scale of the text layer (printer calibration)
     """
-    # Load profile from coordinates file
     try:
-        profile = load_coordinates_profile(coords_file)
+        plan = load_layout(coords_file)
     except FileNotFoundError:
         raise Exception(f"Coordinates file not found: {coords_file}. Please configure layout first.")
-    
-    page_w_mm, page_h_mm = profile.get("page_size_mm", [210, 297])
-
-    # Set paper size
-    try:
-        printer.setPaperSize(QtCore.QSizeF(page_w_mm, page_h_mm), QtPrintSupport.QPrinter.Millimeter)
-    except Exception:
-        pass
-    printer.setFullPage(True)
-
-    # White background
-    print(show_template, template_path)
-    if not (show_template and template_path):
-        print('fill with white')
-        painter.fillRect(printer.pageRect(), QtCore.Qt.white)
-
-    # Optional: template
-    if show_template and template_path:
-        _draw_template_background(painter, printer, template_path, page_w_mm, page_h_mm)
-
-    # Optional: grid
-    if debug_grid:
-        _draw_grid_mm(painter, page_w_mm, page_h_mm, step_mm=10)
-
-    # Draw each field using coordinates
-    family = profile.get("font_family", "Times New Roman")
-    default_pt = profile.get("default_pt", 11)
-    print(profile["fields"])
-    for key, spec in profile["fields"].items():
-        val = _one_line(spec.get(key, ""))
-        print(f"key={key}, val={val}")
-        if not val:
-            continue
-        x = spec.get("x", 0.0) + offset_x_mm
-        y = spec.get("y", 0.0) + offset_y_mm
-        pt = spec.get("pt", default_pt)
-        w = spec.get("w")  # may be None
-        _draw_text_mm(painter, x, y, val, pt, family, max_w_mm=w)
+    _prepare_printer(printer, plan)
+    render_certificate(painter, printer.pageRect(), plan, data,
+                       show_template=show_template, template_path=template_path,
+                       offset_x_mm=offset_x_mm, offset_y_mm=offset_y_mm, debug_grid=debug_grid,
+                       scale_x=scale_x, scale_y=scale_y)
 
 
 def draw_certificate(
@@ -212,41 +332,213 @@ def draw_certificate(
     debug_grid: bool = False,
 ):
     """
-    LEGACY: Renders text using hardcoded profile (for backward compatibility)
-    Use draw_certificate_from_coords() for coordinate-based printing
+    LEGACY: Renders data using a profile dict (for backward compatibility)
+    Use draw_certificate_from_coords() or render_certificate() for coordinate-based printing
+    """
+    plan = compile_layout(profile or DEFAULT_PROFILE)
+    _prepare_printer(printer, plan)
+    render_certificate(painter, printer.pageRect(), plan, data,
+                       show_template=show_template, template_path=template_path,
+                       offset_x_mm=offset_x_mm, offset_y_mm=offset_y_mm, debug_grid=debug_grid)
+
+
+def export_certificates_pdf(
+    records: list,
+    out_path: str,
+    *,
+    coords_file: str = "nn_data/coordinates.json",
+    show_template: bool = True,
+    template_path: str = None,
+    offset_x_mm: float = 0.0,
+    offset_y_mm: float = 0.0,
+    debug_grid: bool = False,
+    layouts=None,
+):
+    """
+    Export many certificates into one PDF, one page per record.
+
+    The coordinates are loaded once and only the text layer is rendered per
+    record. The template image is a single shared object, so it is embedded
+    once and every page references it: the file grows by a few KB per page
+    instead of by a full-resolution image per certificate.
+
+    With a layout registry each record is printed with the profile of its
+    masjid; records sharing a profile share its compiled layout and template.
+
+    Args:
+        records: List of print-data dicts (see field_mapper.map_form_to_print)
+        out_path: Output PDF path
+        coords_file: Path to coordinates JSON file
+        show_template: Place the shared template under every page
+        template_path: Path to template image
+        offset_x_mm: X offset in millimeters
+        offset_y_mm: Y offset in millimeters
+        debug_grid: Show grid for calibration
+        layouts: Optional layout_profiles.LayoutRegistry choosing the layout per record;
+            template_path is then the fallback for profiles without their own template
+
+    Returns:
+        str: out_path
     """
-    prof = profile or DEFAULT_PROFILE
-    page_w_mm, page_h_mm = prof.get("page_size_mm", [210, 297])
+    def layout_for(data):
+        if layouts is None:
+            return load_layout(coords_file), template_path
+        profile, plan = layouts.layout_for(data)
+        return plan, profile.template_path or template_path
 
     try:
-        printer.setPaperSize(QtCore.QSizeF(page_w_mm, page_h_mm), QtPrintSupport.QPrinter.Millimeter)
-    except Exception:
-        pass
-    printer.setFullPage(True)
+        pages = [(data,) + layout_for(data) for data in records]
+        plan = pages[0][1] if pages else load_layout(coords_file)
+    except FileNotFoundError as e:
+        raise Exception(f"{e}. Please configure layout first.")
 
+    out_dir = os.path.dirname(out_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
 
-    # White background 
-    if not (show_template and template_path):
-        painter.fillRect(printer.pageRect(), QtCore.Qt.white)
+    page_w_mm, page_h_mm = plan.page_size_mm
+    printer = QtPrintSupport.QPrinter(QtPrintSupport.QPrinter.HighResolution)
+    printer.setOutputFormat(QtPrintSupport.QPrinter.PdfFormat)
+    printer.setOutputFileName(out_path)
+    printer.setFullPage(True)
+    printer.setPaperSize(QtCore.QSizeF(page_w_mm, page_h_mm), QtPrintSupport.QPrinter.Millimeter)
 
-    if show_template and template_path:
-        _draw_template_background(painter, printer, template_path, page_w_mm, page_h_mm)
+    painter = QtGui.QPainter()
+    if not painter.begin(printer):
+        raise Exception(f"Failed to open PDF for writing: {out_path}")
+    try:
+        with span("pdf.export", pages=len(records), path=out_path):
+            for i, (data, plan, page_template) in enumerate(pages):
+                if i:
+                    if plan.page_size_mm != (page_w_mm, page_h_mm):
+                        page_w_mm, page_h_mm = plan.page_size_mm
+                        printer.setPaperSize(QtCore.QSizeF(page_w_mm, page_h_mm), QtPrintSupport.QPrinter.Millimeter)
+                    printer.newPage()
+                render_certificate(
+                    painter,
+                    printer.pageRect(),
+                    plan,
+                    data,
+                    show_template=show_template,
+                    template_path=page_template,
+                    offset_x_mm=offset_x_mm,
+                    offset_y_mm=offset_y_mm,
+                    debug_grid=debug_grid,
+                )
+    finally:
+        painter.end()
+    return out_path
+
+
+# -------- N-up proofs ----------
+# certificates per sheet -> (columns, rows, landscape sheet)
+PROOF_GRIDS = {
+    1: (1, 1, False),
+    2: (2, 1, True),
+    4: (2, 2, False),
+    8: (4, 2, True),
+}
+PROOF_MARGIN_MM = 5.0
+PROOF_GAP_MM = 4.0
+
+def setup_proof_printer(printer: QtPrintSupport.QPrinter, n_up: int):
+    """Plain A4 sheet in the orientation the n-up grid needs; call before QPainter.begin()"""
+    if n_up not in PROOF_GRIDS:
+        raise ValueError(f"Unsupported proofs per sheet: {n_up} (choose from {sorted(PROOF_GRIDS)})")
+    landscape = PROOF_GRIDS[n_up][2]
+    printer.setFullPage(True)
+    printer.setPageSize(QtPrintSupport.QPrinter.A4)
+    printer.setOrientation(QtPrintSupport.QPrinter.Landscape if landscape else QtPrintSupport.QPrinter.Portrait)
 
-    if debug_grid:
-        _draw_grid_mm(painter, page_w_mm, page_h_mm, step_mm=10)
+def proof_slots(sheet_rect: QtCore.QRect, n_up: int, dpi_x: float, dpi_y: float):
+    """
+    Slot rectangles of an n-up sheet, in device pixels, row by row
 
-    family = prof.get("font_family", "Times New Roman")
-    default_pt = prof.get("default_pt", 11)
+    Returns:
+        list: QRectF per slot
+    """
+    cols, rows = PROOF_GRIDS[n_up][:2]
+    mx, my = PROOF_MARGIN_MM / 25.4 * dpi_x, PROOF_MARGIN_MM / 25.4 * dpi_y
+    gx, gy = PROOF_GAP_MM / 25.4 * dpi_x, PROOF_GAP_MM / 25.4 * dpi_y
+    slot_w = (sheet_rect.width() - 2 * mx - (cols - 1) * gx) / cols
+    slot_h = (sheet_rect.height() - 2 * my - (rows - 1) * gy) / rows
+    return [
+        QtCore.QRectF(sheet_rect.x() + mx + c * (slot_w + gx), sheet_rect.y() + my + r * (slot_h + gy), slot_w, slot_h)
+        for r in range(rows) for c in range(cols)
+    ]
+
+def _slot_transform(slot: QtCore.QRectF, page_rect: QtCore.QRect) -> QtGui.QTransform:
+    """Map a full certificate page onto a slot: uniform scale, centred"""
+    s = min(slot.width() / page_rect.width(), slot.height() / page_rect.height())
+    dx = slot.x() + (slot.width() - page_rect.width() * s) / 2
+    dy = slot.y() + (slot.height() - page_rect.height() * s) / 2
+    return QtGui.QTransform(s, 0, 0, s, dx, dy)
+
+def render_proof_sheets(
+    painter: QtGui.QPainter,
+    printer: QtPrintSupport.QPrinter,
+    records: list,
+    *,
+    n_up: int = 4,
+    coords_file: str = "nn_data/coordinates.json",
+    show_template: bool = False,
+    template_path: str = None,
+    layouts=None,
+    debug_grid: bool = False,
+):
+    """
+    Print proofs of many certificates, n_up per sheet, on a printer prepared
+    with setup_proof_printer(). Each certificate is rendered at full page
+    size through one painter transform that scales it into its slot, so
+    layout, wrapping and shrink-to-fit match the real print exactly.
 
-    for key, spec in prof["fields"].items():
-        val = _one_line(data.get(key, ""))
-        if not val:
-            continue
-        x = spec.get("x", 0.0) + offset_x_mm
-        y = spec.get("y", 0.0) + offset_y_mm
-        pt = spec.get("pt", default_pt)
-        w = spec.get("w")
-        _draw_text_mm(painter, x, y, val, pt, family, max_w_mm=w)
+    Args:
+        painter: Active QPainter on printer
+        printer: QPrinter (physical or PDF)
+        records: List of print-data dicts (see field_mapper.map_form_to_print)
+        n_up: Certificates per sheet (1, 2, 4 or 8)
+        coords_file: Path to coordinates JSON file
+        show_template: Draw the template under each proof
+        template_path: Path to template image
+        layouts: Optional layout_profiles.LayoutRegistry choosing the layout per record
+        debug_grid: Show grid for calibration
+
+    Returns:
+        int: Number of sheets printed
+    """
+    dpi_x = painter.device().logicalDpiX()
+    dpi_y = painter.device().logicalDpiY()
+    sheet_rect = printer.pageRect()
+    slots = proof_slots(sheet_rect, n_up, dpi_x, dpi_y)
+    border = QtGui.QPen(QtGui.QColor(150, 150, 150))
+    border.setStyle(QtCore.Qt.DashLine)
+
+    sheets = 0
+    with span("proof.print", records=len(records), n_up=n_up):
+        for start in range(0, len(records), len(slots)):
+            if sheets:
+                printer.newPage()
+            sheets += 1
+            with span("proof.sheet", sheet=sheets):
+                for slot, data in zip(slots, records[start:start + len(slots)]):
+                    if layouts is None:
+                        plan, page_template = load_layout(coords_file), template_path
+                    else:
+                        profile, plan = layouts.layout_for(data)
+                        page_template = profile.template_path or template_path
+                    page_w_mm, page_h_mm = plan.page_size_mm
+                    page_rect = QtCore.QRect(0, 0, _mm_to_px(page_w_mm, dpi_x), _mm_to_px(page_h_mm, dpi_y))
+
+                    painter.save()
+                    painter.setTransform(_slot_transform(slot, page_rect), True)
+                    painter.setClipRect(page_rect)
+                    render_certificate(painter, page_rect, plan, data, show_template=show_template,
+                                       template_path=page_template, debug_grid=debug_grid)
+                    painter.setClipping(False)
+                    painter.setPen(border)
+                    painter.drawRect(page_rect.adjusted(0, 0, -1, -1))
+                    painter.restore()
+    return sheets
 
 
 # Example usage
@@ -0,0 +1,342 @@
+# print_queue.py
+"""
+Background print queue.
+
+The GUI thread only chooses the printer; rendering and spooling happen on a
+worker thread, so a slow, jammed or offline printer never freezes data entry.
+Jobs are processed in submission order. A job that fails with a transient
+error (the printer could not be opened) is retried with a growing delay.
+
+Qt supports painting on a QPrinter outside the GUI thread; the QPrinter for a
+job is created on the worker from the printer name picked in QPrintDialog.
+"""
+from PyQt5 import QtCore, QtGui, QtPrintSupport
+import itertools
+import logging
+import queue
+import threading
+import time
+
+from render_trace import span
+
+log = logging.getLogger(__name__)
+
+QUEUED = "Queued"
+PRINTING = "Printing"
+RETRYING = "Retrying"
+DONE = "Done"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+MAX_ATTEMPTS = 3
+RETRY_DELAYS_S = (2, 5, 15)
+
+_ids = itertools.count(1)
+
+
+class TransientPrintError(Exception):
+    """The printer could not take the job right now; worth retrying."""
+
+
+class PrintJob:
+    """One certificate to render and spool. Only the queue changes status fields."""
+    def __init__(self, print_data: dict, *, title: str = "", printer_name: str = "", output_file: str = "",
+                 coords_file: str = "nn_data/coordinates.json", show_template: bool = False,
+                 template_path: str = None, offset_x_mm: float = 0.0, offset_y_mm: float = 0.0,
+                 scale_x: float = 1.0, scale_y: float = 1.0, copies: int = 1,
+                 records: list = None, n_up: int = 1, layouts=None):
+        self.id = next(_ids)
+        self.print_data = dict(print_data)
+        # proof jobs print several records n_up per plain sheet instead of print_data
+        self.records = [dict(r) for r in records] if records is not None else None
+        self.n_up = n_up
+        self.layouts = layouts
+        if self.records is not None and not title:
+            title = f"Proofs: {len(self.records)} × {n_up}-up"
+        self.title = title or str(print_data.get("SrNo", "")) or f"Job {self.id}"
+        self.printer_name = printer_name
+        self.output_file = output_file
+        self.coords_file = coords_file
+        self.show_template = show_template
+        self.template_path = template_path
+        self.offset_x_mm = offset_x_mm
+        self.offset_y_mm = offset_y_mm
+        self.scale_x = scale_x
+        self.scale_y = scale_y
+        self.copies = max(1, int(copies))
+
+        self.status = QUEUED
+        self.attempts = 0
+        self.error = ""
+        self.created = time.time()
+        self.finished = None
+        self.cancel_requested = False
+        self.generation = 0  # bumped on retry so a stale queue entry is skipped
+
+    @classmethod
+    def from_printer(cls, printer: QtPrintSupport.QPrinter, print_data: dict, *, calibration=None, **kw):
+        """
+        Capture the destination chosen in QPrintDialog so the worker can rebuild it.
+        A physical printer's calibration profile is resolved here unless one is given.
+        """
+        output_file = ""
+        if printer.outputFormat() == QtPrintSupport.QPrinter.PdfFormat:
+            output_file = printer.outputFileName()
+        elif calibration is None:
+            from printer_calibration import calibration_for
+            calibration = calibration_for(printer.printerName())
+        if calibration is not None:
+            kw.update(offset_x_mm=calibration.offset_x_mm, offset_y_mm=calibration.offset_y_mm,
+                      scale_x=calibration.scale_x, scale_y=calibration.scale_y)
+        return cls(print_data, printer_name=printer.printerName(), output_file=output_file,
+                   copies=printer.copyCount(), **kw)
+
+    @property
+    def destination(self):
+        return self.output_file or self.printer_name or "Default printer"
+
+
+def _make_printer(job: PrintJob) -> QtPrintSupport.QPrinter:
+    printer = QtPrintSupport.QPrinter(QtPrintSupport.QPrinter.HighResolution)
+    if job.output_file:
+        printer.setOutputFormat(QtPrintSupport.QPrinter.PdfFormat)
+        printer.setOutputFileName(job.output_file)
+    elif job.printer_name:
+        printer.setPrinterName(job.printer_name)
+    printer.setFullPage(True)
+    printer.setPageSize(QtPrintSupport.QPrinter.A4)
+    printer.setCopyCount(job.copies)
+    return printer
+
+
+def run_job(job: PrintJob):
+    """Render and spool one job on the calling thread. Raises on failure."""
+    if job.records is not None:
+        _run_proof_job(job)
+        return
+
+    if job.output_file:
+        # PDF destination: reuse an unchanged earlier render
+        from render_cache import export_certificate_pdf
+        export_certificate_pdf(
+            job.print_data,
+            job.output_file,
+            coords_file=job.coords_file,
+            show_template=job.show_template,
+            template_path=job.template_path,
+            offset_x_mm=job.offset_x_mm,
+            offset_y_mm=job.offset_y_mm,
+        )
+        return
+
+    from print_layout import draw_certificate_from_coords
+    printer = _make_printer(job)
+    if not printer.isValid():
+        raise TransientPrintError(f"Printer not available: {job.destination}")
+
+    with span("print.job", printer=job.printer_name, job=job.id):
+        painter = QtGui.QPainter()
+        if not painter.begin(printer):
+            raise TransientPrintError(f"Could not open printer: {job.destination}")
+        try:
+            draw_certificate_from_coords(
+                painter,
+                printer,
+                job.print_data,
+                coords_file=job.coords_file,
+                show_template=job.show_template,
+                template_path=job.template_path,
+                offset_x_mm=job.offset_x_mm,
+                offset_y_mm=job.offset_y_mm,
+                scale_x=job.scale_x,
+                scale_y=job.scale_y,
+            )
+        finally:
+            # ending the painter flushes the page to the spooler
+            with span("printer.spool", printer=job.printer_name, job=job.id):
+                ok = painter.end()
+        if not ok or printer.printerState() == QtPrintSupport.QPrinter.Error:
+            raise TransientPrintError(f"Spooling failed on {job.destination}")
+
+
+def _run_proof_job(job: PrintJob):
+    from print_layout import render_proof_sheets, setup_proof_printer
+    printer = _make_printer(job)
+    setup_proof_printer(printer, job.n_up)
+    if not job.output_file and not printer.isValid():
+        raise TransientPrintError(f"Printer not available: {job.destination}")
+
+    with span("print.job", printer=job.printer_name, job=job.id, proofs=len(job.records)):
+        painter = QtGui.QPainter()
+        if not painter.begin(printer):
+            raise TransientPrintError(f"Could not open printer: {job.destination}")
+        try:
+            render_proof_sheets(
+                painter,
+                printer,
+                job.records,
+                n_up=job.n_up,
+                coords_file=job.coords_file,
+                show_template=job.show_template,
+                template_path=job.template_path,
+                layouts=job.layouts,
+            )
+        finally:
+            with span("printer.spool", printer=job.printer_name, job=job.id):
+                ok = painter.end()
+        if not ok or printer.printerState() == QtPrintSupport.QPrinter.Error:
+            raise TransientPrintError(f"Spooling failed on {job.destination}")
+
+
+class _PrintWorker(QtCore.QThread):
+    status = QtCore.pyqtSignal(int, str, int, str)  # job id, status, attempts, error
+
+    def __init__(self, jobs: "queue.Queue", parent=None):
+        super().__init__(parent)
+        self.jobs = jobs
+        self.stopping = threading.Event()
+        self.wake = threading.Event()  # ends a wait between retries early (cancel, shutdown)
+
+    def run(self):
+        while True:
+            item = self.jobs.get()
+            if item is None or self.stopping.is_set():
+                return
+            job, generation = item
+            if generation != job.generation:
+                continue
+            if job.cancel_requested:
+                self.status.emit(job.id, CANCELLED, job.attempts, "")
+                continue
+            self._process(job)
+
+    def _process(self, job: PrintJob):
+        attempts = job.attempts
+        while True:
+            attempts += 1
+            self.status.emit(job.id, PRINTING, attempts, "")
+            try:
+                run_job(job)
+                self.status.emit(job.id, DONE, attempts, "")
+                return
+            except TransientPrintError as e:
+                if attempts >= MAX_ATTEMPTS or job.cancel_requested:
+                    self.status.emit(job.id, FAILED, attempts, str(e))
+                    return
+                delay = RETRY_DELAYS_S[min(attempts - 1, len(RETRY_DELAYS_S) - 1)]
+                log.warning(f"Print job {job.id} failed ({e}); retrying in {delay}s")
+                self.status.emit(job.id, RETRYING, attempts, str(e))
+                self.wake.clear()
+                if not (job.cancel_requested or self.stopping.is_set()):
+                    self.wake.wait(delay)
+                if job.cancel_requested or self.stopping.is_set():
+                    self.status.emit(job.id, CANCELLED, attempts, str(e))
+                    return
+            except Exception as e:
+                log.exception(f"Print job {job.id} failed")
+                self.status.emit(job.id, FAILED, attempts, str(e))
+                return
+
+
+class PrintQueue(QtCore.QObject):
+    """Owns the jobs and the worker. Lives in the GUI thread; all signals arrive there."""
+    job_added = QtCore.pyqtSignal(int)
+    job_changed = QtCore.pyqtSignal(int)
+    job_finished = QtCore.pyqtSignal(int, bool)  # job id, succeeded
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = {}
+        self._pending = queue.Queue()
+        self._worker = _PrintWorker(self._pending)
+        self._worker.status.connect(self._on_status)
+        self._worker.start()
+
+    def submit(self, job: PrintJob) -> int:
+        self.jobs[job.id] = job
+        self._pending.put((job, job.generation))
+        self.job_added.emit(job.id)
+        return job.id
+
+    def cancel(self, job_id: int):
+        """Cancel a job that has not started printing yet."""
+        job = self.jobs.get(job_id)
+        if job and job.status in (QUEUED, RETRYING):
+            job.cancel_requested = True
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.finished = time.time()
+                self.job_changed.emit(job_id)
+            else:
+                self._worker.wake.set()
+
+    def retry(self, job_id: int):
+        """Put a failed or cancelled job back in the queue."""
+        job = self.jobs.get(job_id)
+        if job and job.status in (FAILED, CANCELLED):
+            job.status = QUEUED
+            job.error = ""
+            job.attempts = 0
+            job.cancel_requested = False
+            job.finished = None
+            job.generation += 1
+            self._pending.put((job, job.generation))
+            self.job_changed.emit(job_id)
+
+    def clear_finished(self):
+        for job_id in [j.id for j in self.jobs.values() if j.status in (DONE, CANCELLED)]:
+            del self.jobs[job_id]
+            self.job_changed.emit(job_id)
+
+    def active_count(self) -> int:
+        return sum(1 for j in self.jobs.values() if j.status not in FINISHED_STATES)
+
+    def shutdown(self):
+        """
+        Cancel every job that has not started printing and stop the worker
+
+        A job already printing is finished first (a page half sent to the
+        spooler cannot be taken back); this returns once the worker has ended.
+        """
+        for job in self.jobs.values():
+            if job.status in (QUEUED, RETRYING):
+                job.cancel_requested = True
+                job.status = CANCELLED
+                job.finished = time.time()
+        while True:
+            try:
+                self._pending.get_nowait()
+            except queue.Empty:
+                break
+        self._worker.stopping.set()
+        self._worker.wake.set()
+        self._pending.put(None)
+        self._worker.wait()
+
+    def _on_status(self, job_id: int, status: str, attempts: int, error: str):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        if job.status == CANCELLED and status == CANCELLED:
+            return
+        job.status = status
+        job.attempts = attempts
+        job.error = error
+        if status in FINISHED_STATES:
+            job.finished = time.time()
+        self.job_changed.emit(job_id)
+        if status in (DONE, FAILED):
+            self.job_finished.emit(job_id, status == DONE)
+
+
+_default_queue = None
+
+
+def default_queue() -> PrintQueue:
+    """Application-wide queue, created on first use (needs a running QApplication)."""
+    global _default_queue
+    if _default_queue is None:
+        _default_queue = PrintQueue(QtCore.QCoreApplication.instance())
+    return _default_queue
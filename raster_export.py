@@ -0,0 +1,299 @@
+# raster_export.py
+"""
+Raster (PNG/JPEG) export of certificates.
+
+Renders through the same layout engine as the printer/PDF path
+(print_layout.render_certificate), but onto a QImage instead of a QPrinter,
+so a raster copy lands on exactly the same millimetre coordinates as the
+printed certificate.
+
+At high DPI the page is rendered in horizontal bands. PNG output is streamed
+band by band straight into the file, so peak memory stays at one band no
+matter how large the page is. Qt's JPEG/WebP writers need the whole page in
+memory: lossy output is still painted in bands, but into one RGB888 page
+(3 bytes per pixel, about 100 MB for A4 at 600 DPI).
+"""
+from PyQt5 import QtCore, QtGui
+import os
+import struct
+import zlib
+
+from print_layout import load_layout, render_certificate
+
+A4_MM = (210, 297)
+
+# at or above this DPI the page is rendered in bands instead of one image
+TILE_DPI_THRESHOLD = 600
+TILE_HEIGHT_PX = 1024
+
+LOSSY_FORMATS = ("jpg", "jpeg", "webp")
+
+
+def page_size_px(dpi: float, page_size_mm=A4_MM):
+    w_mm, h_mm = page_size_mm
+    return int(round(w_mm / 25.4 * dpi)), int(round(h_mm / 25.4 * dpi))
+
+
+def _new_band(width_px: int, height_px: int, dpi: float) -> QtGui.QImage:
+    img = QtGui.QImage(width_px, height_px, QtGui.QImage.Format_RGB32)
+    # logicalDpiX/Y of a QImage come from dots-per-metre; fonts and mm positions follow it
+    dpm = int(round(dpi / 0.0254))
+    img.setDotsPerMeterX(dpm)
+    img.setDotsPerMeterY(dpm)
+    img.fill(QtCore.Qt.white)
+    return img
+
+
+def _render_band(draw, page_rect: QtCore.QRect, dpi: float, top: int, height: int) -> QtGui.QImage:
+    """Render rows [top, top + height) of the page; draw(painter, page_rect) paints the full page."""
+    img = _new_band(page_rect.width(), height, dpi)
+    painter = QtGui.QPainter(img)
+    try:
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setRenderHint(QtGui.QPainter.TextAntialiasing)
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        painter.translate(0, -top)
+        draw(painter, page_rect)
+    finally:
+        painter.end()
+    return img
+
+
+def _band_ranges(height_px: int, tile_height_px: int):
+    top = 0
+    while top < height_px:
+        h = min(tile_height_px, height_px - top)
+        yield top, h
+        top += h
+
+
+class _PngStreamWriter:
+    """Writes an RGB PNG incrementally: rows go through one zlib stream into IDAT chunks."""
+    CHUNK_BYTES = 256 * 1024
+
+    def __init__(self, path: str, width: int, height: int, dpi: float, level: int = 6):
+        self.width = width
+        self.f = open(path, "wb")
+        self.z = zlib.compressobj(level)
+        self.pending = bytearray()
+        self.f.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        dpm = int(round(dpi / 0.0254))
+        self._chunk(b"pHYs", struct.pack(">IIB", dpm, dpm, 1))
+
+    def _chunk(self, kind: bytes, payload: bytes):
+        self.f.write(struct.pack(">I", len(payload)))
+        self.f.write(kind)
+        self.f.write(payload)
+        self.f.write(struct.pack(">I", zlib.crc32(kind + payload) & 0xFFFFFFFF))
+
+    def _flush(self, force=False):
+        if self.pending and (force or len(self.pending) >= self.CHUNK_BYTES):
+            self._chunk(b"IDAT", bytes(self.pending))
+            self.pending = bytearray()
+
+    def write_band(self, img: QtGui.QImage):
+        rgb = img.convertToFormat(QtGui.QImage.Format_RGB888)
+        stride = rgb.bytesPerLine()
+        row_bytes = self.width * 3
+        ptr = rgb.constBits()
+        ptr.setsize(stride * rgb.height())
+        buf = memoryview(ptr)
+        for y in range(rgb.height()):
+            start = y * stride
+            # filter type 0 (None) per scanline
+            self.pending += self.z.compress(b"\x00")
+            self.pending += self.z.compress(buf[start:start + row_bytes])
+            self._flush()
+
+    def close(self):
+        self.pending += self.z.flush()
+        self._flush(force=True)
+        self._chunk(b"IEND", b"")
+        self.f.close()
+
+
+def _encode(img: QtGui.QImage, fmt: str, quality: int) -> QtCore.QByteArray:
+    ba = QtCore.QByteArray()
+    buf = QtCore.QBuffer(ba)
+    buf.open(QtCore.QIODevice.WriteOnly)
+    if not img.save(buf, fmt.upper(), quality):
+        raise Exception(f"Could not encode image as {fmt}")
+    buf.close()
+    return ba
+
+
+def _encode_to_size(img: QtGui.QImage, fmt: str, max_bytes: int) -> QtCore.QByteArray:
+    """Binary-search the highest lossy quality whose output fits in max_bytes."""
+    lo, hi = 5, 95
+    best = None
+    while lo <= hi:
+        q = (lo + hi) // 2
+        ba = _encode(img, fmt, q)
+        if ba.size() <= max_bytes:
+            best = ba
+            lo = q + 1
+        else:
+            hi = q - 1
+    if best is None:
+        # even the lowest quality is too big; return the smallest we can make
+        best = _encode(img, fmt, 5)
+    return best
+
+
+def render_to_image(draw, *, dpi: float = 300, page_size_mm=A4_MM,
+                    tile_height_px: int = TILE_HEIGHT_PX) -> QtGui.QImage:
+    """
+    Render a whole page into one RGB888 QImage. Above TILE_DPI_THRESHOLD the
+    page is painted band by band so only one 32-bit band exists at a time;
+    the returned page itself is still full size (3 bytes per pixel).
+    """
+    w_px, h_px = page_size_px(dpi, page_size_mm)
+    page = QtCore.QRect(0, 0, w_px, h_px)
+    if dpi < TILE_DPI_THRESHOLD:
+        return _render_band(draw, page, dpi, 0, h_px).convertToFormat(QtGui.QImage.Format_RGB888)
+
+    out = QtGui.QImage(w_px, h_px, QtGui.QImage.Format_RGB888)
+    dpm = int(round(dpi / 0.0254))
+    out.setDotsPerMeterX(dpm)
+    out.setDotsPerMeterY(dpm)
+    p = QtGui.QPainter(out)
+    try:
+        for top, h in _band_ranges(h_px, tile_height_px):
+            p.drawImage(0, top, _render_band(draw, page, dpi, top, h))
+    finally:
+        p.end()
+    return out
+
+
+def export_raster(draw, out_path: str, *, dpi: float = 300, fmt: str = None,
+                  quality: int = -1, max_bytes: int = None, page_size_mm=A4_MM,
+                  tile_height_px: int = TILE_HEIGHT_PX) -> str:
+    """
+    Render draw(painter, page_rect) to an image file.
+
+    Args:
+        draw: callable painting one full page onto (painter, page_rect)
+        out_path: target file; format taken from the extension unless fmt is given
+        dpi: output resolution
+        fmt: "png", "jpg"/"jpeg" or "webp"
+        quality: encoder quality (0-100, -1 for the Qt default)
+        max_bytes: size target for lossy formats; quality is lowered until it fits
+        page_size_mm: page size in millimetres
+        tile_height_px: band height used at or above TILE_DPI_THRESHOLD
+
+    Returns:
+        str: out_path
+    """
+    fmt = (fmt or os.path.splitext(out_path)[1].lstrip(".") or "png").lower()
+    if max_bytes is not None and fmt not in LOSSY_FORMATS:
+        raise ValueError(f"max_bytes is only supported for lossy formats {LOSSY_FORMATS}, not {fmt!r}")
+
+    out_dir = os.path.dirname(out_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if fmt == "png" and dpi >= TILE_DPI_THRESHOLD:
+        # stream bands straight into the file: peak memory is one band
+        w_px, h_px = page_size_px(dpi, page_size_mm)
+        page = QtCore.QRect(0, 0, w_px, h_px)
+        level = 6 if quality < 0 else max(0, min(9, 9 - quality // 11))
+        writer = _PngStreamWriter(out_path, w_px, h_px, dpi, level=level)
+        try:
+            for top, h in _band_ranges(h_px, tile_height_px):
+                writer.write_band(_render_band(draw, page, dpi, top, h))
+        finally:
+            writer.close()
+        return out_path
+
+    img = render_to_image(draw, dpi=dpi, page_size_mm=page_size_mm, tile_height_px=tile_height_px)
+    if max_bytes is not None:
+        ba = _encode_to_size(img, fmt, max_bytes)
+    else:
+        ba = _encode(img, fmt, quality)
+    with open(out_path, "wb") as f:
+        f.write(bytes(ba))
+    return out_path
+
+
+def export_certificate_image(
+    data: dict,
+    out_path: str,
+    *,
+    dpi: float = 300,
+    fmt: str = None,
+    quality: int = -1,
+    max_bytes: int = None,
+    coords_file: str = "nn_data/coordinates.json",
+    show_template: bool = False,
+    template_path: str = None,
+    offset_x_mm: float = 0.0,
+    offset_y_mm: float = 0.0,
+    debug_grid: bool = False,
+    tile_height_px: int = TILE_HEIGHT_PX,
+) -> str:
+    """
+    Export a certificate as PNG/JPEG using the same layout engine as printing
+
+    Args:
+        data: Dictionary with field data to print
+        out_path: Output image path (.png, .jpg, .jpeg, .webp)
+        dpi: Output resolution; at >= 600 the page is rendered in bands (PNG is
+            streamed to the file; JPEG/WebP still need the whole RGB888 page)
+        fmt: Force an output format instead of using the extension
+        quality: Encoder quality (0-100, -1 for default)
+        max_bytes: Size target in bytes for lossy formats
+        coords_file: Path to coordinates JSON file
+        show_template: Show background template
+        template_path: Path to template image
+        offset_x_mm: X offset in millimeters
+        offset_y_mm: Y offset in millimeters
+        debug_grid: Show grid for calibration
+        tile_height_px: Band height in pixels for banded rendering
+
+    Returns:
+        str: out_path
+    """
+    try:
+        plan = load_layout(coords_file)
+    except FileNotFoundError:
+        raise Exception(f"Coordinates file not found: {coords_file}. Please configure layout first.")
+
+    def draw(painter, page_rect):
+        render_certificate(
+            painter,
+            page_rect,
+            plan,
+            data,
+            show_template=show_template,
+            template_path=template_path,
+            offset_x_mm=offset_x_mm,
+            offset_y_mm=offset_y_mm,
+            debug_grid=debug_grid,
+        )
+
+    return export_raster(draw, out_path, dpi=dpi, fmt=fmt, quality=quality, max_bytes=max_bytes,
+                         page_size_mm=plan.page_size_mm, tile_height_px=tile_height_px)
+
+
+# Example usage
+if __name__ == "__main__":
+    from PyQt5 import QtWidgets
+    import sys, json
+
+    app = QtWidgets.QApplication(sys.argv)
+
+    with open("sample_data.json", "r") as f:
+        sample_data = json.load(f)
+
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+    serial = sample_data.get("SrNo", "0000")
+    for dpi, ext in ((150, "jpg"), (600, "png")):
+        out = os.path.join(output_dir, f"certificate_{serial}_{dpi}dpi.{ext}")
+        try:
+            export_certificate_image(sample_data, out, dpi=dpi, coords_file="nn_data/coordinates.json",
+                                     show_template=True, template_path="nn_data/nn_preprint_blank.png")
+            print(f"✅ Saved {out}")
+        except Exception as e:
+            print(f"❌ Error: {e}")
+    sys.exit(0)
@@ -0,0 +1,222 @@
+# render_cache.py
+"""
+Content-addressed cache of rendered certificate PDFs.
+
+The key is a SHA-256 over everything that affects the output: the mapped
+print data, the compiled layout plan, the offsets, the grid flag and (when
+shown) the template image contents. Reprinting an unchanged record is then a
+file copy instead of a render.
+
+Cached files live in output/cache/<key>.pdf next to an index.json recording
+size and last use; the directory is kept under max_bytes by evicting the least
+recently used entries.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+from render_trace import span
+
+CACHE_DIR = "output/cache"
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+INDEX_NAME = "index.json"
+
+_file_hashes = {}
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file, memoized per (path, size, mtime) so templates are hashed once."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    digest = _file_hashes.get(memo_key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        _file_hashes[memo_key] = digest
+    return digest
+
+
+def render_key(print_data: dict, plan, *, offset_x_mm: float = 0.0, offset_y_mm: float = 0.0,
+               show_template: bool = False, template_path: str = None, debug_grid: bool = False) -> str:
+    """Hash of the inputs of one certificate render."""
+    template = None
+    if show_template and template_path and os.path.exists(template_path):
+        template = file_digest(template_path)
+    payload = {
+        "data": {k: str(v) for k, v in print_data.items()},
+        "layout": plan,
+        "offset": [round(float(offset_x_mm), 3), round(float(offset_y_mm), 3)],
+        "template": template,
+        "grid": bool(debug_grid),
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = None  # key -> {"size": int, "last_used": float}, oldest first
+
+    # ---------- index ----------
+    def _index_path(self):
+        return os.path.join(self.root, INDEX_NAME)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.pdf")
+
+    def _load(self):
+        if self._index is not None:
+            return
+        entries = {}
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        # drop entries whose file went missing
+        entries = {k: v for k, v in entries.items() if os.path.exists(self._path(k))}
+        self._index = OrderedDict(sorted(entries.items(), key=lambda kv: kv[1].get("last_used", 0)))
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path())
+
+    def _evict(self):
+        total = sum(e["size"] for e in self._index.values())
+        while total > self.max_bytes and len(self._index) > 1:
+            key, entry = self._index.popitem(last=False)
+            total -= entry["size"]
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    # ---------- public ----------
+    def get(self, key: str):
+        """Return the cached PDF path for key and mark it recently used, or None."""
+        with self._lock:
+            self._load()
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            path = self._path(key)
+            if not os.path.exists(path):
+                del self._index[key]
+                self._save()
+                return None
+            entry["last_used"] = time.time()
+            self._index.move_to_end(key)
+            self._save()
+            return path
+
+    def put(self, key: str, src_path: str) -> str:
+        """Copy a freshly rendered PDF into the cache and evict down to max_bytes."""
+        with self._lock:
+            self._load()
+            os.makedirs(self.root, exist_ok=True)
+            dst = self._path(key)
+            if os.path.abspath(src_path) != os.path.abspath(dst):
+                tmp = dst + ".tmp"
+                shutil.copyfile(src_path, tmp)
+                os.replace(tmp, dst)
+            self._index[key] = {"size": os.path.getsize(dst), "last_used": time.time()}
+            self._index.move_to_end(key)
+            self._evict()
+            self._save()
+            return dst
+
+    def clear(self):
+        with self._lock:
+            self._load()
+            for key in list(self._index):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._index.clear()
+            self._save()
+
+
+_default_cache = None
+
+
+def default_cache() -> RenderCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RenderCache()
+    return _default_cache
+
+
+def export_certificate_pdf(
+    print_data: dict,
+    out_path: str,
+    *,
+    coords_file: str = "nn_data/coordinates.json",
+    show_template: bool = False,
+    template_path: str = None,
+    offset_x_mm: float = 0.0,
+    offset_y_mm: float = 0.0,
+    debug_grid: bool = False,
+    cache: RenderCache = None,
+):
+    """
+    Write one certificate PDF to out_path, reusing a cached render when the inputs are unchanged.
+
+    Args:
+        print_data: Print-data dict (see field_mapper.map_form_to_print)
+        out_path: Output PDF path
+        coords_file: Path to coordinates JSON file
+        show_template: Include the template background
+        template_path: Path to template image
+        offset_x_mm: X offset in millimeters
+        offset_y_mm: Y offset in millimeters
+        debug_grid: Show grid for calibration
+        cache: RenderCache to use (default: output/cache)
+
+    Returns:
+        tuple: (out_path, hit) where hit is True when no render was needed
+    """
+    from print_layout import load_layout, export_certificates_pdf
+
+    cache = cache or default_cache()
+    plan = load_layout(coords_file)
+    key = render_key(print_data, plan, offset_x_mm=offset_x_mm, offset_y_mm=offset_y_mm,
+                     show_template=show_template, template_path=template_path, debug_grid=debug_grid)
+
+    out_dir = os.path.dirname(out_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    with span("render_cache.lookup", key=key[:12]) as sp:
+        cached = cache.get(key)
+        sp.set(hit=cached is not None)
+    if cached is not None:
+        if os.path.abspath(cached) != os.path.abspath(out_path):
+            shutil.copyfile(cached, out_path)
+        return out_path, True
+
+    export_certificates_pdf(
+        [print_data],
+        out_path,
+        coords_file=coords_file,
+        show_template=show_template,
+        template_path=template_path,
+        offset_x_mm=offset_x_mm,
+        offset_y_mm=offset_y_mm,
+        debug_grid=debug_grid,
+    )
+    cache.put(key, out_path)
+    return out_path, False
@@ -0,0 +1,237 @@
+# render_regression.py
+"""
+Golden-image and timing regression check for the print renderer.
+
+Renders sample_data.json and a set of generated records (including long
+text that wraps and shrinks) through the print pipeline to raster, then
+compares each page with its golden image and each page/field render time
+with the recorded baseline. Run offscreen:
+
+    QT_QPA_PLATFORM=offscreen python render_regression.py --update   # record goldens
+    QT_QPA_PLATFORM=offscreen python render_regression.py            # check
+
+Goldens live in regression/ (one PNG per case plus timings.json); record
+them on the machine that runs the check, since glyph rasterization differs
+between platforms and font versions. On drift a diff image is written to
+output/regression/. Exits with status 1 on visual drift or when a page is
+slower than the baseline by more than --tolerance.
+"""
+from PyQt5 import QtGui, QtWidgets
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+import print_layout
+import render_trace
+from field_mapper import map_form_to_print
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(HERE, "regression")
+DIFF_DIR = os.path.join("output", "regression")
+TIMINGS_FILE = "timings.json"
+
+RENDER_DPI = 100
+PIXEL_TOLERANCE = 48      # per-channel difference treated as anti-aliasing noise
+MAX_DIFF_FRACTION = 0.0005
+TIME_TOLERANCE = 0.25     # allowed page slowdown
+TIME_SLACK_MS = 1.0       # ignore slowdowns smaller than this (timer noise)
+GENERATED_RECORDS = 6
+
+
+def generated_records(count=GENERATED_RECORDS, seed=1447):
+    """Deterministic DB-style records; every third one has oversized text"""
+    rnd = random.Random(seed)
+    names = ["Mohammed", "Yusuf", "Imran", "Abdul", "Anees", "Sohail", "Zubair"]
+    brides = ["Ayesha", "Fatima", "Zainab", "Khadija", "Maryam", "Sumaiya", "Asma"]
+    surnames = ["Al-Farouqi", "Shaikh", "Qureshi", "Ansari", "Khan", "Siddiqui"]
+    places = ["Kurla West, Mumbai 400070", "Andheri East, Mumbai 400059",
+              "Bandra West, Mumbai 400050", "Byculla East, Mumbai 400027"]
+    records = []
+    for i in range(count):
+        place = rnd.choice(places)
+        long = i % 3 == 2
+        address = f"House No. {rnd.randint(1, 200)}, {place}"
+        if long:
+            address = ", ".join([address] + [f"Wing {c}, Sector {rnd.randint(1, 30)}" for c in "ABCDEF"])
+        records.append({
+            "id": i + 1,
+            "serial_no": f"{i + 1:05d}",
+            "reg_no": f"REG-2025-{i + 1:04d}",
+            "masjid_name": "Masjid Ahle Hadees, Kurla",
+            "hijri_date": f"1447-{rnd.randint(1, 12):02d}-{rnd.randint(1, 29):02d}",
+            "eng_date": f"{rnd.randint(1, 28):02d}-Mar-2025",
+            "nikah_time": "After Maghrib",
+            "place_of_nikah": place,
+            "groom_name": f"{rnd.choice(names)} {rnd.choice(surnames)}",
+            "groom_father": f"{rnd.choice(names)} {rnd.choice(surnames)}",
+            "groom_age": rnd.randint(25, 35),
+            "groom_address": address,
+            "bride_name": f"{rnd.choice(brides)} {rnd.choice(surnames)}",
+            "bride_father": f"{rnd.choice(names)} {rnd.choice(surnames)}",
+            "bride_age": rnd.randint(20, 30),
+            "bride_address": address,
+            "wali_name": f"{rnd.choice(names)} {rnd.choice(surnames)}",
+            "wali_age": rnd.randint(45, 60),
+            "wali_father": f"Late {rnd.choice(names)}",
+            "wali_address": address,
+            "witness1_name": f"Yusuf {rnd.choice(surnames)}",
+            "witness1_age": rnd.randint(30, 50),
+            "witness1_address": address if long else place,
+            "witness2_name": "" if i == 0 else f"Imran {rnd.choice(surnames)}",
+            "witness2_age": rnd.randint(30, 45),
+            "witness2_address": place,
+            "mahr_words": "One Lakh Twenty-Five Thousand Indian Rupees only",
+            "mahr_figure": "1,25,000",
+            "qazi_name": "Qazi Abdul Rahman",
+        })
+    return records
+
+
+def load_cases(data_file):
+    cases = {}
+    with open(data_file, "r", encoding="utf-8") as f:
+        cases["sample"] = json.load(f)
+    for rec in generated_records():
+        cases[f"generated_{rec['id']:02d}"] = map_form_to_print(rec)
+    return cases
+
+
+def _page_image(plan, dpi=RENDER_DPI):
+    w_mm, h_mm = plan.page_size_mm
+    img = QtGui.QImage(int(round(w_mm / 25.4 * dpi)), int(round(h_mm / 25.4 * dpi)), QtGui.QImage.Format_RGB32)
+    dpm = int(round(dpi / 0.0254))
+    img.setDotsPerMeterX(dpm)
+    img.setDotsPerMeterY(dpm)
+    return img
+
+
+def render_case(plan, data, repeat):
+    """Render one case repeat times; returns (image, page median ms, {field: median ms})"""
+    spans = []
+    render_trace.enable(spans.append)
+    try:
+        img = None
+        for _ in range(repeat + 1):  # the first run warms the layout caches
+            img = _page_image(plan)
+            painter = QtGui.QPainter(img)
+            try:
+                print_layout.render_certificate(painter, img.rect(), plan, data)
+            finally:
+                painter.end()
+    finally:
+        render_trace.disable()
+
+    pages = [s["ms"] for s in spans if s["name"] == "page.render"][1:]
+    fields = {}
+    for s in spans:
+        if s["name"] == "field":
+            fields.setdefault(s["attrs"]["field"], []).append(s["ms"])
+    # drop the warm-up run from every field
+    field_ms = {k: statistics.median(v[1:] or v) for k, v in fields.items()}
+    return img, statistics.median(pages), field_ms
+
+
+def diff_fraction(img, golden, pixel_tolerance=PIXEL_TOLERANCE):
+    """
+    Fraction of colour channels differing by more than pixel_tolerance,
+    and the difference image. Sizes must match.
+    """
+    diff = golden.convertToFormat(QtGui.QImage.Format_RGB32)
+    painter = QtGui.QPainter(diff)
+    painter.setCompositionMode(QtGui.QPainter.CompositionMode_Difference)
+    painter.drawImage(0, 0, img.convertToFormat(QtGui.QImage.Format_RGB32))
+    painter.end()
+
+    ptr = diff.constBits()
+    ptr.setsize(diff.sizeInBytes())
+    raw = bytes(ptr)
+    # map each byte to 0 (within tolerance) or 1, ignoring the unused alpha byte of RGB32
+    table = bytes(0 if v <= pixel_tolerance else 1 for v in range(256))
+    flags = raw.translate(table)
+    channels = bytearray(flags)
+    del channels[3::4]
+    return channels.count(1) / max(1, len(channels)), diff
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--coords", default=os.path.join(HERE, "coordinates.json"))
+    ap.add_argument("--data", default=os.path.join(HERE, "sample_data.json"))
+    ap.add_argument("--golden-dir", default=GOLDEN_DIR)
+    ap.add_argument("--update", action="store_true", help="record new goldens and timings")
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--max-diff", type=float, default=MAX_DIFF_FRACTION,
+                    help="allowed fraction of differing channels per page")
+    ap.add_argument("--pixel-tolerance", type=int, default=PIXEL_TOLERANCE)
+    ap.add_argument("--tolerance", type=float, default=TIME_TOLERANCE, help="allowed slowdown (0.25 = 25%%)")
+    ap.add_argument("--no-timing", action="store_true", help="only compare images")
+    args = ap.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    plan = print_layout.load_layout(args.coords)
+    cases = load_cases(args.data)
+    timings_path = os.path.join(args.golden_dir, TIMINGS_FILE)
+
+    baseline = {}
+    if not args.update and os.path.exists(timings_path):
+        with open(timings_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    failures = []
+    timings = {}
+    t0 = time.perf_counter()
+    print(f"{'case':<16}{'page ms':>10}{'baseline':>10}{'diff %':>10}  slowest field")
+    for name, data in cases.items():
+        img, page_ms, field_ms = render_case(plan, data, args.repeat)
+        timings[name] = {"page_ms": page_ms, "fields_ms": field_ms}
+        golden_path = os.path.join(args.golden_dir, f"{name}.png")
+
+        diff_txt = "-"
+        if args.update:
+            os.makedirs(args.golden_dir, exist_ok=True)
+            img.save(golden_path, "PNG")
+        elif not os.path.exists(golden_path):
+            failures.append(f"{name}: no golden image (run with --update)")
+        else:
+            golden = QtGui.QImage(golden_path)
+            if golden.size() != img.size():
+                failures.append(f"{name}: size {img.width()}x{img.height()} != golden {golden.width()}x{golden.height()}")
+            else:
+                frac, diff = diff_fraction(img, golden, args.pixel_tolerance)
+                diff_txt = f"{frac * 100:.3f}"
+                if frac > args.max_diff:
+                    os.makedirs(DIFF_DIR, exist_ok=True)
+                    img.save(os.path.join(DIFF_DIR, f"{name}.png"), "PNG")
+                    diff.save(os.path.join(DIFF_DIR, f"{name}_diff.png"), "PNG")
+                    failures.append(f"{name}: {frac * 100:.3f}% of pixels drifted (see {DIFF_DIR})")
+
+        before = baseline.get(name, {}).get("page_ms")
+        slowest = max(field_ms.items(), key=lambda kv: kv[1]) if field_ms else ("-", 0.0)
+        print(f"{name:<16}{page_ms:>10.3f}{(before or 0):>10.3f}{diff_txt:>10}  {slowest[0]} {slowest[1]:.3f} ms")
+
+        if before and not args.no_timing and page_ms > before * (1 + args.tolerance) and page_ms - before > TIME_SLACK_MS:
+            worse = [f"{k} {baseline[name]['fields_ms'].get(k, 0):.2f}->{v:.2f}"
+                     for k, v in field_ms.items()
+                     if v - baseline[name]["fields_ms"].get(k, 0) > TIME_SLACK_MS / 4]
+            failures.append(f"{name}: page {before:.3f} -> {page_ms:.3f} ms" + (f" ({', '.join(worse)})" if worse else ""))
+
+    if args.update:
+        with open(timings_path, "w", encoding="utf-8") as f:
+            json.dump(timings, f, indent=2, sort_keys=True)
+        print(f"Recorded {len(cases)} golden image(s) and timings in {args.golden_dir}")
+        return 0
+
+    print(f"{len(cases)} case(s) in {time.perf_counter() - t0:.1f}s")
+    if failures:
+        print("❌ render regression:\n  " + "\n  ".join(failures))
+        return 1
+    print("✅ renders match the goldens" + ("" if args.no_timing or not baseline else " and timings are within tolerance"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
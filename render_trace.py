@@ -0,0 +1,145 @@
+# render_trace.py
+"""
+Structured timing spans for the render pipeline. Off by default.
+
+Enable with:
+    NIKAHNAMA_TRACE=output/render_trace.jsonl python main.py
+or from code:
+    render_trace.enable("output/render_trace.jsonl")   # JSON lines file
+    render_trace.enable(lambda span: ...)              # callback
+
+Each finished span is a dict:
+    {"name": "field.draw", "ms": 0.41, "start": 1730000000.12,
+     "id": 7, "parent": 3, "thread": "MainThread", "attrs": {"field": "Bride"}}
+
+When tracing is off, span() returns a shared no-op object, so instrumented
+code pays one global lookup per span.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+
+ENV_VAR = "NIKAHNAMA_TRACE"
+
+_sink = None
+_ids = itertools.count(1)
+_local = threading.local()
+
+
+class _FileSink:
+    """Appends spans as JSON lines; safe to share between threads."""
+    def __init__(self, path: str):
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._f = open(path, "a", encoding="utf-8")
+
+    def __call__(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._f.write(line + "\n")
+            self._f.flush()
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "id", "parent", "_t0", "_start")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Attach attributes known only after the span started (e.g. a result size)."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.id = next(_ids)
+        self.parent = stack[-1] if stack else None
+        stack.append(self.id)
+        self._start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self._t0) * 1000.0
+        _local.stack.pop()
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        sink = _sink
+        if sink is not None:
+            try:
+                sink({
+                    "name": self.name,
+                    "ms": round(ms, 3),
+                    "start": self._start,
+                    "id": self.id,
+                    "parent": self.parent,
+                    "thread": threading.current_thread().name,
+                    "attrs": self.attrs,
+                })
+            except Exception:
+                # tracing must never break a print job
+                pass
+        return False
+
+
+def span(name: str, **attrs):
+    """Context manager timing one step of the pipeline."""
+    if _sink is None:
+        return _NULL_SPAN
+    return _Span(name, attrs)
+
+
+def enable(sink):
+    """
+    Start emitting spans.
+
+    Args:
+        sink: path of a JSON lines file, or a callable receiving each span dict
+    """
+    global _sink
+    disable()
+    _sink = _FileSink(sink) if isinstance(sink, str) else sink
+
+
+def disable():
+    global _sink
+    old, _sink = _sink, None
+    if isinstance(old, _FileSink):
+        old.close()
+
+
+def is_enabled() -> bool:
+    return _sink is not None
+
+
+def enable_from_env():
+    """Enable file tracing if NIKAHNAMA_TRACE is set."""
+    path = os.environ.get(ENV_VAR, "").strip()
+    if path:
+        enable(path)
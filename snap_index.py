@@ -0,0 +1,100 @@
+# snap_index.py
+"""
+Alignment snapping for the layout editor.
+
+SnapIndex keeps the edges of every field box in two sorted lists, one for
+vertical lines (left, centre, right) and one for horizontal lines (top,
+baseline, bottom). The editor builds it once when a drag starts, from the
+fields that are not moving; every mouse move is then a few bisect lookups,
+O(log n) however many fields the layout has. When no edge is within reach
+the position falls back to the grid.
+
+Coordinates are whatever the caller uses (the editor passes scene pixels).
+"""
+from bisect import bisect_left
+from collections import namedtuple
+
+# one edge of a field box: where it is, whose it is, which edge
+Edge = namedtuple("Edge", "value field kind")
+
+X_KINDS = ("left", "center", "right")
+Y_KINDS = ("top", "baseline", "bottom")
+
+
+def box_edges(left, top, width, height, baseline):
+    """(x edges, y edges) of a box as {kind: value}; baseline is relative to top"""
+    return ({"left": left, "center": left + width / 2, "right": left + width},
+            {"top": top, "baseline": top + baseline, "bottom": top + height})
+
+
+def snap_to_grid(value: float, step: float) -> float:
+    if step <= 0:
+        return value
+    return round(value / step) * step
+
+
+class SnapIndex:
+    def __init__(self, boxes=None):
+        """boxes: {field id: (left, top, width, height, baseline)}"""
+        xs, ys = [], []
+        for fid, box in (boxes or {}).items():
+            ex, ey = box_edges(*box)
+            xs.extend(Edge(v, fid, k) for k, v in ex.items())
+            ys.extend(Edge(v, fid, k) for k, v in ey.items())
+        self._x = sorted(xs)
+        self._y = sorted(ys)
+        self._xv = [e.value for e in self._x]
+        self._yv = [e.value for e in self._y]
+
+    def __len__(self):
+        return len(self._x) // len(X_KINDS)
+
+    @staticmethod
+    def _nearest(values, edges, value, tolerance):
+        i = bisect_left(values, value)
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(values):
+                d = abs(values[j] - value)
+                if d <= tolerance and (best is None or d < abs(best.value - value)):
+                    best = edges[j]
+        return best
+
+    def nearest_x(self, value: float, tolerance: float):
+        """Closest vertical edge within tolerance, or None"""
+        return self._nearest(self._xv, self._x, value, tolerance)
+
+    def nearest_y(self, value: float, tolerance: float):
+        """Closest horizontal edge within tolerance, or None"""
+        return self._nearest(self._yv, self._y, value, tolerance)
+
+    def snap(self, edges: dict, nearest, tolerance: float):
+        """
+        Best alignment of a moving box's edges on one axis
+
+        Returns:
+            tuple: (offset to add, Edge aligned with) or (0.0, None)
+        """
+        best, best_edge = None, None
+        for value in edges.values():
+            edge = nearest(value, tolerance)
+            if edge is not None and (best is None or abs(edge.value - value) < abs(best)):
+                best, best_edge = edge.value - value, edge
+        return (best, best_edge) if best_edge is not None else (0.0, None)
+
+    def snap_box(self, left, top, width, height, baseline, tolerance, grid=0.0):
+        """
+        Snapped top-left of a box being moved to (left, top)
+
+        Each axis aligns to the nearest field edge within tolerance; otherwise
+        its top-left snaps to the grid (grid <= 0 leaves it free).
+
+        Returns:
+            tuple: (left, top, vertical guide Edge or None, horizontal guide Edge or None)
+        """
+        ex, ey = box_edges(left, top, width, height, baseline)
+        dx, gx = self.snap(ex, self.nearest_x, tolerance)
+        dy, gy = self.snap(ey, self.nearest_y, tolerance)
+        x = left + dx if gx is not None else snap_to_grid(left, grid)
+        y = top + dy if gy is not None else snap_to_grid(top, grid)
+        return x, y, gx, gy
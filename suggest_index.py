@@ -0,0 +1,133 @@
+# suggest_index.py
+"""
+Prefix index of values clerks type again and again: masjid names, places of
+nikah, qazi names and addresses.
+
+Each group keeps its distinct values with how often they were used, under a
+case-folded, whitespace-normalized key in one sorted list. A lookup is a
+bisect to the first key with the typed prefix, a scan of that range and the
+most used values first, so suggestions stay instant with years of records.
+All address fields share one group: a bride's address today is often a
+witness's address tomorrow.
+"""
+from bisect import bisect_left, insort
+import heapq
+
+# form field -> suggestion group
+FIELD_GROUPS = {
+    "masjid_name": "masjid",
+    "place_of_nikah": "place",
+    "qazi_name": "qazi",
+    "groom_address": "address",
+    "bride_address": "address",
+    "wali_address": "address",
+    "witness1_address": "address",
+    "witness2_address": "address",
+}
+MAX_SUGGESTIONS = 10
+
+
+def _key(value: str) -> str:
+    return " ".join(value.split()).casefold()
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._keys = []     # sorted normalized keys
+        self._values = {}   # key -> value as first typed
+        self._counts = {}   # key -> times used
+        self._short = {}    # (prefix key, limit) -> result, for 1-2 letter prefixes that span most keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, value, count: int = 1):
+        value = str(value or "").strip()
+        if not value:
+            return
+        key = _key(value)
+        if key in self._counts:
+            self._counts[key] += count
+        else:
+            insort(self._keys, key)
+            self._values[key] = value
+            self._counts[key] = count
+        self._short.clear()
+
+    def remove(self, value, count: int = 1):
+        """Take back count uses of a value; it is dropped when none are left"""
+        key = _key(str(value or "").strip())
+        if key not in self._counts:
+            return
+        self._counts[key] -= count
+        if self._counts[key] <= 0:
+            del self._counts[key]
+            del self._values[key]
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+        self._short.clear()
+
+    def update(self, pairs):
+        """Add many (value, count) pairs, sorting the keys once"""
+        for value, count in pairs:
+            value = str(value or "").strip()
+            if not value:
+                continue
+            key = _key(value)
+            self._values.setdefault(key, value)
+            self._counts[key] = self._counts.get(key, 0) + count
+        self._keys = sorted(self._counts)
+        self._short.clear()
+
+    def complete(self, prefix: str, limit: int = MAX_SUGGESTIONS):
+        """Values starting with prefix (case-insensitive), most used first"""
+        key = _key(prefix)
+        if not key:
+            return []
+        if prefix[-1:].isspace():
+            key += " "  # "Masjid " should not match "Masjids"
+        short = len(key) <= 2
+        if short and (key, limit) in self._short:
+            return list(self._short[(key, limit)])
+        lo = bisect_left(self._keys, key)
+        hi = bisect_left(self._keys, key + "\uffff", lo)
+        best = heapq.nsmallest(limit, self._keys[lo:hi], key=lambda k: (-self._counts[k], k))
+        result = [self._values[k] for k in best]
+        if short:
+            self._short[(key, limit)] = result
+        return result
+
+    def count(self, value: str) -> int:
+        return self._counts.get(_key(value), 0)
+
+
+class SuggestionIndex:
+    def __init__(self):
+        self.groups = {group: PrefixIndex() for group in set(FIELD_GROUPS.values())}
+
+    @classmethod
+    def from_db(cls):
+        """Index every suggestion column of the database (one GROUP BY per column)"""
+        from database import distinct_values
+        index = cls()
+        for field, group in FIELD_GROUPS.items():
+            index.groups[group].update(distinct_values(field))
+        return index
+
+    def add_record(self, data: dict):
+        """Count the values of a newly inserted record"""
+        for field, group in FIELD_GROUPS.items():
+            self.groups[group].add(data.get(field))
+
+    def replace_record(self, old: dict, new: dict):
+        """Move the counts of an updated record from its old values to its new ones"""
+        for field, group in FIELD_GROUPS.items():
+            before, after = str(old.get(field) or "").strip(), str(new.get(field) or "").strip()
+            if _key(before) != _key(after):
+                self.groups[group].remove(before)
+                self.groups[group].add(after)
+
+    def complete(self, field: str, prefix: str, limit: int = MAX_SUGGESTIONS):
+        group = FIELD_GROUPS.get(field)
+        return self.groups[group].complete(prefix, limit) if group else []
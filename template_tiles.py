@@ -0,0 +1,108 @@
+# template_tiles.py
+"""
+Multi-resolution tile pyramid of a template image.
+
+Level 0 is the image at full resolution; every further level halves it,
+until the whole image fits in one tile. Tiles are TILE_SIZE square PNGs in
+output/tiles/<content hash>/<level>/<col>_<row>.png with a manifest.json
+written last, so a half-built pyramid is never used and an edited template
+(new hash) gets a fresh one. The layout editor only ever loads the few tiles
+of the level that matches its zoom, instead of the whole image.
+
+Building and loading use QImage only and are safe on a worker thread.
+"""
+from PyQt5 import QtCore, QtGui
+import json
+import math
+import os
+
+from render_cache import file_digest
+from render_trace import span
+
+TILE_DIR = "output/tiles"
+TILE_SIZE = 256
+MANIFEST = "manifest.json"
+
+
+class TilePyramid:
+    def __init__(self, root: str, width: int, height: int, levels: list, tile_size: int = TILE_SIZE):
+        self.root = root
+        self.width = width        # level 0 size in pixels
+        self.height = height
+        self.levels = levels      # [(w, h)] per level, level 0 first
+        self.tile_size = tile_size
+
+    @property
+    def top_level(self) -> int:
+        return len(self.levels) - 1
+
+    def tile_path(self, level: int, col: int, row: int) -> str:
+        return os.path.join(self.root, str(level), f"{col}_{row}.png")
+
+    def grid(self, level: int):
+        """(columns, rows) of tiles at a level"""
+        w, h = self.levels[level]
+        return math.ceil(w / self.tile_size), math.ceil(h / self.tile_size)
+
+    def level_for(self, image_px_per_device_px: float) -> int:
+        """Coarsest level that still has at least one image pixel per device pixel"""
+        if image_px_per_device_px <= 1.0:
+            return 0
+        return min(int(math.log2(image_px_per_device_px)), self.top_level)
+
+    def load_tile(self, level: int, col: int, row: int) -> QtGui.QImage:
+        return QtGui.QImage(self.tile_path(level, col, row))
+
+
+def pyramid_root(image_path: str, root: str = TILE_DIR) -> str:
+    return os.path.join(root, file_digest(image_path)[:24])
+
+
+def open_pyramid(image_path: str, root: str = TILE_DIR):
+    """The finished pyramid of an image, or None when it has not been built yet"""
+    base = pyramid_root(image_path, root)
+    try:
+        with open(os.path.join(base, MANIFEST), "r", encoding="utf-8") as f:
+            m = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return TilePyramid(base, m["width"], m["height"], [tuple(l) for l in m["levels"]], m["tile_size"])
+
+
+def build_pyramid(image_path: str, root: str = TILE_DIR, tile_size: int = TILE_SIZE) -> TilePyramid:
+    """Decode the image once and write every level's tiles (skipped when already built)"""
+    existing = open_pyramid(image_path, root)
+    if existing is not None:
+        return existing
+
+    base = pyramid_root(image_path, root)
+    with span("tiles.build", path=image_path) as sp:
+        img = QtGui.QImage(image_path)
+        if img.isNull():
+            raise ValueError(f"Cannot read template image: {image_path}")
+        img = img.convertToFormat(QtGui.QImage.Format_RGB32)
+
+        levels = []
+        level = 0
+        while True:
+            levels.append((img.width(), img.height()))
+            os.makedirs(os.path.join(base, str(level)), exist_ok=True)
+            for row in range(math.ceil(img.height() / tile_size)):
+                for col in range(math.ceil(img.width() / tile_size)):
+                    tile = img.copy(col * tile_size, row * tile_size,
+                                    min(tile_size, img.width() - col * tile_size),
+                                    min(tile_size, img.height() - row * tile_size))
+                    tile.save(os.path.join(base, str(level), f"{col}_{row}.png"), "PNG")
+            if img.width() <= tile_size and img.height() <= tile_size:
+                break
+            img = img.scaled(max(1, img.width() // 2), max(1, img.height() // 2),
+                             QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+            level += 1
+        sp.set(levels=len(levels))
+
+        manifest = {"width": levels[0][0], "height": levels[0][1], "levels": levels, "tile_size": tile_size}
+        tmp = os.path.join(base, MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(base, MANIFEST))
+    return TilePyramid(base, levels[0][0], levels[0][1], levels, tile_size)
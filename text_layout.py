@@ -0,0 +1,142 @@
+# text_layout.py
+"""
+Text layout for certificate fields.
+
+Wraps a field's text to its width, shrinks the font until the text fits the
+field's box, and memoizes the result. Rendering the same record for a preview,
+a PDF and a print measures each field only once.
+
+All sizes are device pixels at the given DPI, so a layout computed for a
+300 DPI image is reused for any other 300 DPI device.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from PyQt5 import QtCore, QtGui
+
+MIN_PT = 6
+PT_STEP = 0.5
+TAB_SPACES = 4
+
+# lines: tuple of (text, width_px); baseline of line i is ascent + i * line_height from the top
+TextLayout = namedtuple("TextLayout", "pt lines ascent line_height width height fits")
+
+_metric_devices = {}
+
+
+def _metrics_device(dpi_x: int, dpi_y: int) -> QtGui.QImage:
+    """1x1 image used only so font metrics are computed at the target DPI."""
+    key = (dpi_x, dpi_y)
+    img = _metric_devices.get(key)
+    if img is None:
+        img = QtGui.QImage(1, 1, QtGui.QImage.Format_RGB32)
+        img.setDotsPerMeterX(int(round(dpi_x / 0.0254)))
+        img.setDotsPerMeterY(int(round(dpi_y / 0.0254)))
+        _metric_devices[key] = img
+    return img
+
+
+def make_font(family: str, pt: float) -> QtGui.QFont:
+    font = QtGui.QFont(family)
+    font.setPointSizeF(pt)
+    return font
+
+
+def _break_word(word: str, metrics: QtGui.QFontMetricsF, max_w: float):
+    """Split a single word that is wider than the box into box-wide pieces."""
+    pieces = []
+    while len(word) > 1 and metrics.horizontalAdvance(word) > max_w:
+        cut = len(word) - 1
+        while cut > 1 and metrics.horizontalAdvance(word[:cut]) > max_w:
+            cut -= 1
+        pieces.append(word[:cut])
+        word = word[cut:]
+    pieces.append(word)
+    return pieces
+
+
+def _wrap(text: str, metrics: QtGui.QFontMetricsF, max_w: float = None):
+    """Greedy word wrap that keeps the explicit newlines of the source text."""
+    lines = []
+    for para in text.split("\n"):
+        if max_w is None or metrics.horizontalAdvance(para) <= max_w:
+            lines.append(para)
+            continue
+        line = ""
+        for word in para.split(" "):
+            candidate = word if not line else line + " " + word
+            if metrics.horizontalAdvance(candidate) <= max_w:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            *full, word = _break_word(word, metrics, max_w)
+            lines.extend(full)
+            line = word
+        lines.append(line)
+    return lines
+
+
+def _layout_at(text: str, family: str, pt: float, max_w, dpi_x: int, dpi_y: int) -> TextLayout:
+    metrics = QtGui.QFontMetricsF(make_font(family, pt), _metrics_device(dpi_x, dpi_y))
+    lines = tuple((line, metrics.horizontalAdvance(line)) for line in _wrap(text, metrics, max_w))
+    line_height = metrics.lineSpacing()
+    height = line_height * (len(lines) - 1) + metrics.height()
+    width = max((w for _, w in lines), default=0.0)
+    return TextLayout(pt, lines, metrics.ascent(), line_height, width, height, True)
+
+
+@lru_cache(maxsize=4096)
+def layout_text(text: str, family: str, pt: float, max_w: float = None, max_h: float = None,
+                dpi_x: int = 96, dpi_y: int = 96, min_pt: float = MIN_PT) -> TextLayout:
+    """
+    Lay out text inside an optional max_w x max_h box (device pixels).
+
+    Text is wrapped to max_w. If max_h is given and the wrapped text is taller,
+    the font is shrunk in PT_STEP steps down to min_pt. The returned layout has
+    fits=False when even min_pt does not fit (the text would clip or overflow).
+
+    Args:
+        text: Text to lay out; explicit newlines are kept
+        family: Font family
+        pt: Preferred font size in points
+        max_w: Box width in device pixels, None for no wrapping
+        max_h: Box height in device pixels, None for no shrinking
+        dpi_x: Horizontal device DPI
+        dpi_y: Vertical device DPI
+        min_pt: Smallest font size to shrink to
+
+    Returns:
+        TextLayout
+    """
+    text = text.replace("\t", " " * TAB_SPACES)
+    lay = _layout_at(text, family, pt, max_w, dpi_x, dpi_y)
+    if max_h is None or lay.height <= max_h:
+        return lay
+
+    size = pt - PT_STEP
+    while size >= min_pt:
+        lay = _layout_at(text, family, size, max_w, dpi_x, dpi_y)
+        if lay.height <= max_h:
+            return lay
+        size -= PT_STEP
+    return lay._replace(fits=False)
+
+
+def draw_layout(painter: QtGui.QPainter, x: float, y: float, lay: TextLayout, family: str,
+                max_w: float = None, align=QtCore.Qt.AlignLeft):
+    """Draw a layout with its first baseline at (x, y) in device pixels."""
+    painter.setFont(make_font(family, lay.pt))
+    for i, (line, w) in enumerate(lay.lines):
+        if not line:
+            continue
+        dx = 0.0
+        if max_w is not None:
+            if align & QtCore.Qt.AlignRight:
+                dx = max_w - w
+            elif align & QtCore.Qt.AlignHCenter:
+                dx = (max_w - w) / 2
+        painter.drawText(QtCore.QPointF(x + dx, y + i * lay.line_height), line)
+
+
+def clear_cache():
+    layout_text.cache_clear()
@@ -0,0 +1,134 @@
+# thumbnail_cache.py
+"""
+Small rendered certificates for the records grid.
+
+A thumbnail is rendered through the same layout engine as a print, at a low
+resolution, then scaled down smoothly; the template is multiplied over the
+text so the pre-printed form shows. Rendered thumbnails are kept on disk in
+output/thumbnails/<id>_<key>.png, where the key covers the record's
+updated_at, the compiled layout and the template, so editing a record (or its
+layout) makes the old file stale; it is replaced on the next render.
+
+Everything here works on QImage only and is safe to call from a worker thread.
+"""
+from PyQt5 import QtCore, QtGui
+from collections import OrderedDict
+import glob
+import hashlib
+import json
+import os
+
+from field_mapper import map_form_to_print
+from layout_profiles import default_registry
+from print_layout import load_template_image, render_certificate
+from render_cache import file_digest
+from render_trace import span
+
+THUMB_DIR = "output/thumbnails"
+THUMB_WIDTH = 64
+RENDER_DPI = 48  # layout resolution before the smooth downscale
+MAX_SCALED_TEMPLATES = 4
+
+_scaled_templates = OrderedDict()  # (path, w, h) -> QImage
+
+
+def thumb_size(page_size_mm=(210, 297), width: int = THUMB_WIDTH) -> QtCore.QSize:
+    w_mm, h_mm = page_size_mm
+    return QtCore.QSize(width, int(round(width * h_mm / w_mm)))
+
+
+def thumbnail_key(record: dict, plan, template_path: str = None, width: int = THUMB_WIDTH) -> str:
+    """Hash of everything a thumbnail depends on"""
+    template = None
+    if template_path and os.path.exists(template_path):
+        template = file_digest(template_path)
+    payload = {
+        "id": record.get("id"),
+        "updated": record.get("updated_at") or record.get("created_at") or "",
+        "layout": plan,
+        "template": template,
+        "width": width,
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _scaled_template(path: str, size: QtCore.QSize):
+    key = (path, size.width(), size.height())
+    img = _scaled_templates.get(key)
+    if img is None:
+        src = load_template_image(path)
+        if src is None:
+            return None
+        img = src.convertToFormat(QtGui.QImage.Format_RGB32).scaled(
+            size, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+        _scaled_templates[key] = img
+        while len(_scaled_templates) > MAX_SCALED_TEMPLATES:
+            _scaled_templates.popitem(last=False)
+    else:
+        _scaled_templates.move_to_end(key)
+    return img
+
+
+def render_thumbnail(print_data: dict, plan, template_path: str = None, width: int = THUMB_WIDTH) -> QtGui.QImage:
+    """Render one certificate as a width-pixel-wide image"""
+    w_mm, h_mm = plan.page_size_mm
+    img = QtGui.QImage(int(round(w_mm / 25.4 * RENDER_DPI)), int(round(h_mm / 25.4 * RENDER_DPI)),
+                       QtGui.QImage.Format_RGB32)
+    dpm = int(round(RENDER_DPI / 0.0254))
+    img.setDotsPerMeterX(dpm)
+    img.setDotsPerMeterY(dpm)
+
+    painter = QtGui.QPainter(img)
+    try:
+        painter.setRenderHint(QtGui.QPainter.TextAntialiasing)
+        render_certificate(painter, img.rect(), plan, print_data)
+        template = _scaled_template(template_path, img.size()) if template_path else None
+        if template is not None:
+            # white paper keeps the text, printed lines of the form darken it
+            painter.setCompositionMode(QtGui.QPainter.CompositionMode_Multiply)
+            painter.drawImage(0, 0, template)
+    finally:
+        painter.end()
+    return img.scaled(thumb_size(plan.page_size_mm, width), QtCore.Qt.KeepAspectRatio,
+                      QtCore.Qt.SmoothTransformation)
+
+
+class ThumbnailStore:
+    """On-disk thumbnail cache for DB records"""
+    def __init__(self, root: str = THUMB_DIR, *, layouts=None, template_path: str = None,
+                 width: int = THUMB_WIDTH):
+        self.root = root
+        self.layouts = layouts or default_registry()
+        self.template_path = template_path
+        self.width = width
+
+    def _path(self, rec_id, key: str) -> str:
+        return os.path.join(self.root, f"{rec_id}_{key[:16]}.png")
+
+    def load_or_render(self, record: dict) -> QtGui.QImage:
+        """Thumbnail of a DB record, from disk when still current, rendered otherwise"""
+        profile, plan = self.layouts.layout_for(record)
+        template_path = profile.template_path or self.template_path
+        rec_id = record.get("id", "")
+        key = thumbnail_key(record, plan, template_path, self.width)
+        path = self._path(rec_id, key)
+
+        img = QtGui.QImage(path)
+        if not img.isNull():
+            return img
+
+        with span("thumbnail.render", record=rec_id):
+            img = render_thumbnail(map_form_to_print(record), plan, template_path, self.width)
+
+        os.makedirs(self.root, exist_ok=True)
+        for stale in glob.glob(os.path.join(glob.escape(self.root), f"{glob.escape(str(rec_id))}_*.png")):
+            if stale != path:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+        tmp = path + ".tmp"
+        if img.save(tmp, "PNG"):
+            os.replace(tmp, path)
+        return img
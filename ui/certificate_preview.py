@@ -0,0 +1,201 @@
+# ui/certificate_preview.py
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from field_mapper import FORM_FIELD_DEPENDENTS, map_form_to_print
+from print_layout import load_layout, load_template_image, bind_fields, place_field
+from text_layout import draw_layout
+
+DEBOUNCE_MS = 40
+
+
+class CertificatePreview(QtWidgets.QWidget):
+    """
+    Live preview of the certificate for the record in a NikahForm.
+
+    The template is scaled once per widget size and kept as a pixmap. Every
+    print field is rendered into its own small pixmap; when a form field
+    changes, only the print fields built from it are laid out and rendered
+    again, after a short debounce. paintEvent only blits cached pixmaps.
+    """
+    def __init__(self, form, coords_file="nn_data/coordinates.json", template_path=None, layouts=None, parent=None):
+        super().__init__(parent)
+        self.form = form
+        self.coords_file = coords_file
+        self.template_path = template_path
+        self.layouts = layouts  # LayoutRegistry: follow the profile of the form's masjid
+        self._default_template_path = template_path
+        self.setMinimumSize(220, 300)
+        self.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+
+        self._plan = None
+        self._plan_fields = {}  # print key -> FieldPlan
+        self._page_rect = QtCore.QRect()
+        self._background = None
+        self._values = {}      # print key -> text currently rendered
+        self._fields = {}      # print key -> (QPoint, QPixmap)
+        self._dirty = set()    # form keys edited since the last refresh
+        self._full_refresh = True
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_MS)
+        self._timer.timeout.connect(self._refresh)
+
+        self.form.field_changed.connect(self._on_field_changed)
+        self.form.data_loaded.connect(self._on_data_loaded)
+
+    # ---------- public ----------
+    def set_template_path(self, path):
+        self._default_template_path = path
+        if path != self.template_path:
+            self.template_path = path
+            self._background = None
+            self.update()
+
+    def invalidate(self):
+        """Re-render every field (layout file or page size changed)."""
+        self._full_refresh = True
+        self._timer.start()
+
+    # ---------- change tracking ----------
+    def _on_field_changed(self, key):
+        self._dirty.add(key)
+        if self.isVisible():
+            self._timer.start()
+
+    def _on_data_loaded(self):
+        # a whole record was loaded; unchanged fields are still skipped in _refresh
+        self._dirty.update(FORM_FIELD_DEPENDENTS)
+        if self.isVisible():
+            self._timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._timer.start()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._page_rect = self._fit_page()
+        self._background = None
+        self.invalidate()
+
+    def _apply_profile(self, masjid_name):
+        profile = self.layouts.for_masjid(masjid_name)
+        template = profile.template_path or self._default_template_path
+        if template != self.template_path:
+            self.template_path = template
+            self._background = None
+            self.update()
+        self.coords_file = profile.coords_file
+
+    def _load_plan(self):
+        """Pick up a new compiled layout when coordinates.json changed on disk."""
+        try:
+            plan = load_layout(self.coords_file)
+        except (OSError, ValueError):
+            plan = None
+        if plan is not self._plan:
+            self._plan = plan
+            self._plan_fields = {f.key: f for f in plan.fields} if plan else {}
+            return True
+        return False
+
+    def _fit_page(self):
+        w_mm, h_mm = self._plan.page_size_mm if self._plan else (210, 297)
+        avail = self.rect().adjusted(6, 6, -6, -6)
+        scale = min(avail.width() / w_mm, avail.height() / h_mm)
+        w, h = int(w_mm * scale), int(h_mm * scale)
+        return QtCore.QRect(avail.x() + (avail.width() - w) // 2, avail.y() + (avail.height() - h) // 2, w, h)
+
+    def _dpi(self):
+        w_mm = self._plan.page_size_mm[0] if self._plan else 210
+        return max(1, int(round(self._page_rect.width() / w_mm * 25.4)))
+
+    # ---------- rendering ----------
+    def _refresh(self):
+        form_data = self.form.get_data()
+        if self.layouts is not None:
+            self._apply_profile(form_data.get("masjid_name", ""))
+        if self._load_plan():
+            self._page_rect = self._fit_page()
+            self._full_refresh = True
+        if self._plan is None or self._page_rect.isEmpty():
+            self._dirty.clear()
+            self.update()
+            return
+
+        data = map_form_to_print(form_data)
+        if self._full_refresh:
+            keys = set(self._plan_fields)
+            self._values.clear()
+            self._fields.clear()
+        else:
+            keys = set()
+            for form_key in self._dirty:
+                keys |= FORM_FIELD_DEPENDENTS.get(form_key, set())
+        self._dirty.clear()
+        self._full_refresh = False
+
+        bound = dict(bind_fields(self._plan, {k: data.get(k, "") for k in keys}))
+        changed = False
+        for key in keys:
+            field = self._plan_fields.get(key)
+            if field is None:
+                continue
+            text = bound.get(field, "")
+            if key in self._values and self._values[key] == text:
+                continue
+            self._values[key] = text
+            self._fields[key] = self._render_field(field, text) if text else None
+            changed = True
+        if changed:
+            self.update()
+
+    def _render_field(self, field, text):
+        dpi = self._dpi()
+        family = self._plan.font_family
+        x, y, max_w, lay = place_field(field, text, family, dpi, dpi)
+
+        w = int(max(lay.width, max_w or 0)) + 2
+        h = int(lay.height) + 2
+        img = QtGui.QImage(max(w, 1), max(h, 1), QtGui.QImage.Format_ARGB32_Premultiplied)
+        dpm = int(round(dpi / 0.0254))
+        img.setDotsPerMeterX(dpm)
+        img.setDotsPerMeterY(dpm)
+        img.fill(QtCore.Qt.transparent)
+        p = QtGui.QPainter(img)
+        p.setRenderHint(QtGui.QPainter.TextAntialiasing)
+        p.setPen(QtCore.Qt.black)
+        draw_layout(p, 0, lay.ascent, lay, family, max_w=max_w)
+        p.end()
+
+        # the layout's first baseline sits on (x_mm, y_mm)
+        pos = QtCore.QPoint(x, int(y - lay.ascent))
+        return pos, QtGui.QPixmap.fromImage(img)
+
+    def _background_pixmap(self):
+        if self._background is None and not self._page_rect.isEmpty():
+            pm = QtGui.QPixmap(self._page_rect.size())
+            pm.fill(QtCore.Qt.white)
+            img = load_template_image(self.template_path)
+            if img is not None:
+                p = QtGui.QPainter(pm)
+                p.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+                p.drawImage(pm.rect(), img)
+                p.end()
+            self._background = pm
+        return self._background
+
+    def paintEvent(self, event):
+        p = QtGui.QPainter(self)
+        p.fillRect(self.rect(), self.palette().window())
+        if self._page_rect.isEmpty():
+            return
+        p.drawPixmap(self._page_rect.topLeft(), self._background_pixmap())
+        p.translate(self._page_rect.topLeft())
+        for item in self._fields.values():
+            if item is not None:
+                pos, pm = item
+                p.drawPixmap(pos, pm)
+        p.setPen(QtGui.QColor(160, 160, 160))
+        p.drawRect(QtCore.QRect(QtCore.QPoint(0, 0), self._page_rect.size()).adjusted(0, 0, -1, -1))
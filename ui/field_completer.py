@@ -0,0 +1,81 @@
+# ui/field_completer.py
+from PyQt5 import QtCore, QtGui, QtWidgets
+import logging
+
+from suggest_index import MAX_SUGGESTIONS, SuggestionIndex
+
+log = logging.getLogger(__name__)
+
+
+class SuggestionIndexBuilder(QtCore.QThread):
+    """Builds the suggestion index from the database off the GUI thread."""
+    ready = QtCore.pyqtSignal(object)  # SuggestionIndex
+
+    def run(self):
+        try:
+            index = SuggestionIndex.from_db()
+        except Exception:
+            log.exception("Building the suggestion index failed")
+            return
+        self.ready.emit(index)
+
+
+class FieldCompleter(QtCore.QObject):
+    """
+    Suggestion popup for one form field, fed from a SuggestionIndex as the
+    clerk types. Works for QLineEdit and for the multi-line QPlainTextEdit
+    address fields (which QCompleter does not support directly); choosing a
+    suggestion replaces the field's text.
+    """
+    def __init__(self, widget, field, index=None, parent=None):
+        super().__init__(parent or widget)
+        self.widget = widget
+        self.field = field
+        self.index = index
+        self._inserting = False
+        self._model = QtCore.QStringListModel(self)
+        self.completer = QtWidgets.QCompleter(self._model, self)
+        self.completer.setWidget(widget)
+        self.completer.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        self.completer.setMaxVisibleItems(MAX_SUGGESTIONS)
+        self.completer.activated[str].connect(self._insert)
+        if isinstance(widget, QtWidgets.QLineEdit):
+            widget.textEdited.connect(self._update)  # user edits only, not setText()
+        else:
+            widget.textChanged.connect(self._update)
+
+    def _text(self):
+        if isinstance(self.widget, QtWidgets.QLineEdit):
+            return self.widget.text()
+        return self.widget.toPlainText()
+
+    def _update(self, *_):
+        popup = self.completer.popup()
+        # set_data()/clear() also change a QPlainTextEdit; only typing suggests
+        if self._inserting or self.index is None or not self.widget.hasFocus():
+            popup.hide()
+            return
+        text = self._text()
+        values = self.index.complete(self.field, text)
+        if not values or values == [text]:
+            popup.hide()
+            return
+        self._model.setStringList(values)
+        if isinstance(self.widget, QtWidgets.QLineEdit):
+            self.completer.complete()
+        else:
+            rect = self.widget.cursorRect()
+            rect.setWidth(self.widget.viewport().width())
+            self.completer.complete(rect)
+        popup.setCurrentIndex(QtCore.QModelIndex())
+
+    def _insert(self, value):
+        self._inserting = True
+        try:
+            if isinstance(self.widget, QtWidgets.QLineEdit):
+                self.widget.setText(value)
+            else:
+                self.widget.setPlainText(value)
+                self.widget.moveCursor(QtGui.QTextCursor.End)
+        finally:
+            self._inserting = False
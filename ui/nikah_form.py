@@ -1,6 +1,9 @@
 # ui/nikah_form.py
 from PyQt5 import QtCore, QtWidgets
-import re
+from contextlib import contextmanager
+
+from hijri_calendar import format_hijri, parse_hijri, to_gregorian, to_hijri
+from number_words import amount_to_words_indian
 
 class NikahForm(QtWidgets.QWidget):
     """
@@ -8,9 +11,19 @@ class NikahForm(QtWidgets.QWidget):
     - Small inputs arranged side-by-side (max 3 per row) within each column.
     - Address/long fields stay full-width (within their column).
     - Public API unchanged: get_data(), set_data(dict), clear()
+    - field_changed(key) is emitted whenever a registered field is edited
+    - data_loaded is emitted once after set_data()/clear(), which load without
+      per-field signals (no field_changed, no mahr auto-fill)
+    - eng_date fills in an empty hijri_date; a complete Hijri date sets eng_date
+    - this also holds after set_data()/clear(): an empty hijri_date is filled from
+      eng_date, so a loaded record without a Hijri date gets the derived one if saved
     """
+    field_changed = QtCore.pyqtSignal(str)
+    data_loaded = QtCore.pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._completers = {}  # field key -> FieldCompleter, see set_suggestions()
         self._build()
 
     # ---------- UI BUILD ----------
@@ -87,6 +100,9 @@ class NikahForm(QtWidgets.QWidget):
         # self.qazi_certificate = QtWidgets.QLineEdit()
 
         self.mahr_figure.textChanged.connect(self._auto_fill_mahr_words)
+        self._hijri_auto = ""  # hijri_date text last filled in from eng_date
+        self.eng_date.dateChanged.connect(self._auto_fill_hijri_date)
+        self.hijri_date.textEdited.connect(self._auto_fill_eng_date)
 
         # ---------- Registry for data I/O ----------
         self._fields = [
@@ -132,6 +148,10 @@ class NikahForm(QtWidgets.QWidget):
             # ("qazi_certificate", "Qazi Certificate/Seal Text", self.qazi_certificate),
         ]
 
+        self._connect_change_signals()
+        self._compile_accessors()
+        self._fill_empty_hijri_date()
+
         # ---------- Build two-column layout ----------
         # LEFT column: Header, Event, Groom, Bride
         g = self._section("", side="left")
@@ -188,6 +208,22 @@ class NikahForm(QtWidgets.QWidget):
         self.right_vbox.addStretch(1)
         self.vbox.addLayout(cols_hbox)
 
+    def _connect_change_signals(self):
+        for key, _, w in self._fields:
+            if isinstance(w, (QtWidgets.QLineEdit, QtWidgets.QPlainTextEdit)):
+                sig = w.textChanged
+            elif isinstance(w, QtWidgets.QSpinBox):
+                sig = w.valueChanged
+            elif isinstance(w, QtWidgets.QComboBox):
+                sig = w.currentTextChanged
+            elif isinstance(w, QtWidgets.QDateEdit):
+                sig = w.dateChanged
+            elif isinstance(w, QtWidgets.QTimeEdit):
+                sig = w.timeChanged
+            else:
+                continue
+            sig.connect(lambda *_, k=key: self.field_changed.emit(k))
+
     # ---------- helpers to build grid rows ----------
     def _section(self, title: str, side: str = "left") -> QtWidgets.QGridLayout:
         """
@@ -252,156 +288,124 @@ class NikahForm(QtWidgets.QWidget):
         words = amount_to_words_indian(text)
         self.mahr_words.setText(words)
 
+    def _auto_fill_hijri_date(self, qdate):
+        # only fill an empty Hijri date or one we filled; a typed one may follow local sighting
+        current = self.hijri_date.text().strip()
+        if current and current != self._hijri_auto:
+            return
+        try:
+            text = format_hijri(to_hijri(qdate.toPyDate()))
+        except ValueError:
+            return
+        self._hijri_auto = text
+        self.hijri_date.setText(text)
+
+    def _fill_empty_hijri_date(self):
+        # after a bulk load, whose blocked signals skipped the auto-fill
+        self._hijri_auto = ""
+        if not self.hijri_date.text().strip():
+            self._auto_fill_hijri_date(self.eng_date.date())
+
+    def _auto_fill_eng_date(self, text: str):
+        hijri = parse_hijri(text)
+        if hijri is None:
+            return
+        self._hijri_auto = ""
+        self.eng_date.blockSignals(True)  # dateChanged would refill the Hijri date being typed
+        self.eng_date.setDate(to_gregorian(*hijri))
+        self.eng_date.blockSignals(False)
+        self.field_changed.emit("eng_date")
+
+    def set_suggestions(self, index):
+        """Offer values from a SuggestionIndex on the masjid, place, qazi and address fields."""
+        from suggest_index import FIELD_GROUPS
+        from ui.field_completer import FieldCompleter
+        if not self._completers:
+            self._completers = {key: FieldCompleter(w, key, parent=self)
+                                for key, _, w in self._fields if key in FIELD_GROUPS}
+        for completer in self._completers.values():
+            completer.index = index
+
     # ---------- Public helpers ----------
     def get_data(self) -> dict:
-        d = {}
-        for key, _, w in self._fields:
-            if isinstance(w, QtWidgets.QLineEdit):
-                d[key] = w.text().strip()
-            elif isinstance(w, QtWidgets.QPlainTextEdit):
-                d[key] = w.toPlainText().strip()
-            elif isinstance(w, QtWidgets.QSpinBox):
-                d[key] = w.value()
-            elif isinstance(w, QtWidgets.QComboBox):
-                d[key] = w.currentText()
-            elif isinstance(w, QtWidgets.QDateEdit):
-                d[key] = w.date().toString("yyyy-MM-dd")
-            elif isinstance(w, QtWidgets.QTimeEdit):
-                d[key] = w.time().toString("HH:mm")
-        return d
+        return {key: get() for key, _, get, _, _ in self._accessors}
 
     def set_data(self, data: dict):
-        for key, _, w in self._fields:
-            val = data.get(key, "")
-            if isinstance(w, QtWidgets.QLineEdit):
-                w.setText("" if val is None else str(val))
-            elif isinstance(w, QtWidgets.QPlainTextEdit):
-                w.setPlainText("" if val is None else str(val))
-            elif isinstance(w, QtWidgets.QSpinBox):
-                try:
-                    w.setValue(int(val) if val not in (None, "") else 0)
-                except Exception:
-                    w.setValue(0)
-            elif isinstance(w, QtWidgets.QComboBox):
-                idx = w.findText("" if val is None else str(val))
-                w.setCurrentIndex(idx if idx >= 0 else 0)
-            elif isinstance(w, QtWidgets.QDateEdit):
-                d = QtCore.QDate.fromString(str(val), "yyyy-MM-dd")
-                if not d.isValid():
-                    d = QtCore.QDate.currentDate()
-                w.setDate(d)
-            elif isinstance(w, QtWidgets.QTimeEdit):
-                t = QtCore.QTime.fromString(str(val), "HH:mm")
-                if not t.isValid():
-                    t = QtCore.QTime.currentTime()
-                w.setTime(t)
+        """Load a record in one pass; change handlers stay quiet, data_loaded fires once."""
+        with self._signals_blocked():
+            for key, _, _, put, _ in self._accessors:
+                put(data.get(key, ""))
+            self._fill_empty_hijri_date()
+        self.data_loaded.emit()
 
     def clear(self):
-        for _, _, w in self._fields:
+        with self._signals_blocked():
+            for _, _, _, _, reset in self._accessors:
+                reset()
+            self._fill_empty_hijri_date()
+        self.data_loaded.emit()
+        # self.groom_age.setValue(25)
+        # self.bride_age.setValue(23)
+
+    # ---------- field accessors ----------
+    @contextmanager
+    def _signals_blocked(self):
+        widgets = [w for _, w, _, _, _ in self._accessors]
+        for w in widgets:
+            w.blockSignals(True)
+        try:
+            yield
+        finally:
+            for w in widgets:
+                w.blockSignals(False)
+
+    def _compile_accessors(self):
+        """(key, widget, get, set, clear) per field, picked once by widget type"""
+        self._accessors = []
+        for key, _, w in self._fields:
             if isinstance(w, QtWidgets.QLineEdit):
-                w.clear()
+                acc = (lambda w=w: w.text().strip(),
+                       lambda val, w=w: w.setText(_text(val)),
+                       w.clear)
             elif isinstance(w, QtWidgets.QPlainTextEdit):
-                w.clear()
+                acc = (lambda w=w: w.toPlainText().strip(),
+                       lambda val, w=w: w.setPlainText(_text(val)),
+                       w.clear)
             elif isinstance(w, QtWidgets.QSpinBox):
-                w.setValue(0)
+                acc = (w.value,
+                       lambda val, w=w: w.setValue(_int(val)),
+                       lambda w=w: w.setValue(0))
             elif isinstance(w, QtWidgets.QComboBox):
-                w.setCurrentIndex(0)
+                acc = (w.currentText,
+                       lambda val, w=w: w.setCurrentIndex(max(w.findText(_text(val)), 0)),
+                       lambda w=w: w.setCurrentIndex(0))
             elif isinstance(w, QtWidgets.QDateEdit):
-                w.setDate(QtCore.QDate.currentDate())
+                acc = (lambda w=w: w.date().toString("yyyy-MM-dd"),
+                       lambda val, w=w: w.setDate(_date(val)),
+                       lambda w=w: w.setDate(QtCore.QDate.currentDate()))
             elif isinstance(w, QtWidgets.QTimeEdit):
-                w.setTime(QtCore.QTime.currentTime())
-        # self.groom_age.setValue(25)
-        # self.bride_age.setValue(23)
+                acc = (lambda w=w: w.time().toString("HH:mm"),
+                       lambda val, w=w: w.setTime(_time(val)),
+                       lambda w=w: w.setTime(QtCore.QTime.currentTime()))
+            else:
+                continue
+            self._accessors.append((key, w) + acc)
 
-# ---------- Amount-to-words (Indian numbering system) ----------
-NUMS_1_TO_19 = [
-    "", "One", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine",
-    "Ten", "Eleven", "Twelve", "Thirteen", "Fourteen", "Fifteen",
-    "Sixteen", "Seventeen", "Eighteen", "Nineteen"
-]
-TENS = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"]
-
-def _words_below_100(n: int) -> str:
-    if n < 20:
-        return NUMS_1_TO_19[n]
-    return (TENS[n // 10] + (" " + NUMS_1_TO_19[n % 10] if n % 10 != 0 else "")).strip()
-
-def _words_below_1000(n: int) -> str:
-    if n == 0:
-        return ""
-    h, r = divmod(n, 100)
-    parts = []
-    if h:
-        parts.append(NUMS_1_TO_19[h] + " Hundred")
-    if r:
-        parts.append(_words_below_100(r))
-    return " ".join(parts).strip()
-
-def _rupees_to_words_indian(n: int) -> str:
-    """Indian grouping: Crore, Lakh, Thousand, Hundred."""
-    if n == 0:
-        return "Zero Rupees"
-    parts = []
-    crore, n = divmod(n, 10_000_000)
-    lakh,  n = divmod(n, 100_000)
-    thousand, n = divmod(n, 1000)
-    hundred_block = n  # 0..999
-
-    if crore:
-        parts.append(_words_below_100(crore) + " Crore")
-    if lakh:
-        parts.append(_words_below_100(lakh) + " Lakh")
-    if thousand:
-        parts.append(_words_below_100(thousand) + " Thousand")
-    if hundred_block:
-        parts.append(_words_below_1000(hundred_block))
-
-    return (" ".join(parts).strip() + " Rupees").strip()
-
-def amount_to_words_indian(s: str) -> str:
-    """
-    Convert figure like "125000.50" -> "One Lakh Twenty Five Thousand Rupees and Fifty Paise Only"
-    Handles commas and currency symbols; empty or invalid -> "".
-    """
-    if not s or not str(s).strip():
-        return ""
-    # keep digits and a single dot for paise
-    cleaned = re.sub(r"[^0-9.]", "", str(s))
-    if cleaned.count(".") > 1:
-        # too many dots -> invalid
-        return ""
-
-    rupees_part, paise_part = cleaned, ""
-    if "." in cleaned:
-        rupees_part, paise_part = cleaned.split(".", 1)
-        paise_part = (paise_part + "00")[:2]  # at most 2 digits
-
-    if rupees_part == "":
-        rupees = 0
-    else:
-        try:
-            rupees = int(rupees_part)
-        except ValueError:
-            return ""
 
-    words = _rupees_to_words_indian(rupees)
+# ---------- value conversion for set_data ----------
+def _text(val) -> str:
+    return "" if val is None else str(val)
 
-    # add paise if present and non-zero
-    if paise_part and paise_part != "00":
-        try:
-            p = int(paise_part)
-        except ValueError:
-            p = 0
-        if p:
-            paise_words = _words_below_100(p)
-            if words:
-                words = f"{words} and {paise_words} Paise"
-            else:
-                words = f"{paise_words} Paise"
-
-    if not words:
-        return ""
-    # finalize
-    if not words.lower().endswith("only"):
-        words = words + " Only"
-    return words
+def _int(val) -> int:
+    try:
+        return int(val) if val not in (None, "") else 0
+    except Exception:
+        return 0
+
+def _date(val) -> QtCore.QDate:
+    d = QtCore.QDate.fromString(str(val), "yyyy-MM-dd")
+    return d if d.isValid() else QtCore.QDate.currentDate()
+
+def _time(val) -> QtCore.QTime:
+    t = QtCore.QTime.fromString(str(val), "HH:mm")
+    return t if t.isValid() else QtCore.QTime.currentTime()
@@ -0,0 +1,97 @@
+# ui/print_queue_view.py
+from PyQt5 import QtCore, QtWidgets
+import time
+
+from print_queue import FAILED, CANCELLED, QUEUED, RETRYING
+
+COLUMNS = ["#", "Certificate", "Destination", "Status", "Attempts", "Submitted", "Error"]
+
+
+class PrintQueueView(QtWidgets.QDialog):
+    """
+    Non-modal window listing print jobs with their live status.
+    Queued jobs can be cancelled; failed or cancelled jobs can be retried.
+    """
+    def __init__(self, print_queue, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Print Queue")
+        self.resize(820, 320)
+        self.queue = print_queue
+        self._rows = {}  # job id -> row
+
+        vbox = QtWidgets.QVBoxLayout(self)
+        self.table = QtWidgets.QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        vbox.addWidget(self.table)
+
+        btn_row = QtWidgets.QHBoxLayout()
+        self.btn_cancel = QtWidgets.QPushButton("Cancel")
+        self.btn_retry = QtWidgets.QPushButton("Retry")
+        self.btn_clear = QtWidgets.QPushButton("Clear Finished")
+        btn_row.addWidget(self.btn_cancel)
+        btn_row.addWidget(self.btn_retry)
+        btn_row.addStretch(1)
+        btn_row.addWidget(self.btn_clear)
+        vbox.addLayout(btn_row)
+
+        self.btn_cancel.clicked.connect(self._cancel_selected)
+        self.btn_retry.clicked.connect(self._retry_selected)
+        self.btn_clear.clicked.connect(self.queue.clear_finished)
+        self.table.itemSelectionChanged.connect(self._update_buttons)
+        self.queue.job_added.connect(self._refresh)
+        self.queue.job_changed.connect(self._refresh)
+
+        self._refresh()
+
+    def _refresh(self, *_):
+        jobs = sorted(self.queue.jobs.values(), key=lambda j: j.id, reverse=True)
+        selected = self._selected_ids()
+        self.table.setRowCount(len(jobs))
+        self._rows.clear()
+        for r, job in enumerate(jobs):
+            values = [
+                str(job.id), job.title, job.destination, job.status, str(job.attempts),
+                time.strftime("%H:%M:%S", time.localtime(job.created)), job.error,
+            ]
+            for c, val in enumerate(values):
+                item = self.table.item(r, c)
+                if item is None:
+                    item = QtWidgets.QTableWidgetItem()
+                    self.table.setItem(r, c, item)
+                item.setText(val)
+            self.table.item(r, 0).setData(QtCore.Qt.UserRole, job.id)
+            self._rows[job.id] = r
+        # keep the selection on the same jobs across refreshes
+        self.table.clearSelection()
+        for job_id in selected:
+            if job_id in self._rows:
+                self.table.selectRow(self._rows[job_id])
+        self._update_buttons()
+
+    def _selected_ids(self):
+        ids = []
+        for index in self.table.selectionModel().selectedRows():
+            item = self.table.item(index.row(), 0)
+            if item is not None:
+                ids.append(item.data(QtCore.Qt.UserRole))
+        return ids
+
+    def _selected_jobs(self):
+        return [self.queue.jobs[i] for i in self._selected_ids() if i in self.queue.jobs]
+
+    def _update_buttons(self):
+        jobs = self._selected_jobs()
+        self.btn_cancel.setEnabled(any(j.status in (QUEUED, RETRYING) for j in jobs))
+        self.btn_retry.setEnabled(any(j.status in (FAILED, CANCELLED) for j in jobs))
+
+    def _cancel_selected(self):
+        for job in self._selected_jobs():
+            self.queue.cancel(job.id)
+
+    def _retry_selected(self):
+        for job in self._selected_jobs():
+            self.queue.retry(job.id)
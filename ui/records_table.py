@@ -1,8 +1,59 @@
 # ui/records_table.py
-from PyQt5 import QtCore, QtWidgets
+from PyQt5 import QtCore, QtGui, QtWidgets
+from collections import OrderedDict
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+THUMB_HEADER = "Preview"
+MAX_THUMB_PIXMAPS = 256   # in-memory pixmaps; evicted rows fall back to the disk cache
+THUMB_PREFETCH_ROWS = 5   # rows below the viewport requested ahead of scrolling
+THUMB_DEBOUNCE_MS = 30
+
+
+class _ThumbnailWorker(QtCore.QThread):
+    """Loads or renders thumbnails off the GUI thread, most recently requested rows first."""
+    ready = QtCore.pyqtSignal(object, QtGui.QImage)  # stamp, image
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._cond = threading.Condition()
+        self._pending = []  # (stamp, record)
+        self._stop = False
+
+    def request(self, items):
+        """Replace the outstanding requests; rows scrolled out of view are dropped."""
+        with self._cond:
+            self._pending = list(items)
+            self._cond.notify()
+
+    def stop(self, wait_ms=3000):
+        with self._cond:
+            self._stop = True
+            self._pending = []
+            self._cond.notify()
+        self.wait(wait_ms)
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                stamp, record = self._pending.pop(0)
+            try:
+                img = self.store.load_or_render(record)
+            except Exception:
+                log.exception(f"Thumbnail for record {record.get('id')} failed")
+                continue
+            self.ready.emit(stamp, img)
+
 
 class RecordsTable(QtWidgets.QTableWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, thumbnail_store=None):
         super().__init__(parent)
         self.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
@@ -11,18 +62,50 @@ class RecordsTable(QtWidgets.QTableWidget):
         self.horizontalHeader().setStretchLastSection(True)
         self.setMinimumHeight(200)
 
+        # thumbnails: optional last column, filled lazily for visible rows
+        self._thumb_store = thumbnail_store
+        self._thumb_worker = None
+        self._thumb_col = -1
+        self._thumb_moved = False
+        self._records = []
+        self._row_for_id = {}
+        self._pixmaps = OrderedDict()  # stamp -> QPixmap, least recently used first
+        self._thumb_timer = QtCore.QTimer(self)
+        self._thumb_timer.setSingleShot(True)
+        self._thumb_timer.setInterval(THUMB_DEBOUNCE_MS)
+        self._thumb_timer.timeout.connect(self._request_visible_thumbnails)
+        if thumbnail_store is not None:
+            self._thumb_worker = _ThumbnailWorker(thumbnail_store, self)
+            self._thumb_worker.ready.connect(self._on_thumbnail)
+            self._thumb_worker.start()
+            self.verticalScrollBar().valueChanged.connect(self._thumb_timer.start)
+            self.verticalScrollBar().rangeChanged.connect(self._thumb_timer.start)
+
     def load_records(self, rows: list, columns: list, headers: list):
         self.clear()
-        self.setColumnCount(len(columns))
-        self.setHorizontalHeaderLabels(headers)
+        thumbs = self._thumb_store is not None
+        self._thumb_col = len(columns) if thumbs else -1
+        self.setColumnCount(len(columns) + (1 if thumbs else 0))
+        self.setHorizontalHeaderLabels(headers + ([THUMB_HEADER] if thumbs else []))
         self.setRowCount(len(rows))
+        self._records = rows
+        self._row_for_id = {}
         for r, row in enumerate(rows):
             for c, col in enumerate(columns):
                 val = row.get(col, "")
                 item = QtWidgets.QTableWidgetItem("" if val is None else str(val))
                 self.setItem(r, c, item)
+            if thumbs:
+                self._row_for_id[row.get("id")] = r
+                self.setItem(r, self._thumb_col, self._thumb_item(row))
+        if thumbs and not self._thumb_moved:
+            # logical column stays last so row_dict()/id lookups are unchanged; show it first
+            self.horizontalHeader().moveSection(self.horizontalHeader().visualIndex(self._thumb_col), 0)
+            self._thumb_moved = True
         self.resizeColumnsToContents()
         self.resizeRowsToContents()
+        if thumbs:
+            self._thumb_timer.start()
 
     def selected_id(self):
         sel = self.selectionModel().selectedRows()
@@ -38,3 +121,82 @@ class RecordsTable(QtWidgets.QTableWidget):
             it = self.item(row_index, c)
             d[name] = it.text() if it else ""
         return d
+
+    # ---------- thumbnails ----------
+    @staticmethod
+    def _stamp(row: dict):
+        return (row.get("id"), row.get("updated_at") or row.get("created_at") or "")
+
+    def _thumb_item(self, row: dict):
+        from thumbnail_cache import thumb_size
+        item = QtWidgets.QTableWidgetItem()
+        item.setSizeHint(thumb_size(width=self._thumb_store.width) + QtCore.QSize(8, 6))
+        pm = self._pixmaps.get(self._stamp(row))
+        if pm is not None:
+            item.setData(QtCore.Qt.DecorationRole, pm)
+        return item
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._thumb_worker is not None:
+            self._thumb_timer.start()
+
+    def refresh_thumbnails(self):
+        """Request thumbnails for the rows now on screen (e.g. after filtering)."""
+        if self._thumb_worker is not None:
+            self._thumb_timer.start()
+
+    def _visible_rows(self):
+        if not self._records:
+            return []
+        first = self.rowAt(0)
+        if first < 0:
+            return []
+        last = self.rowAt(self.viewport().height() - 1)
+        if last < 0:
+            last = self.rowCount() - 1
+        rows, extra = [], 0
+        for r in range(first, self.rowCount()):
+            if self.isRowHidden(r):
+                continue
+            if r > last:
+                extra += 1
+                if extra > THUMB_PREFETCH_ROWS:
+                    break
+            rows.append(r)
+        return rows
+
+    def _request_visible_thumbnails(self):
+        wanted = []
+        for r in self._visible_rows():
+            if r >= len(self._records):
+                continue
+            row = self._records[r]
+            stamp = self._stamp(row)
+            pm = self._pixmaps.get(stamp)
+            if pm is None:
+                wanted.append((stamp, dict(row)))
+            else:
+                self._pixmaps.move_to_end(stamp)
+        self._thumb_worker.request(wanted)
+
+    def _on_thumbnail(self, stamp, img):
+        self._pixmaps[stamp] = QtGui.QPixmap.fromImage(img)
+        self._pixmaps.move_to_end(stamp)
+        while len(self._pixmaps) > MAX_THUMB_PIXMAPS:
+            old, _ = self._pixmaps.popitem(last=False)
+            self._set_thumb(old, None)
+        self._set_thumb(stamp, self._pixmaps[stamp])
+
+    def _set_thumb(self, stamp, pixmap):
+        r = self._row_for_id.get(stamp[0])
+        if r is None or r >= len(self._records) or self._stamp(self._records[r]) != stamp:
+            return
+        item = self.item(r, self._thumb_col)
+        if item is not None:
+            item.setData(QtCore.Qt.DecorationRole, pixmap)
+
+    def stop_thumbnails(self):
+        """Stop the thumbnail worker; call before the window closes."""
+        if self._thumb_worker is not None:
+            self._thumb_worker.stop()
@@ -0,0 +1,170 @@
+# ui/tiled_template_item.py
+from PyQt5 import QtCore, QtGui, QtWidgets
+from collections import OrderedDict
+import logging
+import math
+import threading
+
+from template_tiles import TILE_DIR, build_pyramid, open_pyramid
+
+log = logging.getLogger(__name__)
+
+MAX_TILE_PIXMAPS = 128  # 256x256 tiles, about 32 MB
+
+
+class _TileWorker(QtCore.QThread):
+    """Builds the pyramid if needed, then loads requested tiles, newest request first."""
+    pyramid_ready = QtCore.pyqtSignal(object)
+    tile_ready = QtCore.pyqtSignal(object, QtGui.QImage)  # (level, col, row), image
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, image_path, root, pyramid=None, parent=None):
+        super().__init__(parent)
+        self.image_path = image_path
+        self.root = root
+        self.pyramid = pyramid
+        self._cond = threading.Condition()
+        self._pending = []
+        self._stop = False
+
+    def request(self, keys):
+        with self._cond:
+            self._pending = list(keys)
+            self._cond.notify()
+
+    def stop(self, wait_ms=3000):
+        with self._cond:
+            self._stop = True
+            self._pending = []
+            self._cond.notify()
+        self.wait(wait_ms)
+
+    def run(self):
+        if self.pyramid is None:
+            try:
+                self.pyramid = build_pyramid(self.image_path, self.root)
+            except Exception as e:
+                log.exception(f"Building tiles for {self.image_path} failed")
+                self.failed.emit(str(e))
+                return
+            self.pyramid_ready.emit(self.pyramid)
+        while True:
+            with self._cond:
+                while not self._pending and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                key = self._pending.pop(0)
+            img = self.pyramid.load_tile(*key)
+            if not img.isNull():
+                self.tile_ready.emit(key, img)
+
+
+class TiledTemplateItem(QtWidgets.QGraphicsObject):
+    """
+    Template background for the layout editor, drawn from a tile pyramid.
+
+    The item always covers the page (page_size_mm at the editor's dpi), so
+    scene coordinates keep mapping to millimetres exactly, whatever the
+    template's own resolution. paint() picks the pyramid level matching the
+    current zoom and draws only the exposed tiles; tiles not loaded yet are
+    filled from the coarsest level and requested from a worker thread.
+    """
+    def __init__(self, image_path, page_size_mm=(210, 297), dpi=96, tile_root=TILE_DIR, parent=None):
+        super().__init__(parent)
+        self.image_path = image_path
+        self.page_size_mm = page_size_mm
+        self._rect = QtCore.QRectF()
+        self.set_dpi(dpi)
+        self.setFlag(QtWidgets.QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.setZValue(-1)  # behind the text fields
+
+        self._tiles = OrderedDict()  # (level, col, row) -> QPixmap
+        self._top = None             # coarsest level as one pixmap, the fallback
+        self.pyramid = open_pyramid(image_path, tile_root)
+        self._worker = _TileWorker(image_path, tile_root, self.pyramid)
+        self._worker.pyramid_ready.connect(self._on_pyramid)
+        self._worker.tile_ready.connect(self._on_tile)
+        self._worker.failed.connect(lambda msg: log.error(f"❌ Template tiles unavailable: {msg}"))
+        self._worker.start()
+        if self.pyramid is not None:
+            self._load_top()
+
+    # ---------- geometry ----------
+    def set_dpi(self, dpi):
+        self.prepareGeometryChange()
+        w_mm, h_mm = self.page_size_mm
+        self._rect = QtCore.QRectF(0, 0, w_mm / 25.4 * dpi, h_mm / 25.4 * dpi)
+        self.update()
+
+    def boundingRect(self):
+        return self._rect
+
+    # ---------- tiles ----------
+    def _load_top(self):
+        top = self.pyramid.top_level
+        self._top = QtGui.QPixmap(self.pyramid.tile_path(top, 0, 0))
+
+    def _on_pyramid(self, pyramid):
+        self.pyramid = pyramid
+        self._load_top()
+        self.update()
+
+    def _on_tile(self, key, img):
+        self._tiles[key] = QtGui.QPixmap.fromImage(img)
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > MAX_TILE_PIXMAPS:
+            self._tiles.popitem(last=False)
+        self.update(self._tile_scene_rect(*key))
+
+    def _tile_scene_rect(self, level, col, row):
+        lw, lh = self.pyramid.levels[level]
+        t = self.pyramid.tile_size
+        sx, sy = self._rect.width() / lw, self._rect.height() / lh
+        return QtCore.QRectF(col * t * sx, row * t * sy,
+                             min(t, lw - col * t) * sx, min(t, lh - row * t) * sy)
+
+    def stop(self):
+        self._worker.stop()
+
+    # ---------- painting ----------
+    def paint(self, painter, option, widget=None):
+        painter.fillRect(self._rect, QtCore.Qt.white)
+        if self.pyramid is None or self._top is None or self._top.isNull():
+            return
+
+        exposed = option.exposedRect.intersected(self._rect)
+        if exposed.isEmpty():
+            return
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        level = self.pyramid.level_for(self.pyramid.width / self._rect.width() / max(lod, 1e-6))
+        lw, lh = self.pyramid.levels[level]
+        t = self.pyramid.tile_size
+        kx, ky = lw / self._rect.width(), lh / self._rect.height()
+        cols, rows = self.pyramid.grid(level)
+        c0 = max(0, int(exposed.left() * kx) // t)
+        c1 = min(cols - 1, int(math.ceil(exposed.right() * kx)) // t)
+        r0 = max(0, int(exposed.top() * ky) // t)
+        r1 = min(rows - 1, int(math.ceil(exposed.bottom() * ky)) // t)
+
+        painter.save()
+        # antialiased edges leave hairline seams between tiles
+        painter.setRenderHint(QtGui.QPainter.Antialiasing, False)
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, True)
+        tw, th = self._top.width() / self._rect.width(), self._top.height() / self._rect.height()
+        missing = []
+        for row in range(r0, r1 + 1):
+            for col in range(c0, c1 + 1):
+                key = (level, col, row)
+                target = self._tile_scene_rect(*key)
+                pm = self._tiles.get(key)
+                if pm is not None:
+                    self._tiles.move_to_end(key)
+                    painter.drawPixmap(target, pm, QtCore.QRectF(pm.rect()))
+                else:
+                    source = QtCore.QRectF(target.x() * tw, target.y() * th, target.width() * tw, target.height() * th)
+                    painter.drawPixmap(target, self._top, source)
+                    missing.append(key)
+        painter.restore()
+        if missing:
+            self._worker.request(missing)